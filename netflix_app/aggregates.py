@@ -0,0 +1,46 @@
+import numpy as np
+
+TOP_N_CHARTS = 6
+TOP_N_RATED = 10
+
+
+def compute_home_stats(df, dims):
+    """KPIs and chart series for the Home page, computed once per dataset.
+
+    Everything is plain Python data so it can be cached and served as JSON.
+    """
+    stats = {"rows": len(df)}
+    stats["movies"] = int((df["type"] == "Movie").sum()) if "type" in df else 0
+    stats["tv_shows"] = int((df["type"] == "TV Show").sum()) if "type" in df else 0
+    stats["avg_duration"] = (
+        float(df["duration_minutes"].mean()) if "duration_minutes" in df else 0.0
+    )
+
+    if "country" in df:
+        country_counts = df["country"].value_counts()
+        stats["top_country"] = str(df["country"].mode()[0])
+        stats["top_country_count"] = int(country_counts.iloc[0])
+        stats["country_counts"] = {str(k): int(v) for k, v in country_counts.head(TOP_N_CHARTS).items()}
+    else:
+        stats["top_country"], stats["top_country_count"] = "Unknown", 0
+        stats["country_counts"] = {}
+
+    genre_counts = dims.counts("genre").head(TOP_N_CHARTS) if "genre" in dims.tables else {}
+    stats["genre_counts"] = {str(k): int(v) for k, v in genre_counts.items()}
+
+    if "rating" in df:
+        top_rated = np.flatnonzero(df["rating"].notna().to_numpy())[:TOP_N_RATED]
+    else:
+        top_rated = np.arange(min(TOP_N_RATED, len(df)))
+    stats["top_rated_rows"] = top_rated.tolist()
+    return stats
+
+
+def pick_of_the_day(rows, day):
+    """Deterministic (row, mock rating) among ``rows`` titles for a calendar ``day``.
+
+    Seeding on the date keeps the pick stable all day, so it can be cached.
+    """
+    rng = np.random.default_rng(day.toordinal())
+    row = int(rng.integers(rows))
+    return row, round(float(rng.uniform(7.0, 9.5)), 1)
@@ -1,42 +1,503 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, has_request_context, jsonify, request, send_file, url_for
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
+import base64
+import cProfile
+import io
+import itertools
+import json
 import os
+import pstats
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+
+from aggregates import compute_home_stats, pick_of_the_day
+from compression import compress_response
+from create_db import TITLE_COLUMNS, build_database, quote, read_source_stamp, sync_titles
+from cube import SOURCE_COLUMNS as CUBE_COLUMNS, TrendsCube
+from dataset_cache import DatasetCache
+from db_pool import get_pool
+from dimensions import Dimensions
+from export import EXPORT_FORMATS, WRITERS, ExportJobs, available_formats, frame_chunks, progress
+from facets import FacetIndex
+from http_cache import ResponseCache, conditional_get
+from ingest import contains_text, source_view, typed_frame
+from metrics import CONTENT_TYPE, ROW_BUCKETS, Registry, process_metrics
+from out_of_core import (
+    MEMORY_BUDGET_MB,
+    home_stats,
+    iter_chunks,
+    iter_matches,
+    scan_aggregates,
+    scan_filter,
+    take_rows,
+)
+from recommender import Recommender
+from refresh import refresh_frame
+from search_index import SearchIndex, bm25_call, match_expression
+from serializers import (
+    ARROW_MIMETYPE,
+    JSON_ORIENTS,
+    STREAM_FORMATS,
+    frame_records,
+    frame_to_arrow,
+    frame_to_json,
+    iter_cursor_ndjson,
+    iter_frame_ndjson,
+    stream_blocks,
+)
+from snapshot import load_dataset
+from sort_index import KeyIndex
 
 app = Flask(__name__)
 
 # ---------- File Handling ----------
 EXCEL_FILE = "netflix_titles.xlsx"  # optional
 CSV_FILE = "netflix_titles.csv"     # main dataset
+DB_FILE = "netflix.db"
+
+# NETFLIX_DATASET points the API at another catalog (e.g. one from
+# synthetic.py); its SQLite database sits next to it with a .db suffix.
+DATASET = os.environ.get("NETFLIX_DATASET")
+if DATASET:
+    CSV_FILE = DATASET
+    DB_FILE = os.path.splitext(DATASET)[0] + ".db"
+
+# NETFLIX_OUT_OF_CORE=1 never loads the whole CSV: aggregates and filtered
+# lookups stream it in chunks within NETFLIX_MEMORY_BUDGET_MB. Full-text
+# search is served by SQLite; facets and recommendations are unavailable.
+OUT_OF_CORE = os.environ.get("NETFLIX_OUT_OF_CORE", "") not in ("", "0")
+
+# Dataset columns only; the table's integer id stays internal
+SELECT_COLUMNS = ", ".join(quote(c) for c in TITLE_COLUMNS)
+SELECT_TITLES = f"SELECT {SELECT_COLUMNS} FROM netflix"
+
+DEFAULT_PAGE_SIZE = 100  # cursor pagination without an explicit limit
+
+
+
+def parse_titles(path):
+    """Parse the Netflix dataset at ``path`` (CSV or Excel)."""
+    if path.endswith(".csv"):
+        return pd.read_csv(path)
+    return pd.read_excel(path, engine="openpyxl")
+
+
+def load_titles(path):
+    """Load the typed dataset, preferring a fresh columnar snapshot of the CSV."""
+    with stage("load"):
+        return load_dataset(path, parse_titles)
+
 
+# Shared by every request thread; reloads when the file's mtime/size changes.
+# A reload is diffed against the loaded frame by show_id, so that indexes
+# and aggregates are patched for the changed rows instead of rebuilt.
+dataset_cache = DatasetCache(
+    load_titles, [CSV_FILE] if DATASET else [CSV_FILE, EXCEL_FILE], refresh=refresh_frame,
+)
+
+
+# Serialized /api responses, keyed by ETag and bounded by total size
+response_cache = ResponseCache()
+
+
+def data_stamps():
+    """(path, mtime_ns, size) of the dataset and SQLite files; stats only."""
+    stamps = [dataset_cache.source_signature()]
+    if os.path.exists(DB_FILE):
+        st = os.stat(DB_FILE)
+        stamps.append((DB_FILE, st.st_mtime_ns, st.st_size))
+    return stamps
+
+
+def data_version():
+    return repr(data_stamps())
+
+
+def data_last_modified():
+    mtime_ns = max(stamp[1] for stamp in data_stamps())
+    return datetime.fromtimestamp(mtime_ns // 1_000_000_000, tz=timezone.utc)
+
+
+def api_cached(vary=None):
+    """ETag/Last-Modified + LRU response caching for a GET endpoint."""
+    return conditional_get(response_cache, data_version, data_last_modified, vary)
 
 
 def read_excel_data():
-    """Read Netflix dataset from CSV (preferred) or Excel if available."""
-    if os.path.exists(CSV_FILE):
-        df = pd.read_csv(CSV_FILE)
-    elif os.path.exists(EXCEL_FILE):
-        df = pd.read_excel(EXCEL_FILE, engine="openpyxl")
-    else:
-        raise FileNotFoundError("Neither netflix_titles.csv nor netflix_titles.xlsx found!")
+    """Read Netflix dataset from CSV (preferred) or Excel if available.
+
+    The frame is served from ``dataset_cache`` and must not be modified.
+    """
+    return dataset_cache.get()
+
+
+
+# One pool of WAL-mode connections shared by every request thread
+sql_pool = get_pool(DB_FILE)
+_sql_synced = None  # dataset version the tables were last checked against
+_sql_lock = threading.Lock()
+
+
+def dataset_frames():
+    """The current dataset as an iterable of typed frames (chunks out-of-core)."""
+    return iter_chunks(CSV_FILE) if OUT_OF_CORE else [read_excel_data()]
+
+
+def ensure_sql_database():
+    """Create the 'netflix' tables from CSV if missing; sync them when the CSV changes.
+
+    Costs a stat per call once the tables match the current file version.
+    """
+    global _sql_synced
+    version = dataset_cache.source_version()
+    if _sql_synced == version:
+        return
+    with _sql_lock:
+        if _sql_synced == version:
+            return
+        with sql_pool.connection() as conn:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+            stamp = read_source_stamp(conn)
+        if not {"netflix", "netflix_fts"} <= tables:
+            print("Creating 'netflix' table from CSV...")
+            with stage("load"):
+                build_database(DB_FILE, dataset_frames(), stamp=version)
+        elif stamp != version:
+            with stage("load"), sql_pool.connection() as conn:
+                counts = sync_titles(conn, dataset_frames(), version)
+            if counts is not None:
+                print(f"Synced 'netflix' table with {version}: {counts}")
+        _sql_synced = version
+
+
+def sql_connection():
+    """Borrow a pooled connection to the (auto-created) SQLite DB."""
+    ensure_sql_database()
+    return sql_pool.connection()
+
+
+# ---------- Metrics ----------
+# Requests and their stages (load, index, filter, aggregate, serialize) are
+# timed into /metrics and each response's Server-Timing header. Stages may
+# nest: a filter that first builds the facets also reports an index stage.
+metrics = Registry()
+request_seconds = metrics.histogram(
+    "netflix_api_request_seconds", "Time to produce a response (headers, for streams).",
+    ("endpoint", "method", "status"),
+)
+stage_seconds = metrics.histogram(
+    "netflix_api_stage_seconds", "Time spent in one stage of a request or the warm-up.", ("endpoint", "stage"),
+)
+response_rows = metrics.histogram(
+    "netflix_api_response_rows", "Rows in each tabular response.", ("endpoint",), buckets=ROW_BUCKETS,
+)
+
+
+def _dataset_lookups():
+    stats = dataset_cache.stats()
+    return [(("hit",), stats["hits"]), (("miss",), stats["misses"]), (("reload",), stats["reloads"])]
+
+
+def _response_lookups():
+    stats = response_cache.stats()
+    return [(("hit",), stats["hits"]), (("miss",), stats["misses"])]
+
+
+metrics.collected("netflix_dataset_cache_lookups_total", "Dataset cache lookups by result.", "counter",
+                  _dataset_lookups, ("result",))
+metrics.collected("netflix_dataset_rows", "Rows in the loaded dataset.", "gauge",
+                  lambda: [((), dataset_cache.stats()["rows"])])
+metrics.collected("netflix_response_cache_lookups_total", "Response cache lookups by result.", "counter",
+                  _response_lookups, ("result",))
+metrics.collected("netflix_response_cache_evictions_total", "Responses evicted from the cache.", "counter",
+                  lambda: [((), response_cache.stats()["evictions"])])
+metrics.collected("netflix_response_cache_bytes", "Bytes of cached response bodies.", "gauge",
+                  lambda: [((), response_cache.stats()["bytes"])])
+metrics.collected("netflix_response_cache_entries", "Cached response bodies.", "gauge",
+                  lambda: [((), response_cache.stats()["entries"])])
+metrics.collected("netflix_sql_pool_connections", "Open and idle pooled SQLite connections.", "gauge",
+                  lambda: [(("open",), sql_pool.stats()["opened"]), (("idle",), sql_pool.stats()["idle"])],
+                  ("state",))
+metrics.collected("netflix_sql_pool_waits_total", "Borrows that waited for a free connection.", "counter",
+                  lambda: [((), sql_pool.stats()["waits"])])
+for metric in process_metrics():
+    metrics.register(metric)
+
+# NETFLIX_PROFILE=1 enables ?profile=<pstats sort key> on any endpoint: the
+# request runs under cProfile and the response is replaced by the report.
+# The raw profile is saved in NETFLIX_PROFILE_DIR (for snakeviz or pstats).
+PROFILING = os.environ.get("NETFLIX_PROFILE", "") not in ("", "0")
+PROFILE_DIR = os.environ.get("NETFLIX_PROFILE_DIR", tempfile.gettempdir())
+PROFILE_LINES = 40
 
-    # normalize column names
-    df.columns = df.columns.str.strip().str.lower()
-    return df
 
+def _endpoint():
+    if not has_request_context():
+        return "-"  # warm-up
+    return request.url_rule.rule if request.url_rule else "<unmatched>"
+
+
+@contextmanager
+def stage(name):
+    """Time a block as stage ``name`` of the current request (or of the warm-up)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe(elapsed, _endpoint(), name)
+        if has_request_context():
+            g.setdefault("timings", []).append((name, elapsed))
+
+
+def staged(name, build):
+    """``build`` wrapped to run as stage ``name``; for dataset_cache builders."""
+    def run(*args):
+        with stage(name):
+            return build(*args)
+    return run
 
 
 def read_sql_data():
     """Read from SQLite DB (auto-create if not exists)."""
-    engine = create_engine("sqlite:///netflix.db")
+    with sql_connection() as conn, stage("load"):
+        df = pd.read_sql(SELECT_TITLES, con=conn)
+    return df
 
-    if not engine.dialect.has_table(engine.connect(), "netflix"):
-        print("Creating 'netflix' table from CSV...")
-        df = read_excel_data()
-        df.to_sql("netflix", con=engine, index=False, if_exists="replace")
 
-    df = pd.read_sql("SELECT * FROM netflix", con=engine)
-    return df
+def iter_sql_ndjson(sql=SELECT_TITLES, params=()):
+    """Yield NDJSON blocks straight from a SQLite cursor, one chunk at a time."""
+    with sql_connection() as conn:
+        cursor = conn.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        yield from iter_cursor_ndjson(cursor, columns)
+
+
+def stream_response(blocks, fmt):
+    body, mimetype = stream_blocks(blocks, fmt)
+    return Response(body, mimetype=mimetype)
+
+
+def page_response(df, next_cursor):
+    """A keyset page: {"results": [...], "next_cursor": ...} plus an X-Next-Cursor header."""
+    orient = request.args.get("orient", "records")
+    if request.args.get("format") == "arrow" or orient not in JSON_ORIENTS:
+        response = frame_response(df)
+    else:
+        response_rows.observe(len(df), _endpoint())
+        with stage("serialize"):
+            body = (
+                '{"results":' + frame_to_json(df, orient)
+                + ',"next_cursor":' + json.dumps(next_cursor) + "}"
+            )
+        response = Response(body, mimetype="application/json")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+# Key each source's cursors resume after: the show_id for the in-memory
+# frame, the primary key for SQL, the row position for out-of-core scans
+CURSOR_KEYS = {"xlsx": str, "sql": int, "scan": int}
+
+
+def encode_cursor(source, after, version=None):
+    """Opaque token for "rows after ``after``" in a source's stable row order.
+
+    ``version`` ties the token to one version of the dataset file.
+    """
+    payload = {"s": source, "a": CURSOR_KEYS[source](after)}
+    if version is not None:
+        payload["v"] = version
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, source, version=None):
+    """Row key to resume after, or None for the first page (empty token)."""
+    if not token:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        after, cursor_source = payload["a"], payload["s"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_source != source:
+        raise ValueError("Cursor was issued for a different source")
+    if type(after) is not CURSOR_KEYS[source]:
+        raise ValueError("Invalid cursor")
+    if payload.get("v") != version:
+        raise ValueError("Cursor was issued for another version of the dataset; start from cursor=")
+    return after
+
+
+def _first_matching(ids, matches, count):
+    """The first ``count`` ids for which ``matches(ids)`` holds, scanning in chunks."""
+    found, total = [], 0
+    step = max(count * 4, 256)
+    for start in range(0, len(ids), step):
+        chunk = ids[start : start + step]
+        chunk = chunk[matches(chunk)]
+        found.append(chunk)
+        total += len(chunk)
+        if total >= count:
+            break
+    return np.concatenate(found)[:count] if found else ids[:0]
+
+
+def out_of_core_unavailable():
+    return jsonify({"error": "Not available in out-of-core mode (NETFLIX_OUT_OF_CORE)"}), 501
+
+
+def frame_response(df):
+    """Serialize ``df`` as JSON (?orient=records|columns) or Arrow IPC (?format=arrow)."""
+    orient = request.args.get("orient", "records")
+    if request.args.get("format") != "arrow" and orient not in JSON_ORIENTS:
+        return jsonify({"error": f"Unsupported orient: {orient}"}), 400
+    response_rows.observe(len(df), _endpoint())
+    with stage("serialize"):
+        if request.args.get("format") == "arrow":
+            return Response(frame_to_arrow(df), mimetype=ARROW_MIMETYPE)
+        return Response(frame_to_json(df, orient), mimetype="application/json")
+
+
+def get_search_index():
+    """Full-text index over the cached dataset, patched or rebuilt when it reloads."""
+    return dataset_cache.derived(
+        "search_index", staged("index", SearchIndex), staged("index", SearchIndex.patch),
+    )
+
+
+def get_key_index():
+    """Row ids in show_id order, for the CSV source's keyset pages."""
+    return dataset_cache.derived("key_index", staged("index", lambda df: KeyIndex(df["show_id"])))
+
+
+def get_dimensions():
+    return dataset_cache.derived("dimensions", staged("index", Dimensions), staged("index", Dimensions.patch))
+
+
+def get_facet_index():
+    """Per-value row bitmaps over the cached dataset, patched or rebuilt when it reloads."""
+    return dataset_cache.derived(
+        "facets",
+        staged("index", lambda df: FacetIndex(df, get_dimensions())),
+        staged("index", lambda facets, df, changes: facets.patch(df, get_dimensions(), changes)),
+    )
+
+
+def get_recommender(wait=True):
+    """Similar-titles model over the cached dataset, patched or rebuilt when it reloads.
+
+    With ``wait=False`` it is None until a background build has finished.
+    """
+    return dataset_cache.derived(
+        "recommender", staged("index", Recommender), staged("index", Recommender.patch), wait=wait,
+    )
+
+
+def get_home_stats():
+    """Dashboard KPIs for the cached dataset, recomputed only when it reloads."""
+    return dataset_cache.derived(
+        "home_stats", staged("aggregate", lambda df: compute_home_stats(df, get_dimensions()))
+    )
+
+
+def get_scan_aggregates():
+    """Out-of-core Home page counts, one chunked pass per source file version."""
+    return dataset_cache.source_derived("scan_aggregates", staged("aggregate", scan_aggregates))
+
+
+def get_trends_cube():
+    """Trends count cube; after a reload only the changed and added rows are recounted."""
+    if OUT_OF_CORE:
+        return dataset_cache.source_derived(
+            "trends_cube",
+            staged("aggregate", lambda path: TrendsCube.from_chunks(iter_chunks(path, columns=CUBE_COLUMNS))),
+            staged("aggregate", lambda cube, path: cube.update_chunks(iter_chunks(path, columns=CUBE_COLUMNS))),
+        )
+    return dataset_cache.derived(
+        "trends_cube", staged("aggregate", TrendsCube.from_frame), staged("aggregate", TrendsCube.patch),
+    )
+
+
+def facet_selection(facets, type_=None, country=None, rating=None, release_year=None):
+    """Bitmap of rows matching the /api/netflix facet filters.
+
+    ``type`` matches case-insensitively. ``country`` matches titles whose
+    country field contains the text, as on the SQL source. Text within one
+    country is looked up among the listed countries; text that spans the
+    ", " separator falls back to scanning the whole field.
+    """
+    spans_separator = bool(country) and ("," in country or country != country.strip())
+    bits = facets.select(
+        type=facets.matching("type", lambda v: v.lower() == type_.lower()) if type_ else None,
+        country=(facets.matching("country", lambda v: country.lower() in v.lower())
+                 if country and not spans_separator else None),
+        rating=rating or None,
+        release_year=release_year or None,
+    )
+    if spans_separator:
+        bits = bits & np.packbits(contains_text(read_excel_data()["country"], country))
+    return bits
+
+
+def build_netflix_query(title=None, type_=None, country=None, rating=None,
+                        release_year=None, limit=None, offset=0, q=None,
+                        keyset=False, after_id=None):
+    """Translate /api/netflix filters into a parameterized SQLite query.
+
+    Mirrors the DataFrame filters in ``get_netflix_data()`` so that only the
+    matching page of rows is read from disk. Rows keep table (rowid) order,
+    except for ``q`` full-text searches, which are ranked by relevance.
+    With ``keyset`` the query also returns ``row_id`` and seeks past
+    ``after_id`` on the primary key instead of using OFFSET.
+    """
+    sql = f"SELECT netflix.id AS row_id, {SELECT_COLUMNS} FROM netflix" if keyset else SELECT_TITLES
+    clauses, params = [], []
+    if q:
+        expression = match_expression(q)
+        if expression is None:
+            clauses.append("0")
+        else:
+            sql += (
+                f" JOIN (SELECT rowid AS hit_id, {bm25_call('netflix_fts')} AS score"
+                " FROM netflix_fts WHERE netflix_fts MATCH ?) AS hits"
+                " ON hits.hit_id = netflix.id"
+            )
+            params.append(expression)
+    if title:
+        clauses.append("instr(lower_text(title), ?) > 0")
+        params.append(title.lower())
+    if type_:
+        clauses.append("lower(type) = ?")
+        params.append(type_.lower())
+    if country:
+        clauses.append("instr(lower_text(country), ?) > 0")
+        params.append(country.lower())
+    if rating:
+        clauses.append("rating = ?")
+        params.append(rating)
+    if release_year:
+        clauses.append("release_year = ?")
+        params.append(release_year)
+    if after_id is not None:
+        clauses.append("netflix.id > ?")
+        params.append(after_id)
+
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY hits.score, netflix.id" if "hits" in sql else " ORDER BY netflix.id"
+    if keyset:
+        sql += " LIMIT ?"
+        params.append(limit)
+    elif limit is not None:
+        sql += " LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+    return sql, tuple(params)
 
 
 # ---------- API Endpoints ----------
@@ -48,39 +509,100 @@ def home():
             "/api/sql",
             "/api/netflix?source=xlsx&type=Movie&country=India",
             "/api/netflix?source=sql&rating=PG-13&release_year=2020&limit=5&offset=0",
+            "/api/netflix?q=space adventure&limit=10",
+            "/api/netflix?source=sql&type=Movie&limit=20&cursor=",
+            "/api/xlsx?format=ndjson",
+            "/api/sql?format=json-stream",
+            "/api/xlsx?orient=columns",
+            "/api/netflix?type=Movie&format=arrow",
+            "/api/facets?type=Movie&country=India",
+            "/api/recommendations/s1?limit=5",
+            "/api/stats",
+            "/api/trends?genre=Dramas&country=India",
+            "/api/export?format=csv&type=Movie&country=India",
+            "/api/export?format=parquet&background=1",
+            "/api/cache/stats",
+            "/metrics",
         ],
         "message": "Welcome to the Netflix Titles API!",
     }
 
 
 @app.route("/api/xlsx", methods=["GET"])
+@api_cached()
 def get_excel_data():
+    fmt = request.args.get("format", "json")
+    if OUT_OF_CORE:
+        # Never materialize the catalog: stream it chunk by chunk
+        blocks = (block for chunk in iter_chunks(CSV_FILE) for block in iter_frame_ndjson(source_view(chunk)))
+        return stream_response(blocks, fmt if fmt in STREAM_FORMATS else "json-stream")
     try:
-        df = read_excel_data()
-        return jsonify(df.to_dict(orient="records"))
+        df = source_view(read_excel_data())
+        if fmt in STREAM_FORMATS:
+            return stream_response(iter_frame_ndjson(df), fmt)
+        return frame_response(df)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/sql", methods=["GET"])
+@api_cached()
 def get_sql_data():
+    fmt = request.args.get("format", "json")
+    if OUT_OF_CORE and fmt not in STREAM_FORMATS:
+        fmt = "json-stream"  # no SELECT * into one DataFrame
     try:
+        if fmt in STREAM_FORMATS:
+            ensure_sql_database()  # surface DB errors before the stream starts
+            return stream_response(iter_sql_ndjson(), fmt)
         df = read_sql_data()
-        return jsonify(df.to_dict(orient="records"))
+        return frame_response(df)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+SEARCH_BATCH = 10_000  # first batch of matches a filtered, paginated search ranks
+
+
+def matching_rows(df, mask, q=None, title=None, wanted=None):
+    """Row ids within facet ``mask`` that match ``q`` and ``title``, in response order.
+
+    ``wanted`` (offset + limit) says only the first rows are needed: a
+    search then fetches ranked matches from the index in growing batches
+    until that many pass the filters, or the matches run out.
+    """
+    def keep(ids):
+        ids = ids[mask[ids]]
+        # Title substring only scans rows that survived the facet filters
+        if title:
+            ids = ids[contains_text(df["title"].iloc[ids], title)]
+        return ids
+
+    # Full-text search keeps relevance order; otherwise rows stay in file order
+    if not q:
+        return keep(np.flatnonzero(mask))
+    index = get_search_index()
+    if wanted is None:
+        return keep(np.asarray(index.search(q), dtype=np.int64))
+    batch = wanted if not title and mask.all() else max(SEARCH_BATCH, 4 * wanted)
+    found, kept, fetched = [], 0, 0
+    while True:
+        ids = np.asarray(index.search(q, batch, fetched), dtype=np.int64)
+        found.append(keep(ids))
+        kept += len(found[-1])
+        fetched += len(ids)
+        if kept >= wanted or len(ids) < batch:
+            return np.concatenate(found)
+        batch *= 2
+
+
 @app.route("/api/netflix", methods=["GET"])
+@api_cached()
 def get_netflix_data():
     source = request.args.get("source", "xlsx")
 
-    if source == "xlsx":
-        df = read_excel_data()
-    else:
-        df = read_sql_data()
-
     # Optional filters
+    q = request.args.get("q")  # ranked full-text search
     title = request.args.get("title")
     type_ = request.args.get("type")  # Movie / TV Show
     country = request.args.get("country")
@@ -88,24 +610,391 @@ def get_netflix_data():
     release_year = request.args.get("release_year", type=int)
     limit = request.args.get("limit", type=int)
     offset = request.args.get("offset", type=int, default=0)
+    if offset < 0 or (limit is not None and limit < 0):
+        return jsonify({"error": "limit and offset must not be negative"}), 400
+
+    # Keyset pagination: ?cursor= (empty for the first page), then next_cursor
+    keyset = "cursor" in request.args
+    if keyset:
+        cursor_source = "sql" if source != "xlsx" else "scan" if OUT_OF_CORE else "xlsx"
+        # Scans resume at a row position, which only holds within one file version
+        cursor_version = dataset_cache.source_version() if cursor_source == "scan" else None
+        if q:
+            return jsonify({"error": "cursor pagination is not supported with q"}), 400
+        try:
+            after = decode_cursor(request.args["cursor"], cursor_source, cursor_version)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        limit = limit if limit is not None and limit > 0 else DEFAULT_PAGE_SIZE
+
+    if OUT_OF_CORE and q:
+        source = "sql"  # ranked search comes from the SQLite FTS index
+
+    if source != "xlsx" and keyset:
+        # Seek on the primary key; fetch one extra row to know if there is more
+        sql, params = build_netflix_query(
+            title=title, type_=type_, country=country, rating=rating,
+            release_year=release_year, limit=limit + 1, keyset=True, after_id=after,
+        )
+        with sql_connection() as conn, stage("filter"):
+            df = pd.read_sql(sql, con=conn, params=params)
+        more = len(df) > limit
+        df = df.iloc[:limit]
+        next_cursor = encode_cursor(cursor_source, df["row_id"].iloc[-1]) if more else None
+        return page_response(df.drop(columns="row_id"), next_cursor)
+
+    if source != "xlsx":
+        # Push filters and pagination down into SQLite
+        sql, params = build_netflix_query(
+            title=title, type_=type_, country=country, rating=rating,
+            release_year=release_year, limit=limit, offset=offset, q=q,
+        )
+        with sql_connection() as conn, stage("filter"):
+            df = pd.read_sql(sql, con=conn, params=params)
+        return frame_response(df)
+
+    if OUT_OF_CORE:
+        filters = dict(title=title, type_=type_, country=country, rating=rating, release_year=release_year)
+        if keyset:
+            with stage("filter"):
+                page = scan_filter(CSV_FILE, filters, limit + 1, after=after)
+            more = len(page) > limit
+            page = page.iloc[:limit]
+            next_cursor = encode_cursor(cursor_source, page.index[-1], cursor_version) if more else None
+            return page_response(page, next_cursor)
+        if limit is None:
+            blocks = (block for page in iter_matches(CSV_FILE, filters) for block in iter_frame_ndjson(page))
+            return stream_response(blocks, "json-stream")
+        with stage("filter"):
+            page = scan_filter(CSV_FILE, filters, limit, offset)
+        return frame_response(page)
+
+    df = read_excel_data()
+    facets = get_facet_index()
+    with stage("filter"):
+        mask = facets.mask(facet_selection(facets, type_, country, rating, release_year))
+
+        if keyset:
+            # Pages follow show_id order and resume after the last show_id
+            # served, so titles added or removed meanwhile don't shift them
+            keys = get_key_index()
+            ids = keys.order if after is None else keys.order[keys.after(after):]
+            ids = ids[mask[ids]]
+            if title:
+                titles = df["title"]
+                ids = _first_matching(
+                    ids,
+                    lambda chunk: contains_text(titles.iloc[chunk], title),
+                    limit + 1,
+                )
+            more = len(ids) > limit
+            ids = ids[:limit]
+        else:
+            ids = matching_rows(df, mask, q, title, None if limit is None else offset + limit)
+
+            # Pagination
+            if limit is not None:
+                ids = ids[offset : offset + limit]
+
+    if keyset:
+        next_cursor = encode_cursor(cursor_source, df["show_id"].iloc[ids[-1]]) if more else None
+        return page_response(source_view(df.iloc[ids]), next_cursor)
+    return frame_response(source_view(df.iloc[ids]))
+
+
+@app.route("/api/facets", methods=["GET"])
+@api_cached()
+def get_facet_counts():
+    """Per-value title counts for each facet, within the current filters."""
+    if OUT_OF_CORE:
+        return out_of_core_unavailable()
+    facets = get_facet_index()
+    selection = facet_selection(
+        facets,
+        request.args.get("type"),
+        request.args.get("country"),
+        request.args.get("rating"),
+        request.args.get("release_year", type=int),
+    )
+    with stage("aggregate"):
+        counts = {
+            facet: [{"value": value, "count": int(count)}
+                    for value, count in facets.counts(facet, selection).items()]
+            for facet in ("type", "rating", "release_year", "country", "genre")
+        }
+    return jsonify({"total": facets.count(selection), "facets": counts})
+
+
+@app.route("/api/recommendations/<show_id>", methods=["GET"])
+@api_cached()
+def get_recommendations(show_id):
+    if OUT_OF_CORE:
+        return out_of_core_unavailable()
+    limit = request.args.get("limit", type=int, default=10)
+    if limit <= 0:
+        return jsonify({"error": "limit must be positive"}), 400
+    df = read_excel_data()
+    recommender = get_recommender(wait=False)
+    if recommender is None:
+        response = jsonify({"error": "Recommendations are being computed, retry shortly"})
+        response.headers["Retry-After"] = "5"
+        return response, 503
+
+    row = recommender.row_of(show_id)
+    if row is None:
+        return jsonify({"error": f"Unknown show_id: {show_id}"}), 404
+
+    with stage("filter"):
+        ids, scores = recommender.similar(row, limit)
+    with stage("serialize"):
+        records = frame_records(source_view(df.iloc[ids]))
+        for record, score in zip(records, scores):
+            record["score"] = round(float(score), 4)
+        return jsonify({"show_id": show_id, "title": df["title"].iloc[row], "recommendations": records})
+
+
+@app.route("/api/stats", methods=["GET"])
+@api_cached(vary=lambda: date.today().isoformat())  # pick of the day changes daily
+def get_stats():
+    """The Home page KPIs, chart series, top rated titles and pick of the day."""
+    today = date.today()
+    if OUT_OF_CORE:
+        stats = home_stats(get_scan_aggregates())
+        row, mock_rating = pick_of_the_day(stats["rows"], today)
+        top_rated = stats.pop("top_rated_rows")
+        with stage("load"):
+            picked = take_rows(CSV_FILE, top_rated + [row])  # one partial scan for both
+        top_rated, pick = picked.iloc[:-1], picked.iloc[[-1]]
+    else:
+        df = read_excel_data()
+        stats = dict(get_home_stats())
+        row, mock_rating = pick_of_the_day(len(df), today)
+        top_rated = source_view(df.iloc[stats.pop("top_rated_rows")])
+        pick = source_view(df.iloc[[row]])
+    stats["version"] = dataset_cache.source_version()
+    with stage("serialize"):
+        for key in ("genre_counts", "country_counts"):  # keep rank order in JSON
+            stats[key] = [{"value": value, "count": count} for value, count in stats[key].items()]
+        stats["top_rated"] = frame_records(top_rated)
+        stats["pick_of_the_day"] = {
+            "date": today.isoformat(),
+            "mock_rating": mock_rating,
+            **frame_records(pick)[0],
+        }
+        return jsonify(stats)
+
+
+@app.route("/api/trends", methods=["GET"])
+@api_cached()
+def get_trends():
+    """Trends page chart series (?genre=&country=&rating=), sliced from the count cube."""
+    cube = get_trends_cube()
+    with stage("aggregate"):
+        trends = cube.series(
+            genre=request.args.get("genre") or None,
+            country=request.args.get("country") or None,
+            rating=request.args.get("rating") or None,
+        )
+    trends["version"] = dataset_cache.source_version()
+    return jsonify(trends)
+
+
+# ---------- Export ----------
+# Larger exports (and out-of-core ones, whose size is unknown) run as jobs
+EXPORT_INLINE_ROWS = int(os.environ.get("NETFLIX_EXPORT_INLINE_ROWS", "50000"))
+export_jobs = ExportJobs()
+
+
+def export_selection(q=None, title=None, type_=None, country=None, rating=None, release_year=None):
+    """(frames in chunks, row count or None) of the /api/netflix selection, unpaginated."""
+    if OUT_OF_CORE:
+        filters = dict(title=title, type_=type_, country=country, rating=rating, release_year=release_year)
+        header = source_view(typed_frame(pd.read_csv(CSV_FILE, nrows=0)))  # columns, even if nothing matches
+        return itertools.chain([header], iter_matches(CSV_FILE, filters)), None
+    df = read_excel_data()
+    facets = get_facet_index()
+    with stage("filter"):
+        ids = matching_rows(df, facets.mask(facet_selection(facets, type_, country, rating, release_year)), q, title)
+    return (source_view(frame) for frame in frame_chunks(df, ids)), len(ids)
+
+
+def export_job_status(job):
+    status = {**job, "progress": progress(job), "status_url": url_for("get_export_job", job_id=job["id"])}
+    if job["status"] == "done":
+        status["download_url"] = url_for("download_export", job_id=job["id"])
+    return status
+
+
+@app.route("/api/export", methods=["GET"])
+def export_titles():
+    """The /api/netflix selection as a file: ?format=csv (default), ndjson or parquet.
+
+    Up to EXPORT_INLINE_ROWS rows stream straight back, a chunk at a time.
+    Larger exports, or any with ?background=1, start a job instead: the
+    answer is 202 with its status URL, to poll until it can be downloaded.
+    ?background=0 always streams.
+    """
+    fmt = request.args.get("format", "csv")
+    if fmt not in available_formats():
+        return jsonify({"error": f"Unsupported format: {fmt} (use {', '.join(available_formats())})"}), 400
+    q = request.args.get("q")
+    if OUT_OF_CORE and q:
+        return jsonify({"error": "q is not supported for exports in out-of-core mode"}), 400
+    frames, total = export_selection(
+        q=q,
+        title=request.args.get("title"),
+        type_=request.args.get("type"),
+        country=request.args.get("country"),
+        rating=request.args.get("rating"),
+        release_year=request.args.get("release_year", type=int),
+    )
+
+    background = request.args.get("background")
+    if background == "1" or (background != "0" and (total is None or total > EXPORT_INLINE_ROWS)):
+        job = export_jobs.submit(fmt, frames, total)
+        response = jsonify(export_job_status(job))
+        response.status_code = 202
+        response.headers["Location"] = url_for("get_export_job", job_id=job["id"])
+        return response
+
+    if total is not None:
+        response_rows.observe(total, _endpoint())
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    return Response(
+        WRITERS[fmt](frames),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="netflix_titles.{extension}"'},
+    )
+
+
+@app.route("/api/export/jobs/<job_id>", methods=["GET"])
+def get_export_job(job_id):
+    """Status and progress of an export job (any worker can answer)."""
+    job = export_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown export job: {job_id}"}), 404
+    return jsonify(export_job_status(job))
+
+
+@app.route("/api/export/jobs/<job_id>/download", methods=["GET"])
+def download_export(job_id):
+    job = export_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown export job: {job_id}"}), 404
+    if job["status"] != "done":
+        return jsonify(export_job_status(job)), 409
+    return send_file(
+        export_jobs.file(job), mimetype=EXPORT_FORMATS[job["format"]][0],
+        as_attachment=True, download_name=job["file_name"],
+    )
+
+
+@app.route("/api/cache/stats", methods=["GET"])
+def get_cache_stats():
+    return jsonify({
+        **dataset_cache.stats(),
+        "pid": os.getpid(),
+        "out_of_core": {"memory_budget_mb": MEMORY_BUDGET_MB} if OUT_OF_CORE else None,
+        "sql_pool": sql_pool.stats(),
+        "response_cache": response_cache.stats(),
+    })
+
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Prometheus exposition: latencies, stage timings, cache lookups, rows, RSS."""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+
+@app.before_request
+def start_request():
+    g.started = time.perf_counter()
+    if PROFILING and "profile" in request.args:
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+# after_request hooks run in reverse order: profile_report(), compress(), then this
+@app.after_request
+def record_request(response):
+    """Observe the request latency and send the stage timings as Server-Timing."""
+    elapsed = time.perf_counter() - g.pop("started", time.perf_counter())
+    request_seconds.observe(elapsed, _endpoint(), request.method, response.status_code)
+    timings = g.pop("timings", [])
+    response.headers["Server-Timing"] = ", ".join(
+        [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings]
+        + [f"total;dur={elapsed * 1000:.2f}"]
+    )
+    return response
+
+
+@app.after_request
+def compress(response):
+    """Negotiate gzip/br/zstd; compressed bodies are cached next to the identity one."""
+    return compress_response(response, request.accept_encodings, response_cache)
+
+
+@app.after_request
+def profile_report(response):
+    """Replace a ?profile= response by its cProfile report; the .prof file is kept.
+
+    Streamed bodies are produced after this point, so only the work up to
+    the response headers is profiled.
+    """
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return response
+    profiler.disable()
+    path = os.path.join(PROFILE_DIR, f"netflix-{os.getpid()}-{time.time_ns()}.prof")
+    profiler.dump_stats(path)
+    sort = request.args.get("profile")
+    if sort not in pstats.Stats.sort_arg_dict_default:
+        sort = "cumulative"
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats(sort).print_stats(PROFILE_LINES)
+    body = f"{request.method} {request.full_path} -> {response.status}\nSaved {path}\n{report.getvalue()}"
+    profiled = Response(body, mimetype="text/plain")
+    profiled.headers["X-Profile"] = path
+    return profiled
+
+
+@app.teardown_request
+def stop_profiler(exc):
+    """An unhandled error skips profile_report(); don't leave the thread profiled."""
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+
+
+# ---------- Warm-up ----------
+def warm_up():
+    """Load the dataset, SQLite tables and fork-safe indexes before serving.
+
+    serve.py calls this in the parent so every worker inherits the frame
+    and facets copy-on-write. Pooled SQLite connections are closed
+    afterwards; they must not cross fork().
+    """
+    if OUT_OF_CORE:
+        get_scan_aggregates()
+    else:
+        read_excel_data()
+        get_facet_index()
+        get_key_index()
+        get_home_stats()
+    get_trends_cube()
+    ensure_sql_database()
+    sql_pool.close_all()
 
-    # Apply filters (case-insensitive where needed)
-    if title:
-        df = df[df["title"].str.contains(title, case=False, na=False)]
-    if type_:
-        df = df[df["type"].str.lower() == type_.lower()]
-    if country:
-        df = df[df["country"].str.contains(country, case=False, na=False)]
-    if rating:
-        df = df[df["rating"] == rating]
-    if release_year:
-        df = df[df["release_year"] == release_year]
 
-    # Pagination
-    if limit is not None:
-        df = df.iloc[offset : offset + limit]
+def warm_worker():
+    """Per-process part of the warm-up: the in-memory SQLite search index.
 
-    return jsonify(df.to_dict(orient="records"))
+    The recommender is built on a background thread (threads don't survive
+    fork()); /api/recommendations answers 503 until it is ready.
+    """
+    if not OUT_OF_CORE:
+        get_search_index()
+        get_recommender(wait=False)
 
 
 # ---------- Run ----------
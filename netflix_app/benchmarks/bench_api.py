@@ -0,0 +1,61 @@
+"""Latency and throughput of the /api endpoints through the Flask test client.
+
+The dataset, indexes and SQLite tables are warm, and the response cache is
+cleared before every request, so each timing is a full compute and
+serialize. ``cold_ms`` is the first request for each URL.
+
+    cd netflix_app && python benchmarks/bench_api.py [--scale N] [--tree DIR] [--json PATH]
+"""
+import os
+import sys
+
+from common import cli_args, data_tree, finish, measure, record
+
+# Representative filter combinations, by endpoint
+CASES = [
+    "/api/xlsx",
+    "/api/sql",
+    "/api/xlsx?format=ndjson",
+    "/api/netflix?type=Movie&country=India",
+    "/api/netflix?type=TV Show&rating=TV-MA&limit=50",
+    "/api/netflix?title=love&limit=50",
+    "/api/netflix?q=space adventure&limit=20",
+    "/api/netflix?type=Movie&limit=100&cursor=",
+    "/api/netflix?source=sql&rating=PG-13&release_year=2020&limit=50",
+    "/api/netflix?source=sql&country=India&limit=100&offset=200",
+    "/api/netflix?source=sql&title=love&limit=50",
+    "/api/netflix?source=sql&q=space adventure&limit=20",
+    "/api/netflix?source=sql&type=Movie&limit=100&cursor=",
+    "/api/facets?type=Movie",
+    "/api/stats",
+    "/api/trends",
+    "/api/trends?genre=Dramas&country=India&rating=TV-14",
+    "/api/recommendations/s1?limit=10",
+]
+
+
+def run(data_dir, scale):
+    os.chdir(data_dir)
+    import app
+
+    client = app.app.test_client()
+    app.get_recommender()  # /api/recommendations answers 503 until it is built
+
+
+    def request(url):
+        def call():
+            app.response_cache.clear()
+            response = client.get(url)
+            if response.status_code != 200:
+                raise RuntimeError(f"{url} -> {response.status_code}")
+            response.get_data()  # drain streamed bodies
+
+        return call
+
+    return [record("api", url, scale, measure(request(url))) for url in CASES]
+
+
+if __name__ == "__main__":
+    tree, scale, json_path = cli_args(sys.argv[1:])
+    with data_tree(tree, scale) as data_dir:
+        finish(run(data_dir, scale), json_path)
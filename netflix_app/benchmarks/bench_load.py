@@ -0,0 +1,52 @@
+"""Load time of each data source into the typed frame.
+
+Measures CSV and xlsx parsing, the Arrow snapshot (build and read), and
+the SQLite database (build and full read).
+
+    cd netflix_app && python benchmarks/bench_load.py [--scale N] [--tree DIR] [--json PATH]
+"""
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+
+from common import cli_args, data_tree, finish, measure, record
+from create_db import build_database
+from ingest import typed_frame
+from snapshot import build_snapshot, read_snapshot, snapshot_path
+
+SELECT_ALL = "SELECT * FROM netflix"
+
+
+def run(data_dir, scale):
+    csv_path = os.path.join(data_dir, "netflix_titles.csv")
+    xlsx_path = os.path.join(data_dir, "netflix_titles.xlsx")
+    db_path = os.path.join(data_dir, "bench_load.db")
+    df = typed_frame(pd.read_csv(csv_path))
+
+    def read_sqlite():
+        with sqlite3.connect(db_path) as conn:
+            pd.read_sql(SELECT_ALL, conn)
+
+    # (name, fn, budget seconds); the slow builds get a single timed run
+    cases = [("csv parse + type", lambda: typed_frame(pd.read_csv(csv_path)), 2.0)]
+    if os.path.exists(xlsx_path):
+        cases.append(("xlsx parse + type", lambda: typed_frame(pd.read_excel(xlsx_path, engine="openpyxl")), 0))
+    cases += [
+        ("arrow snapshot build", lambda: build_snapshot(csv_path), 0),
+        ("arrow snapshot read", lambda: read_snapshot(snapshot_path(csv_path)), 2.0),
+        ("sqlite build", lambda: build_database(db_path, df), 0),
+        ("sqlite full read", read_sqlite, 2.0),
+    ]
+    results = []
+    for name, fn, budget in cases:
+        timing = measure(fn, budget_s=budget, min_runs=1, max_runs=10, warmup=False)
+        results.append(record("load", name, scale, timing))
+    return results
+
+
+if __name__ == "__main__":
+    tree, scale, json_path = cli_args(sys.argv[1:])
+    with data_tree(tree, scale) as data_dir:
+        finish(run(data_dir, scale), json_path)
@@ -0,0 +1,53 @@
+"""Compute time of the dashboard pages with Streamlit stubbed out.
+
+streamlit_app.py is imported with benchmarks/streamlit_stub.py standing in
+for ``streamlit``, so each page function runs its pandas work and builds its
+plotly figures, but nothing is rendered. Cached resources (dataset, facets,
+recommender) are built by the first call and reported as ``cold_ms``.
+
+    cd netflix_app && python benchmarks/bench_pages.py [--scale N] [--tree DIR] [--json PATH]
+"""
+import os
+import sys
+
+import streamlit_stub
+from common import cli_args, data_tree, finish, measure, record
+
+# (page function, scenario name, widget answers)
+SCENARIOS = [
+    ("home_page", "default", {}),
+    ("data_page", "default", {}),
+    ("data_page", "search", {"🔍 Search titles, descriptions, cast & directors": "love"}),
+    ("data_page", "sort=title desc", {"↕️ Sort by": "title", "Descending": True}),
+    ("visualization_page", "all", {}),
+    ("visualization_page", "country=India", {"Country": "India"}),
+    ("visualization_page", "genre=Dramas", {"Genre": "Dramas"}),
+    ("recommendations_page", "sample", {}),
+    ("recommendations_page", "similar to s1", {"🔍 Find a show you like:": "Dick Johnson Is Dead"}),
+    ("trends_page", "all", {}),
+    ("trends_page", "genre+rating", {"Genre": "Dramas", "Rating": "TV-MA"}),
+]
+
+
+def run(data_dir, scale):
+    # streamlit_app.py reads netflix_app/netflix_titles.csv from the tree root
+    os.chdir(os.path.dirname(os.path.abspath(data_dir)))
+    st = streamlit_stub.install()
+    import streamlit_app
+
+    results = []
+    for page, scenario, answers in SCENARIOS:
+        def call():
+            st.session_state.clear()
+            streamlit_stub.answers.clear()
+            streamlit_stub.answers.update(answers)
+            getattr(streamlit_app, page)()
+
+        results.append(record("pages", f"{page} [{scenario}]", scale, measure(call)))
+    return results
+
+
+if __name__ == "__main__":
+    tree, scale, json_path = cli_args(sys.argv[1:])
+    with data_tree(tree, scale) as data_dir:
+        finish(run(data_dir, scale), json_path)
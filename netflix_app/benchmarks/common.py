@@ -0,0 +1,102 @@
+"""Shared helpers for the benchmark scripts: timing, data trees, result output."""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # netflix_app/
+sys.path.insert(0, HERE)
+
+from synthetic import write_scaled_csv  # noqa: E402
+
+SOURCE_CSV = os.path.join(HERE, "netflix_titles.csv")
+SOURCE_XLSX = os.path.join(HERE, "netflix_titles.xlsx")
+BUDGET_S = 1.0
+
+
+def measure(fn, budget_s=BUDGET_S, min_runs=3, max_runs=50, warmup=True):
+    """Time ``fn()``; the first call is reported apart as ``cold_ms`` when ``warmup``."""
+    timing = {}
+    if warmup:
+        start = time.perf_counter()
+        fn()
+        timing["cold_ms"] = (time.perf_counter() - start) * 1000
+    samples = []
+    deadline = time.perf_counter() + budget_s
+    while len(samples) < min_runs or (len(samples) < max_runs and time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    timing.update(
+        n=len(samples),
+        median_ms=statistics.median(samples) * 1000,
+        p95_ms=samples[min(len(samples) - 1, int(0.95 * len(samples)))] * 1000,
+        ops_per_s=len(samples) / sum(samples),
+    )
+    return timing
+
+
+def prepare_tree(root, scale=1):
+    """Lay out ``root/netflix_app/netflix_titles.csv`` at ``scale``; return that directory.
+
+    The apps use paths relative to their working directory, so each run gets
+    its own tree and never writes a database or snapshot into the repo.
+    """
+    data_dir = os.path.join(root, "netflix_app")
+    os.makedirs(data_dir, exist_ok=True)
+    csv_path = os.path.join(data_dir, "netflix_titles.csv")
+    if scale == 1:
+        shutil.copy(SOURCE_CSV, csv_path)
+        if os.path.exists(SOURCE_XLSX):
+            shutil.copy(SOURCE_XLSX, data_dir)
+    else:
+        write_scaled_csv(SOURCE_CSV, scale, csv_path)
+    return data_dir
+
+
+@contextmanager
+def data_tree(data_dir=None, scale=1):
+    """Yield ``data_dir``, or a temporary tree at ``scale`` that is removed afterwards."""
+    if data_dir:
+        yield data_dir
+        return
+    with tempfile.TemporaryDirectory(prefix="netflix-bench-") as root:
+        yield prepare_tree(root, scale)
+
+
+def record(group, name, scale, timing):
+    return {"group": group, "name": name, "scale": scale, **timing}
+
+
+def print_results(results):
+    print(f"{'group':<6} {'scale':>6} {'name':<58} {'median ms':>10} {'p95 ms':>9} {'cold ms':>9}")
+    for r in results:
+        cold = f"{r['cold_ms']:9.1f}" if "cold_ms" in r else f"{'':>9}"
+        print(
+            f"{r['group']:<6} {str(r['scale']) + 'x':>6} {r['name'][:58]:<58} "
+            f"{r['median_ms']:10.2f} {r['p95_ms']:9.2f} {cold}"
+        )
+
+
+def cli_args(argv):
+    """(tree dir, scale, json path) from ``--tree DIR --scale N --json PATH``."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tree", help="data directory from prepare_tree() (default: a temp one)")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--json", help="write results here instead of printing them")
+    args = parser.parse_args(argv)
+    return args.tree, args.scale, args.json
+
+
+def finish(results, json_path):
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(results, f)
+    else:
+        print_results(results)
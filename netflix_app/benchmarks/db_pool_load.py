@@ -0,0 +1,97 @@
+"""Load test: a fresh sqlite3 connection per request vs. the shared pool.
+
+Runs the login lookup from streamlit_app.py and the filtered /api/netflix
+query from app.py across worker threads. Reports requests/s and how many
+connections each mode opened.
+
+    cd netflix_app && python benchmarks/db_pool_load.py [threads] [requests]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from create_db import build_database
+from db_pool import ConnectionPool
+from ingest import typed_frame
+
+LOGIN_SQL = "SELECT * FROM users WHERE username=? AND password=?"
+TITLES_SQL = "SELECT show_id, title FROM netflix WHERE rating = ? AND release_year = ? LIMIT 5"
+
+
+def per_request(path):
+    """Before: what the apps did, open + query + close on every call."""
+    opened = [0]
+    lock = threading.Lock()
+
+    def run(sql, params):
+        conn = sqlite3.connect(path)
+        with lock:
+            opened[0] += 1
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    return run, lambda: opened[0]
+
+
+def pooled(path, threads):
+    pool = ConnectionPool(path, size=threads)
+
+    def run(sql, params):
+        with pool.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    return run, lambda: pool.opened
+
+
+def load(run, sql, params, threads, requests):
+    per_thread = requests // threads
+
+    def worker():
+        for _ in range(per_thread):
+            run(sql, params)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main(threads=8, requests=4000):
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as tmp:
+        users_db = os.path.join(tmp, "users.db")
+        with sqlite3.connect(users_db) as conn:
+            conn.execute("CREATE TABLE users (username TEXT PRIMARY KEY, password TEXT)")
+            conn.execute("INSERT INTO users VALUES ('admin', 'x')")
+        titles_db = os.path.join(tmp, "netflix.db")
+        build_database(titles_db, typed_frame(pd.read_csv(os.path.join(here, "netflix_titles.csv"))))
+
+        cases = [
+            ("login_user", users_db, LOGIN_SQL, ("admin", "x")),
+            ("/api/netflix sql", titles_db, TITLES_SQL, ("PG-13", 2020)),
+        ]
+        print(f"{threads} threads, {requests:,} requests per case")
+        print(f"{'case':<18} {'mode':<12} {'req/s':>10} {'connections':>12}")
+        for name, path, sql, params in cases:
+            for mode, (run, opened) in (
+                ("per-request", per_request(path)),
+                ("pooled", pooled(path, threads)),
+            ):
+                rate = load(run, sql, params, threads, requests)
+                print(f"{name:<18} {mode:<12} {rate:>10,.0f} {opened():>12,}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,107 @@
+"""Throughput of the debug server (python app.py) vs. the preforked serve.py.
+
+Starts each server on a free port, measures the time until the first
+recommendation request succeeds, then replays a mix of uncached /api
+requests (a distinct offset or show_id per request defeats the response
+cache) from client threads. Reports requests/s and latency percentiles.
+
+    cd netflix_app && python benchmarks/serve_load.py [clients] [requests] [workers]
+"""
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# One uncached request per index: distinct query strings miss the ETag cache
+REQUEST_MIX = [
+    "/api/netflix?type=Movie&limit=20&offset={i}",
+    "/api/netflix?source=sql&rating=TV-MA&limit=20&offset={i}",
+    "/api/netflix?q=love&limit=10&offset={i}",
+    "/api/recommendations/s{n}?limit=10",
+]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def fetch(port, path):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=60) as response:
+        return response.read()
+
+
+def wait_ready(port, started, timeout=120):
+    """Seconds from process start until a recommendation request succeeds."""
+    while time.perf_counter() - started < timeout:
+        try:
+            fetch(port, "/api/recommendations/s1")
+            return time.perf_counter() - started
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def run_load(port, clients, requests):
+    per_client = requests // clients
+    latencies = []
+    lock = threading.Lock()
+
+    def client(offset):
+        mine = []
+        for k in range(per_client):
+            i = offset * per_client + k
+            path = REQUEST_MIX[i % len(REQUEST_MIX)].format(i=i, n=i % 8000 + 1)
+            start = time.perf_counter()
+            fetch(port, path)
+            mine.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    return len(latencies) / elapsed, pick(0.5), pick(0.95)
+
+
+def servers(workers):
+    python = sys.executable
+    yield "app.py (debug)", lambda port: [python, "-m", "flask", "--app", "app", "run", "--debug", "--port", str(port)]
+    yield "serve.py 1x8", lambda port: [python, "serve.py", "--workers", "1", "--port", str(port)]
+    if workers > 1:
+        yield f"serve.py {workers}x8", lambda port: [python, "serve.py", "--workers", str(workers), "--port", str(port)]
+
+
+def main(clients=8, requests=800, workers=os.cpu_count() or 1):
+    print(f"{os.cpu_count()} CPUs, {clients} clients, {requests:,} uncached requests")
+    print(f"{'server':<16} {'ready':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, command in servers(workers):
+        port = free_port()
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            command(port), cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        try:
+            ready = wait_ready(port, started)
+            rate, p50, p95 = run_load(port, clients, requests)
+            print(f"{name:<16} {ready:>7.1f}s {rate:>8,.0f} {p50:>8.1f} {p95:>8.1f}")
+        finally:
+            os.killpg(process.pid, 2)  # SIGINT, like Ctrl+C: stops workers and the reloader
+            process.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:4]))
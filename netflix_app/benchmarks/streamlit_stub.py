@@ -0,0 +1,114 @@
+"""A stand-in ``streamlit`` module so page functions run without a server.
+
+Widgets return their defaults, or the value in ``answers`` for their label.
+Layout calls return context managers, and output calls do nothing.
+``cache_data`` and ``cache_resource`` memoize the way Streamlit does, so
+only the page's own pandas and plotly work is left to measure.
+"""
+import functools
+import sys
+import types
+
+answers = {}  # widget label -> value to return instead of the default
+
+
+class _Element:
+    """Return value of layout calls: usable as a context manager and a widget host."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return getattr(module, name)
+
+
+def _noop(*args, **kwargs):
+    return _Element()
+
+
+def _columns(spec, **kwargs):
+    return [_Element() for _ in range(spec if isinstance(spec, int) else len(spec))]
+
+
+def _tabs(labels, **kwargs):
+    return [_Element() for _ in labels]
+
+
+def _selectbox(label, options, index=0, **kwargs):
+    options = list(options)
+    return answers.get(label, options[index] if options else None)
+
+
+def _multiselect(label, options, default=None, **kwargs):
+    return answers.get(label, list(default or []))
+
+
+def _slider(label, min_value=None, max_value=None, value=None, **kwargs):
+    return answers.get(label, value if value is not None else min_value)
+
+
+def _number_input(label, min_value=None, max_value=None, value=None, **kwargs):
+    return answers.get(label, value if value is not None else min_value)
+
+
+def _text_input(label, value="", **kwargs):
+    return answers.get(label, value)
+
+
+def _button(label, **kwargs):
+    return answers.get(label, False)
+
+
+def _cache(func=None, **kwargs):
+    def decorate(f):
+        cached = functools.lru_cache(maxsize=None)(f)
+        cached.clear = cached.cache_clear
+        return cached
+
+    return decorate(func) if func is not None else decorate
+
+
+def _fragment(func=None, **kwargs):
+    """Fragments just run as part of the page."""
+    return func if func is not None else (lambda f: f)
+
+
+class _SessionState(dict):
+    __getattr__ = dict.get
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+class _StubModule(types.ModuleType):
+    def __getattr__(self, name):
+        return _noop
+
+
+module = _StubModule("streamlit")
+module.__dict__.update(
+    columns=_columns,
+    tabs=_tabs,
+    selectbox=_selectbox,
+    radio=_selectbox,
+    multiselect=_multiselect,
+    slider=_slider,
+    number_input=_number_input,
+    text_input=_text_input,
+    button=_button,
+    form_submit_button=_button,
+    checkbox=_button,
+    cache_data=_cache,
+    cache_resource=_cache,
+    fragment=_fragment,
+    session_state=_SessionState(),
+)
+
+
+def install():
+    """Register the stub as ``streamlit``; call before importing streamlit_app."""
+    sys.modules["streamlit"] = module
+    return module
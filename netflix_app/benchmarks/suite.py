@@ -0,0 +1,143 @@
+"""Run the benchmark suite across dataset scales and compare runs for regressions.
+
+``run`` generates each scaled dataset once (see synthetic.py). It then runs
+bench_load.py, bench_api.py and bench_pages.py against it, each in its own
+process, and writes one JSON file. ``compare`` matches two such files by
+(group, scale, name). It flags cases whose median slowed by more than
+``--threshold`` and exits 1 if any did.
+
+    cd netflix_app
+    python benchmarks/suite.py run --scales 1,10 [--groups load,api,pages] [--out FILE]
+    python benchmarks/suite.py compare BASE.json NEW.json [--threshold 0.15]
+
+100x and 1000x datasets are 0.3 GB and 3.4 GB of CSV. Run them with
+``--groups load`` first; the recommender alone takes minutes to build at 100x.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import HERE, prepare_tree, print_results
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+GROUPS = {"load": "bench_load.py", "api": "bench_api.py", "pages": "bench_pages.py"}
+THRESHOLD = 0.15      # relative slowdown that counts as a regression
+MIN_DELTA_MS = 0.5    # ignore changes below timer noise
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(scales, groups):
+    results = []
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix=f"netflix-bench-{scale}x-") as root:
+            start = time.perf_counter()
+            data_dir = prepare_tree(root, scale)
+            print(f"{scale}x dataset ready in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+            for group in groups:
+                out = os.path.join(root, f"{group}.json")
+                subprocess.run(
+                    [sys.executable, os.path.join(BENCH_DIR, GROUPS[group]),
+                     "--tree", data_dir, "--scale", str(scale), "--json", out],
+                    check=True, stdout=subprocess.DEVNULL,
+                )
+                with open(out) as f:
+                    results.extend(json.load(f))
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(base, new, threshold=THRESHOLD):
+    """[(key, base_ms, new_ms, ratio, verdict)] for cases present in both runs."""
+    key = lambda r: (r["group"], r["scale"], r["name"])
+    before = {key(r): r for r in base["results"]}
+    rows = []
+    for r in new["results"]:
+        old = before.get(key(r))
+        if old is None:
+            continue
+        base_ms, new_ms = old["median_ms"], r["median_ms"]
+        ratio = new_ms / base_ms if base_ms else float("inf")
+        if abs(new_ms - base_ms) < MIN_DELTA_MS:
+            verdict = ""
+        elif ratio > 1 + threshold:
+            verdict = "REGRESSION"
+        elif ratio < 1 / (1 + threshold):
+            verdict = "faster"
+        else:
+            verdict = ""
+        rows.append((key(r), base_ms, new_ms, ratio, verdict))
+    return rows
+
+
+def print_comparison(rows, base, new):
+    print(f"base: {base['meta'].get('git')} {base['meta'].get('created')}")
+    print(f"new:  {new['meta'].get('git')} {new['meta'].get('created')}")
+    print(f"{'group':<6} {'scale':>6} {'name':<52} {'base ms':>9} {'new ms':>9} {'change':>8}")
+    for (group, scale, name), base_ms, new_ms, ratio, verdict in sorted(rows, key=lambda row: -row[3]):
+        print(
+            f"{group:<6} {str(scale) + 'x':>6} {name[:52]:<52} "
+            f"{base_ms:9.2f} {new_ms:9.2f} {(ratio - 1) * 100:+7.1f}% {verdict}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_cmd = commands.add_parser("run")
+    run_cmd.add_argument("--scales", default="1", help="comma-separated, e.g. 1,10,100")
+    run_cmd.add_argument("--groups", default=",".join(GROUPS))
+    run_cmd.add_argument("--out", help=f"JSON file (default: {os.path.relpath(RESULTS_DIR, HERE)}/<time>.json)")
+    cmp_cmd = commands.add_parser("compare")
+    cmp_cmd.add_argument("base")
+    cmp_cmd.add_argument("new")
+    cmp_cmd.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        scales = [int(s) for s in args.scales.split(",")]
+        groups = [g for g in args.groups.split(",") if g]
+        unknown = set(groups) - set(GROUPS)
+        if unknown:
+            parser.error(f"unknown groups: {', '.join(sorted(unknown))}")
+        run = run_suite(scales, groups)
+        out = args.out or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        with open(out, "w") as f:
+            json.dump(run, f, indent=1)
+        print_results(run["results"])
+        print(f"\nWrote {out}")
+        return 0
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    rows = compare(base, new, args.threshold)
+    print_comparison(rows, base, new)
+    return 1 if any(verdict == "REGRESSION" for *_, verdict in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Title cards rendered as one HTML grid, built from whole columns.
+
+A grid is a single ``st.markdown`` payload instead of one element per
+card: each field's column is escaped in one pass, and the cards are
+filled from a single template and joined. The look comes from the
+``nf-*`` classes in CARD_CSS, so no card repeats its inline styles.
+"""
+from html import escape
+
+import pandas as pd
+
+CARD_CSS = """
+        .nf-grid {display: grid; gap: 16px; margin-bottom: 12px;}
+        .nf-grid.centered .nf-card {text-align: center;}
+        .nf-card {background: #1e1e2e; padding: 15px; border-radius: 10px; overflow-wrap: anywhere;}
+        .nf-card h4 {color: white; margin: 5px 0;}
+        .nf-card p {margin: 4px 0; font-size: 14px; color: #bbb;}
+        .nf-card p.nf-text {font-size: 13px; color: #aaa;}
+        .nf-card p.nf-muted {font-size: 12px; color: #888;}
+        .nf-card p.nf-score {font-size: 18px; color: #f5f5f5;}
+        .nf-badge {color: #ff4b4b; font-weight: bold;}
+        .nf-card.nf-feature {background: linear-gradient(135deg, #E50914, #221f1f); padding: 20px; border-radius: 12px;}
+        .nf-card.nf-feature h3 {color: black;}
+        .nf-card.nf-feature p {font-size: 16px; color: white;}
+        @media (max-width: 900px) {.nf-grid {grid-template-columns: repeat(2, minmax(0, 1fr)) !important;}}
+"""
+
+
+def escape_column(values, default=""):
+    """``values`` as a list of HTML-escaped strings; missing values become ``default``."""
+    return [default if pd.isna(value) else escape(str(value)) for value in _as_list(values)]
+
+
+def truncate(values, length, suffix="..."):
+    """Text values cut to ``length`` characters, with ``suffix`` where cut."""
+    return [
+        None if pd.isna(text) else (text if len(str(text)) <= length else str(text)[:length] + suffix)
+        for text in _as_list(values)
+    ]
+
+
+def _as_list(values):
+    return values.tolist() if hasattr(values, "tolist") else list(values)
+
+
+def card_grid_html(title, badge=None, lines=(), columns=4, centered=False):
+    """A grid of cards from equal-length columns (Series, arrays or lists).
+
+    Each card shows its ``badge`` (if given), its ``title`` and then one
+    paragraph per ``(values, css_class)`` in ``lines``; css_class is one of
+    "", "nf-text", "nf-muted" or "nf-score". Every value is escaped.
+    """
+    parts = []  # per card field: (opening tag, escaped column, closing tag)
+    if badge is not None:
+        parts.append(('<span class="nf-badge">', escape_column(badge), "</span>"))
+    parts.append(("<h4>", escape_column(title), "</h4>"))
+    for values, css_class in lines:
+        parts.append((f'<p class="{css_class}">', escape_column(values), "</p>"))
+    if not parts[-1][1]:
+        return ""
+    template = '<div class="nf-card">' + "".join(f"{opening}{{}}{closing}" for opening, _, closing in parts) + "</div>"
+    layout = "nf-grid centered" if centered else "nf-grid"
+    return (
+        f'<div class="{layout}" style="grid-template-columns: repeat({columns}, minmax(0, 1fr));">'
+        + "".join(template.format(*fields) for fields in zip(*(column for _, column, _ in parts)))
+        + "</div>"
+    )
+
+
+def feature_card_html(title, subtitle, text, details=(), default="N/A"):
+    """One highlighted card: ``title``, a ``subtitle`` line, ``text``, then a line per (label, value) in ``details``.
+
+    Every value is escaped; missing ones become ``default``.
+    """
+    labels = [label for label, _ in details]
+    title, subtitle, text, *values = escape_column([title, subtitle, text, *(value for _, value in details)], default)
+    lines = "".join(f"<p><b>{escape(label)}:</b> {value}</p>" for label, value in zip(labels, values))
+    return f'<div class="nf-card nf-feature"><h3>{title}</h3><p><b>{subtitle}</b></p><p>{text}</p>{lines}</div>'
@@ -0,0 +1,104 @@
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional: br is only offered when installed
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # optional: zstd is only offered when installed
+    zstandard = None
+
+MIN_SIZE = 1024
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/x-ndjson", "text/plain", "text/csv"}
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+
+def _gzip_stream(chunks):
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31 = gzip framing
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _brotli_stream(chunks):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def _zstd_stream(chunks):
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# Content-Encoding -> (one-shot compressor, streaming compressor), best first
+ENCODERS = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = (lambda body: zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body), _zstd_stream)
+if brotli is not None:
+    ENCODERS["br"] = (lambda body: brotli.compress(body, quality=BROTLI_QUALITY), _brotli_stream)
+ENCODERS["gzip"] = (lambda body: b"".join(_gzip_stream([body])), _gzip_stream)
+
+
+def negotiate(accept_encodings):
+    """Best encoding the client accepts (by q-value, then our preference), or None."""
+    return accept_encodings.best_match(list(ENCODERS))
+
+
+def compress_response(response, accept_encodings, cache=None):
+    """Compress a Flask response in place if the client and content allow it.
+
+    Buffered bodies with an ETag are cached per encoding in ``cache``; the
+    ETag becomes weak because the bytes now differ from the identity body.
+    Streamed bodies are compressed chunk by chunk.
+    """
+    if (
+        response.status_code != 200
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate(accept_encodings)
+    if encoding is None:
+        return response
+    compress, stream = ENCODERS[encoding]
+
+    if response.is_streamed:
+        body = response.response
+        response.response = stream(
+            chunk.encode() if isinstance(chunk, str) else chunk for chunk in body
+        )
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < MIN_SIZE:
+            return response
+        etag, _ = response.get_etag()
+        key = f"{etag};{encoding}" if etag else None
+        cached = cache.get(key) if cache is not None and key else None
+        if cached is None:
+            compressed = compress(data)
+            if cache is not None and key:
+                cache.put(key, compressed, response.mimetype)
+        else:
+            compressed = cached[0]
+        response.set_data(compressed)
+        if etag:
+            response.set_etag(etag, weak=True)
+
+    response.headers["Content-Encoding"] = encoding
+    return response
@@ -1,56 +1,321 @@
 import sqlite3
+import sys
+import time
+
+import numpy as np
 import pandas as pd
 
-# Load Excel
-df = pd.read_excel("netflix_titles.xlsx")
-
-# Connect DB
-conn = sqlite3.connect("netflix.db")
-cursor = conn.cursor()
-
-# Create netflix table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS netflix(
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    show_id TEXT,
-    type TEXT,
-    title TEXT,
-    director TEXT,
-    cast TEXT,
-    country TEXT,
-    date_added TEXT,
-    release_year INTEGER,
-    rating TEXT,
-    duration TEXT,
-    listed_in TEXT,
-    description TEXT
-)
-''')
-
-# Insert data
-for _, row in df.iterrows():
-    cursor.execute('''
-        INSERT INTO netflix (
-            show_id, type, title, director, cast, country, 
-            date_added, release_year, rating, duration, listed_in, description
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        row.get("show_id"),
-        row.get("type"),
-        row.get("title"),
-        row.get("director"),
-        row.get("cast"),
-        row.get("country"),
-        row.get("date_added"),
-        row.get("release_year"),
-        row.get("rating"),
-        row.get("duration"),
-        row.get("listed_in"),
-        row.get("description"),
-    ))
-
-# Commit + Close
-conn.commit()
-conn.close()
-
-print("Netflix database created and populated successfully")
+from dimensions import explode_values
+from ingest import typed_frame
+from search_index import FTS_COLUMNS, create_fts_table
+
+DB_FILE = "netflix.db"
+SOURCE_FILE = "netflix_titles.xlsx"
+
+# Columns of the netflix table, in dataset order (id is the rowid alias)
+TITLE_COLUMNS = [
+    "show_id", "type", "title", "director", "cast", "country",
+    "date_added", "release_year", "rating", "duration", "listed_in", "description",
+]
+
+# Parsed columns from ingest.typed_frame(), stored for SQL-side filtering
+TYPED_COLUMNS = ["duration_minutes", "duration_seasons", "date_added_at"]
+
+# Multi-valued columns exploded into (title_id, value) side tables
+SIDE_TABLES = {
+    "country": ("title_country", "country"),
+    "listed_in": ("title_genre", "genre"),
+    "cast": ("title_cast", "person"),
+    "director": ("title_director", "person"),
+}
+
+BATCH_SIZE = 5000
+
+
+def quote(name):
+    return f'"{name}"'
+
+
+def create_schema(conn):
+    """(Re)create the netflix table and its side tables, without indexes."""
+    conn.execute("DROP TABLE IF EXISTS netflix_fts")
+    for table, _ in SIDE_TABLES.values():
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.execute("DROP TABLE IF EXISTS netflix")
+    conn.execute("DROP TABLE IF EXISTS dataset_meta")
+
+    conn.execute('''
+    CREATE TABLE netflix(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        show_id TEXT,
+        type TEXT,
+        title TEXT,
+        director TEXT,
+        "cast" TEXT,
+        country TEXT,
+        date_added TEXT,
+        release_year INTEGER,
+        rating TEXT,
+        duration TEXT,
+        listed_in TEXT,
+        description TEXT,
+        duration_minutes INTEGER,
+        duration_seasons INTEGER,
+        date_added_at TEXT
+    )
+    ''')
+    for table, value in SIDE_TABLES.values():
+        conn.execute(f'''
+        CREATE TABLE {table}(
+            title_id INTEGER NOT NULL REFERENCES netflix(id),
+            {value} TEXT NOT NULL
+        )
+        ''')
+
+
+def create_search_index(conn):
+    """Build the netflix_fts full-text index over the loaded titles."""
+    create_fts_table(conn, "netflix_fts", content="netflix")
+    conn.execute("INSERT INTO netflix_fts(netflix_fts) VALUES ('rebuild')")
+    return conn.execute("SELECT COUNT(*) FROM netflix").fetchone()[0]
+
+
+def create_indexes(conn):
+    """Index the columns /api/netflix filters on, plus the side tables."""
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_netflix_show_id ON netflix(show_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_netflix_type ON netflix(type)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_netflix_rating ON netflix(rating)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_netflix_release_year ON netflix(release_year)")
+    for table, value in SIDE_TABLES.values():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{value} ON {table}({value}, title_id)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_title_id ON {table}(title_id)")
+
+
+def tune_for_loading(conn):
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MB
+
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def insert_rows(conn, sql, rows):
+    """Insert ``rows`` with batched executemany; return the row count."""
+    count = 0
+    for batch in _batches(rows):
+        conn.executemany(sql, batch)
+        count += len(batch)
+    return count
+
+
+def title_rows(df, first_id=1, ids=None):
+    """Yield (id, *TITLE_COLUMNS, *TYPED_COLUMNS) tuples with NaN mapped to NULL.
+
+    Ids are consecutive from ``first_id`` unless given, one per row, in ``ids``.
+    """
+    frame = df.reindex(columns=TITLE_COLUMNS + TYPED_COLUMNS)
+    if pd.api.types.is_datetime64_any_dtype(frame["date_added_at"]):
+        frame["date_added_at"] = frame["date_added_at"].dt.strftime("%Y-%m-%d")
+    frame = frame.astype(object)
+    frame = frame.where(frame.notna(), None)
+    ids = range(first_id, first_id + len(frame)) if ids is None else ids
+    for row_id, row in zip(ids, frame.itertuples(index=False, name=None)):
+        yield (row_id, *row)
+
+
+def exploded_rows(df, column, first_id=1, ids=None):
+    """Yield (title_id, value) pairs for a comma-separated column."""
+    values = explode_values(df[column])
+    if ids is not None:
+        return zip(np.asarray(ids)[values.index].tolist(), values.tolist())
+    return zip((values.index + first_id).tolist(), values.tolist())
+
+
+def load_titles(conn, df):
+    """Bulk-load ``df`` in a single transaction; return a timing report.
+
+    ``df`` may also be an iterable of typed frames (e.g. chunks of a catalog
+    too large for memory); they are appended in order with consecutive ids.
+    """
+    frames = [df] if isinstance(df, pd.DataFrame) else df
+    totals = {}  # stage -> [rows, seconds], in insertion order
+
+    def timed(stage, load):
+        start = time.perf_counter()
+        rows = load()
+        total = totals.setdefault(stage, [0, 0.0])
+        total[0] += rows
+        total[1] += time.perf_counter() - start
+
+    with conn:
+        create_schema(conn)
+        placeholders = ", ".join("?" * (len(TITLE_COLUMNS) + len(TYPED_COLUMNS) + 1))
+        columns = ", ".join(["id"] + [quote(c) for c in TITLE_COLUMNS + TYPED_COLUMNS])
+        first_id = 1
+        for frame in frames:
+            timed("netflix", lambda: insert_rows(
+                conn, f"INSERT INTO netflix ({columns}) VALUES ({placeholders})",
+                title_rows(frame, first_id),
+            ))
+            for column, (table, value) in SIDE_TABLES.items():
+                if column in frame:
+                    timed(table, lambda: insert_rows(
+                        conn, f"INSERT INTO {table} (title_id, {value}) VALUES (?, ?)",
+                        exploded_rows(frame, column, first_id),
+                    ))
+            first_id += len(frame)
+        timed("indexes", lambda: (create_indexes(conn), 0)[1])
+        timed("netflix_fts", lambda: create_search_index(conn))
+    return [(stage, rows, seconds) for stage, (rows, seconds) in totals.items()]
+
+
+def read_source_stamp(conn):
+    """The dataset version the tables were last built or synced from, or None."""
+    try:
+        row = conn.execute("SELECT value FROM dataset_meta WHERE key = 'source'").fetchone()
+    except sqlite3.OperationalError:  # no dataset_meta table yet
+        return None
+    return row[0] if row else None
+
+
+def write_source_stamp(conn, stamp):
+    conn.execute("CREATE TABLE IF NOT EXISTS dataset_meta(key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute("INSERT OR REPLACE INTO dataset_meta (key, value) VALUES ('source', ?)", (stamp,))
+
+
+def _fts_delete(conn, ids):
+    """Remove rows from netflix_fts using their still-stored netflix values."""
+    columns = ", ".join(quote(c) for c in FTS_COLUMNS)
+    insert_rows(
+        conn, f"INSERT INTO netflix_fts (netflix_fts, rowid, {columns}) "
+        f"SELECT 'delete', id, {columns} FROM netflix WHERE id = ?", ((i,) for i in ids),
+    )
+
+
+def sync_titles(conn, df, stamp):
+    """Update the tables to ``df`` (or an iterable of frames), matching titles by show_id.
+
+    Only titles whose values changed are rewritten, with their side-table
+    and full-text rows; new titles are appended and missing ones deleted.
+    Runs in one write transaction and records ``stamp``. Returns the
+    {"changed", "added", "removed"} counts, or None if another process
+    already synced to ``stamp``.
+    """
+    frames = [df] if isinstance(df, pd.DataFrame) else df
+    columns = TITLE_COLUMNS + TYPED_COLUMNS
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if read_source_stamp(conn) == stamp:
+            conn.rollback()
+            return None
+        stored = {}  # show_id -> (id, hash of the stored values)
+        cursor = conn.execute(f"SELECT id, {', '.join(quote(c) for c in columns)} FROM netflix")
+        for rows in iter(lambda: cursor.fetchmany(BATCH_SIZE), []):
+            for row in rows:
+                stored[row[1]] = (row[0], hash(row[1:]))
+        next_id = (conn.execute("SELECT MAX(id) FROM netflix").fetchone()[0] or 0) + 1
+
+        counts = {"changed": 0, "added": 0, "removed": 0}
+        seen = set()
+        placeholders = ", ".join("?" * (len(columns) + 1))
+        for frame in frames:
+            positions, ids = [], []
+            for position, row in enumerate(title_rows(frame, 0)):
+                known = stored.get(row[1])
+                seen.add(row[1])
+                if known is None:
+                    positions.append(position)
+                    ids.append(next_id)
+                    next_id += 1
+                    counts["added"] += 1
+                elif known[1] != hash(row[1:]):
+                    positions.append(position)
+                    ids.append(known[0])
+                    counts["changed"] += 1
+            if not ids:
+                continue
+            rows = frame.iloc[positions].reset_index(drop=True)
+            _fts_delete(conn, ids)  # no-op for new ids
+            for column, (table, value) in SIDE_TABLES.items():
+                conn.executemany(f"DELETE FROM {table} WHERE title_id = ?", ((i,) for i in ids))
+                if column in rows:
+                    insert_rows(
+                        conn, f"INSERT INTO {table} (title_id, {value}) VALUES (?, ?)",
+                        exploded_rows(rows, column, ids=ids),
+                    )
+            insert_rows(
+                conn, f"INSERT OR REPLACE INTO netflix (id, {', '.join(quote(c) for c in columns)}) "
+                f"VALUES ({placeholders})", title_rows(rows, ids=ids),
+            )
+            fts_columns = ", ".join(quote(c) for c in FTS_COLUMNS)
+            insert_rows(
+                conn, f"INSERT INTO netflix_fts (rowid, {fts_columns}) "
+                f"SELECT id, {fts_columns} FROM netflix WHERE id = ?", ((i,) for i in ids),
+            )
+
+        removed = [row_id for show_id, (row_id, _) in stored.items() if show_id not in seen]
+        if removed:
+            _fts_delete(conn, removed)
+            for table, _ in SIDE_TABLES.values():
+                conn.executemany(f"DELETE FROM {table} WHERE title_id = ?", ((i,) for i in removed))
+            conn.executemany("DELETE FROM netflix WHERE id = ?", ((i,) for i in removed))
+            counts["removed"] = len(removed)
+        write_source_stamp(conn, stamp)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return counts
+
+
+def build_database(db_path, df, stamp=None):
+    """Create ``db_path`` from ``df`` (or an iterable of frames) with indexes; return the timing report.
+
+    ``stamp`` records the dataset version, for later sync_titles() calls.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        tune_for_loading(conn)
+        report = load_titles(conn, df)
+        if stamp is not None:
+            with conn:
+                write_source_stamp(conn, stamp)
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return report
+
+
+def print_report(report):
+    for stage, rows, seconds in report:
+        rate = f"{rows / seconds:,.0f} rows/s" if rows and seconds else "-"
+        print(f"  {stage:<15} {rows:>9,} rows  {seconds:8.3f}s  {rate}")
+    total = sum(seconds for _, _, seconds in report)
+    print(f"  {'total':<15} {'':>14}  {total:8.3f}s")
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else SOURCE_FILE
+
+    # Load Excel (or CSV)
+    start = time.perf_counter()
+    if source.endswith(".csv"):
+        df = pd.read_csv(source)
+    else:
+        df = pd.read_excel(source)
+    df = typed_frame(df)
+    print(f"Read {len(df):,} rows from {source} in {time.perf_counter() - start:.3f}s")
+
+    report = build_database(DB_FILE, df)
+    print_report(report)
+    print("Netflix database created and populated successfully")
@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+
+from dimensions import explode_values
+
+CUBE_DIMENSIONS = ["release_year", "type", "rating", "genre", "country"]
+# Source columns a cell depends on; a row whose values change invalidates the cube
+SOURCE_COLUMNS = ["release_year", "type", "rating", "listed_in", "country", "imdb_rating"]
+ALL = "*"  # the genre/country member that stands for "any or none"
+TOP_COUNTRIES = 3
+TOP_GENRES = 5
+
+
+def _members(series, size):
+    """(row, value) pairs of a comma-separated column, plus (row, ALL) for every row."""
+    values = explode_values(series)
+    return pd.DataFrame({
+        "row": np.concatenate([values.index.to_numpy(dtype=np.int64), np.arange(size)]),
+        "value": np.concatenate([values.to_numpy(dtype=object), np.full(size, ALL, dtype=object)]),
+    })
+
+
+def _cells(df):
+    """Cube cells of ``df``: counts (and IMDb rating sums) per dimension combination."""
+    size = len(df)
+    pairs = _members(df["listed_in"], size).merge(
+        _members(df["country"], size), on="row", suffixes=("_genre", "_country"),
+    )
+    rows = pairs["row"].to_numpy()
+    cells = pd.DataFrame({
+        "release_year": df["release_year"].to_numpy()[rows],
+        "type": df["type"].astype(object).to_numpy()[rows],
+        "rating": df["rating"].astype(object).to_numpy()[rows],
+        "genre": pairs["value_genre"].to_numpy(),
+        "country": pairs["value_country"].to_numpy(),
+        "count": np.ones(len(rows), dtype=np.int64),
+    })
+    if "imdb_rating" in df:
+        imdb = pd.to_numeric(df["imdb_rating"], errors="coerce").to_numpy(dtype=float)[rows]
+        cells["imdb_sum"] = np.nan_to_num(imdb)
+        cells["imdb_n"] = (~np.isnan(imdb)).astype(np.int64)
+    return _combine(cells)
+
+
+def _combine(cells):
+    return cells.groupby(CUBE_DIMENSIONS, dropna=False, sort=False).sum().reset_index()
+
+
+def _row_hashes(df):
+    columns = [c for c in SOURCE_COLUMNS if c in df]
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+class TrendsCube:
+    """Title counts per (release_year, type, rating, genre, country) cell.
+
+    Genre and country list several values per title. A title is counted once
+    in each (genre, country) pair it lists, including the ``ALL`` member of
+    either, so a slice at genre=ALL counts titles rather than title-genre
+    pairs. Every Trends chart is then a filter and a small groupby over the
+    cells instead of a pass over the rows. Appending rows adds their cells;
+    ``patch()`` also takes out the cells of rows whose values changed.
+    """
+
+    def __init__(self, cells, row_hashes):
+        self.cells = cells
+        self.row_hashes = row_hashes
+        self.rows = len(row_hashes)
+        self.has_imdb = "imdb_sum" in cells
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(_cells(df), _row_hashes(df))
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """Built chunk by chunk, e.g. from out_of_core.iter_chunks()."""
+        cube = None
+        for chunk in chunks:
+            cube = cls.from_frame(chunk) if cube is None else cube.append(chunk)
+        return cube
+
+    def append(self, df):
+        """A new cube that also counts the rows of ``df``."""
+        if not len(df):
+            return self
+        return TrendsCube(
+            _combine(pd.concat([self.cells, _cells(df)], ignore_index=True)),
+            np.concatenate([self.row_hashes, _row_hashes(df)]),
+        )
+
+    def patch(self, df, changes):
+        """The cube of ``df``, a refresh of this cube's frame (see refresh.refresh_frame)."""
+        rows = changes.rows
+        if not len(rows):
+            return self
+        removed = _cells(changes.previous)
+        removed[[c for c in removed.columns if c not in CUBE_DIMENSIONS]] *= -1
+        cells = _combine(pd.concat([self.cells, removed, _cells(df.iloc[rows])], ignore_index=True))
+        row_hashes = np.concatenate([self.row_hashes, np.zeros(changes.size - changes.old_size, dtype=np.uint64)])
+        row_hashes[rows] = _row_hashes(df.iloc[rows])
+        return TrendsCube(cells[cells["count"] != 0].reset_index(drop=True), row_hashes)
+
+    def update_chunks(self, chunks):
+        """This cube extended to a new version read chunk by chunk, if it only appended rows, else None."""
+        cube, seen = self, 0
+        for chunk in chunks:
+            known = min(max(self.rows - seen, 0), len(chunk))
+            if known and not np.array_equal(
+                _row_hashes(chunk.iloc[:known]), self.row_hashes[seen : seen + known]
+            ):
+                return None
+            cube = cube.append(chunk.iloc[known:])
+            seen += len(chunk)
+        return cube if seen >= self.rows else None
+
+    def _slice(self, genre=None, country=None, rating=None, by=()):
+        """Cells of a selection. A dimension in ``by`` keeps its real values (not ALL)."""
+        cells = self.cells
+        keep = np.ones(len(cells), dtype=bool)
+        for name, value in (("genre", genre), ("country", country)):
+            column = cells[name].to_numpy()
+            if value is not None:
+                keep &= column == value
+            elif name in by:
+                keep &= column != ALL
+            else:
+                keep &= column == ALL
+        if rating is not None:
+            keep &= cells["rating"].to_numpy() == rating
+        return cells[keep]
+
+    def total(self, **selection):
+        return int(self._slice(**selection)["count"].sum())
+
+    def type_by_year(self, **selection):
+        """Titles per (release_year, type)."""
+        cells = self._slice(**selection)
+        return (
+            cells.groupby(["release_year", "type"])["count"].sum()
+            .loc[lambda counts: counts > 0].reset_index()
+        )
+
+    def country_by_year(self, top=TOP_COUNTRIES, **selection):
+        """Titles per (release_year, country) for the ``top`` countries of the selection."""
+        counts = self._slice(**selection, by=("country",)).groupby(["release_year", "country"])["count"].sum()
+        counts = counts[counts > 0]
+        totals = counts.groupby(level="country").sum()
+        leaders = totals.sort_index().sort_values(ascending=False, kind="stable").index[:top]
+        return counts[counts.index.get_level_values("country").isin(leaders)].reset_index()
+
+    def rating_counts(self, **selection):
+        """Titles per rating, largest first (like FacetIndex.counts)."""
+        counts = self._slice(**selection).groupby("rating")["count"].sum()
+        counts = counts[counts > 0].sort_index()
+        return counts.sort_values(ascending=False, kind="stable")
+
+    def genre_imdb_means(self, top=TOP_GENRES, **selection):
+        """Mean IMDb rating of the ``top`` genres, or None without an imdb_rating column."""
+        if not self.has_imdb:
+            return None
+        sums = self._slice(**selection, by=("genre",)).groupby("genre")[["imdb_sum", "imdb_n"]].sum()
+        sums = sums[sums["imdb_n"] > 0]
+        return (sums["imdb_sum"] / sums["imdb_n"]).sort_values(ascending=False).head(top)
+
+    def series(self, genre=None, country=None, rating=None):
+        """Every Trends chart as JSON-ready records, for /api/trends."""
+        selection = dict(genre=genre, country=country, rating=rating)
+        means = self.genre_imdb_means(**selection)
+        return {
+            "total": self.total(**selection),
+            "type_by_year": _records(self.type_by_year(**selection)),
+            "country_by_year": _records(self.country_by_year(**selection)),
+            "rating_counts": [
+                {"value": value, "count": int(count)} for value, count in self.rating_counts(**selection).items()
+            ],
+            "genre_imdb_means": None if means is None else [
+                {"value": value, "mean": round(float(mean), 4)} for value, mean in means.items()
+            ],
+        }
+
+
+def _records(frame):
+    return [
+        {key: (int(value) if isinstance(value, (int, np.integer)) else value) for key, value in record.items()}
+        for record in frame.to_dict(orient="records")
+    ]
@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+
+
+def _version_token(signature):
+    path, mtime_ns, size = signature
+    return f"{os.path.basename(path)}-{mtime_ns}-{size}"
+
+
+def file_version(path):
+    """The ``DatasetCache.version`` token that the file at ``path`` has now."""
+    st = os.stat(path)
+    return _version_token((path, st.st_mtime_ns, st.st_size))
+
+
+class DatasetCache:
+    """Process-wide dataset cache that reloads when the source file changes.
+
+    The first existing path in ``paths`` is loaded with ``loader(path)`` and
+    kept in memory. Each ``get()`` only stats the file; the frame is reloaded
+    when its mtime or size differs from the loaded copy. Safe to share between
+    the threads of a WSGI worker. Callers must treat the frame as read-only.
+
+    With ``refresh(old_frame, new_frame)`` (see refresh.refresh_frame), a
+    reloaded frame is laid out like the previous one and the rows that
+    changed are recorded, so that ``derived()`` values can be patched.
+    """
+
+    def __init__(self, loader, paths, refresh=None):
+        self._loader = loader
+        self._paths = list(paths)
+        self._refresh = refresh
+        self._load_lock = threading.RLock()
+        self._stats_lock = threading.Lock()
+        self._entry = None  # (signature, frame, loaded_at)
+        self._last_change = None  # (previous frame, frame, changes) of the last refresh
+        self._derived = {}  # name -> (frame, value), built from the current frame
+        self._build_locks = {}  # name -> lock held while that derived value is built
+        self._building = set()  # names being built in the background
+        self._source_derived = {}  # name -> (signature, value), built from the file
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def _signature(self):
+        for path in self._paths:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            return (path, st.st_mtime_ns, st.st_size)
+        names = " nor ".join(os.path.basename(p) for p in self._paths)
+        raise FileNotFoundError(f"Neither {names} found!")
+
+    def source_signature(self):
+        """(path, mtime_ns, size) of the current source file, without loading it."""
+        return self._signature()
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self):
+        """Return the cached frame, (re)loading it if the source changed."""
+        signature = self._signature()
+        entry = self._entry
+        if entry is not None and entry[0] == signature:
+            self._count("hits")
+            return entry[1]
+
+        with self._load_lock:
+            # Another thread may have finished the load while we waited.
+            entry = self._entry
+            if entry is not None and entry[0] == signature:
+                self._count("hits")
+                return entry[1]
+
+            frame = self._loader(signature[0])
+            self._last_change = None
+            if entry is not None and self._refresh is not None:
+                refreshed = self._refresh(entry[1], frame)
+                if refreshed is not None:
+                    frame, changes = refreshed
+                    self._last_change = (entry[1], frame, changes)
+            self._count("misses" if entry is None else "reloads")
+            self._entry = (signature, frame, time.time())
+            return frame
+
+    def derived(self, name, build, update=None, wait=True):
+        """Return ``build(frame)`` for the current frame, rebuilt after a reload.
+
+        Used for indexes and aggregates that are expensive to compute but
+        only depend on the dataset contents. After a refreshed reload,
+        ``update(value, frame, changes)`` may patch the previous value for
+        the changed rows instead; it returns None when a full rebuild is needed.
+        Each name is built under its own lock, so a slow build does not hold
+        up the others. With ``wait=False``, a value that is not ready yet is
+        built on a background thread and None is returned meanwhile.
+        """
+        frame = self.get()
+        cached = self._derived.get(name)
+        if cached is not None and cached[0] is frame:
+            return cached[1]
+        if not wait:
+            self._build_in_background(name, build, update)
+            return None
+        with self._build_lock(name):
+            cached = self._derived.get(name)
+            if cached is None or cached[0] is not frame:
+                last = self._last_change
+                value = None
+                if update and cached and last is not None and cached[0] is last[0] and frame is last[1]:
+                    value = update(cached[1], frame, last[2])
+                cached = (frame, build(frame) if value is None else value)
+                self._derived[name] = cached
+            return cached[1]
+
+    def _build_lock(self, name):
+        with self._stats_lock:
+            return self._build_locks.setdefault(name, threading.Lock())
+
+    def _build_in_background(self, name, build, update):
+        with self._stats_lock:
+            if name in self._building:
+                return
+            self._building.add(name)
+
+        def run():
+            try:
+                self.derived(name, build, update)
+            finally:
+                with self._stats_lock:
+                    self._building.discard(name)
+
+        threading.Thread(target=run, name=f"build-{name}", daemon=True).start()
+
+    def source_derived(self, name, build, update=None):
+        """Return ``build(path)`` for the current source file, without loading it.
+
+        The out-of-core counterpart of ``derived()``: ``build`` streams the
+        file itself and is rerun when the file's mtime or size changes, unless
+        ``update(value, path)`` returns an updated value.
+        """
+        signature = self._signature()
+        cached = self._source_derived.get(name)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        with self._build_lock(("source", name)):
+            cached = self._source_derived.get(name)
+            if cached is None or cached[0] != signature:
+                value = update(cached[1], signature[0]) if update and cached else None
+                cached = (signature, build(signature[0]) if value is None else value)
+                self._source_derived[name] = cached
+            return cached[1]
+
+    @property
+    def version(self):
+        """Opaque token that changes whenever a different file version is loaded."""
+        entry = self._entry
+        if entry is None:
+            return None
+        return _version_token(entry[0])
+
+    def source_version(self):
+        """The ``version`` token of the current source file, without loading it."""
+        return _version_token(self._signature())
+
+    def invalidate(self):
+        with self._load_lock:
+            self._entry = None
+            self._last_change = None
+            self._derived.clear()
+            self._source_derived.clear()
+
+    def stats(self):
+        entry = self._entry
+        with self._stats_lock:
+            hits, misses, reloads = self.hits, self.misses, self.reloads
+        lookups = hits + misses + reloads
+        return {
+            "hits": hits,
+            "misses": misses,
+            "reloads": reloads,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "loaded": entry is not None,
+            "source": entry[0][0] if entry else None,
+            "version": self.version,
+            "rows": len(entry[1]) if entry else 0,
+            "last_change": self._last_change[2].summary() if self._last_change else None,
+            "loaded_at": entry[2] if entry else None,
+        }
@@ -0,0 +1,117 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+POOL_SIZE = 8
+BUSY_TIMEOUT_S = 30
+CACHED_STATEMENTS = 256  # per-connection prepared statement cache
+
+
+def _lower_text(value):
+    return None if value is None else str(value).lower()
+
+
+class ConnectionPool:
+    """Thread-safe pool of long-lived SQLite connections in WAL mode.
+
+    Connections are opened lazily up to ``size`` and reused, so each one
+    keeps its prepared statement cache warm across requests. WAL lets
+    readers run while a writer commits.
+    """
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.acquired = 0
+        self.waits = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT_S,
+            check_same_thread=False,
+            cached_statements=CACHED_STATEMENTS,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Unicode-aware lower(); SQLite's own only folds ASCII
+        conn.create_function("lower_text", 1, _lower_text, deterministic=True)
+        return conn
+
+    def _acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self.opened < self.size
+                if can_open:
+                    self.opened += 1
+                else:
+                    self.waits += 1
+            if can_open:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self.opened -= 1
+                    raise
+            else:
+                conn = self._idle.get(timeout=BUSY_TIMEOUT_S)
+        with self._lock:
+            self.acquired += 1
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success and rolls back on error."""
+        conn = self._acquire()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "path": self.path,
+                "size": self.size,
+                "opened": self.opened,
+                "idle": self._idle.qsize(),
+                "acquired": self.acquired,
+                "waits": self.waits,
+            }
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self.opened -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path, size=POOL_SIZE):
+    """The process-wide pool for the database at ``path``."""
+    key = os.path.abspath(path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(path, size)
+        return pool
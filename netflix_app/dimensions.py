@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+# Dimension name -> comma-separated source column
+DIMENSION_COLUMNS = {
+    "genre": "listed_in",
+    "country": "country",
+    "cast": "cast",
+    "director": "director",
+}
+
+
+def explode_values(series):
+    """Split a comma-separated column into one stripped value per row.
+
+    The result keeps the positional row id of each value as its index.
+    """
+    values = series.reset_index(drop=True).dropna().astype(str).str.split(",").explode().str.strip()
+    return values[values != ""]
+
+
+class Dimensions:
+    """Exploded long-form genre/country/cast/director tables for a frame.
+
+    Each table has ``row_id`` (position in the frame) and a value column named
+    after the dimension. Built once per dataset load and shared read-only by
+    every page, so no page has to re-split the comma-joined columns.
+    """
+
+    def __init__(self, df):
+        self.size = len(df)
+        self.tables = {}
+        self._values = {}
+        for name, column in DIMENSION_COLUMNS.items():
+            if column not in df:
+                continue
+            exploded = explode_values(df[column])
+            self.tables[name] = pd.DataFrame({
+                "row_id": exploded.index.to_numpy(dtype=np.int64),
+                name: exploded.to_numpy(dtype=object),
+            })
+            self._values[name] = sorted(set(self.tables[name][name]))
+
+    def patch(self, df, changes):
+        """Dimensions of ``df``, a refresh of this frame, re-exploding only changed and added rows."""
+        patched = Dimensions.__new__(Dimensions)
+        patched.size = len(df)
+        patched.tables = {}
+        patched._values = {}
+        rows = changes.rows
+        subset = df.iloc[rows]
+        for name, table in self.tables.items():
+            exploded = explode_values(subset[DIMENSION_COLUMNS[name]])
+            fresh = pd.DataFrame({
+                "row_id": rows[exploded.index.to_numpy(dtype=np.int64)],
+                name: exploded.to_numpy(dtype=object),
+            })
+            dropped = np.isin(table["row_id"].to_numpy(), changes.changed)
+            kept = table[~dropped]
+            combined = pd.concat([kept, fresh], ignore_index=True)
+            order = np.argsort(combined["row_id"].to_numpy(), kind="stable")
+            patched.tables[name] = combined.iloc[order].reset_index(drop=True)
+            # Values only the dropped rows had are gone; new ones come from fresh
+            added = set(fresh[name].tolist())
+            gone = set(table[name][dropped].tolist()) - added
+            gone -= set(kept[name][kept[name].isin(gone)].tolist())
+            patched._values[name] = sorted(set(self._values[name]) - gone | added)
+        return patched
+
+    def values(self, name):
+        """Sorted unique values of a dimension."""
+        return self._values.get(name, [])
+
+    def long_table(self, name, mask=None):
+        """The (row_id, value) table, restricted to rows where ``mask`` is True."""
+        table = self.tables[name]
+        if mask is None:
+            return table
+        return table[mask[table["row_id"].to_numpy()]]
+
+    def mask(self, name, value):
+        """Boolean row mask of titles that list ``value`` for a dimension."""
+        table = self.tables[name]
+        mask = np.zeros(self.size, dtype=bool)
+        mask[table["row_id"].to_numpy()[table[name].to_numpy() == value]] = True
+        return mask
+
+    def counts(self, name, mask=None):
+        """Titles per value, most common first."""
+        return self.long_table(name, mask)[name].value_counts()
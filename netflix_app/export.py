@@ -0,0 +1,228 @@
+"""Filtered exports as CSV, NDJSON or Parquet, streamed or written by background jobs.
+
+Writers take an iterable of frames (chunks of a selection) and yield bytes
+as they go, so memory holds one chunk whatever the export size. Large
+exports run as jobs: a thread writes the file into NETFLIX_EXPORT_DIR and
+records its progress in ``<id>.json`` beside it. Any serve.py worker can
+then report on a job and hand out its file, not just the one running it.
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+
+from serializers import iter_frame_ndjson
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: ?format=parquet needs pyarrow
+    pa = pq = None
+
+EXPORT_DIR = os.environ.get("NETFLIX_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "netflix_exports"))
+EXPORT_WORKERS = int(os.environ.get("NETFLIX_EXPORT_WORKERS", "2"))  # concurrent jobs per process
+CHUNK_ROWS = 10_000
+JOB_TTL_S = 3600  # finished exports are deleted after this long
+PROGRESS_INTERVAL_S = 0.5
+
+# format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def frame_chunks(df, ids, chunk_rows=CHUNK_ROWS):
+    """Yield ``df.iloc[ids]`` in chunks of ``chunk_rows`` (at least one, maybe empty)."""
+    for start in range(0, max(len(ids), 1), chunk_rows):
+        yield df.iloc[ids[start : start + chunk_rows]]
+
+
+def iter_csv(frames):
+    header = True
+    for frame in frames:
+        yield frame.to_csv(index=False, header=header).encode()
+        header = False
+
+
+def iter_ndjson(frames):
+    for frame in frames:
+        for block in iter_frame_ndjson(frame):
+            yield block.encode()
+
+
+class _Spool:
+    """Write-only file object whose contents are taken out after each row group."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _arrow_table(frame, schema=None):
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    if schema is None:
+        # Categoricals as plain strings, and all-null columns typed as strings,
+        # so that later chunks fit the schema of the first
+        fields = []
+        for field in table.schema:
+            kind = field.type
+            if pa.types.is_dictionary(kind):
+                kind = kind.value_type
+            if pa.types.is_null(kind):
+                kind = pa.string()
+            fields.append(pa.field(field.name, kind))
+        schema = pa.schema(fields)
+    return table.cast(schema)
+
+
+def iter_parquet(frames):
+    """Yield a Parquet file, one row group per non-empty frame."""
+    if pq is None:
+        raise RuntimeError("Parquet export needs pyarrow")
+    spool, writer, last = _Spool(), None, None
+    for frame in frames:
+        last = frame
+        if not len(frame):
+            continue
+        table = _arrow_table(frame, None if writer is None else writer.schema)
+        if writer is None:
+            writer = pq.ParquetWriter(spool, table.schema)
+        writer.write_table(table)
+        yield spool.drain()
+    if writer is None:  # nothing matched: an empty file with the columns
+        writer = pq.ParquetWriter(spool, _arrow_table(last).schema) if last is not None else None
+    if writer is not None:
+        writer.close()
+    yield spool.drain()
+
+
+WRITERS = {"csv": iter_csv, "ndjson": iter_ndjson, "parquet": iter_parquet}
+
+
+def available_formats():
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "parquet" or pq is not None]
+
+
+class ExportJobs:
+    """Background exports, tracked in files so that every worker process sees them.
+
+    ``submit()`` starts a thread that writes the export to ``<id>.<ext>``;
+    at most ``workers`` jobs of a process write at a time, the others wait
+    as "queued". The job state (status, rows written, total rows if known,
+    bytes, error) is rewritten to ``<id>.json`` as it progresses.
+    """
+
+    def __init__(self, directory=EXPORT_DIR, workers=EXPORT_WORKERS, ttl_s=JOB_TTL_S):
+        self.directory = directory
+        self.ttl_s = ttl_s
+        self._slots = threading.BoundedSemaphore(workers)
+
+    def _path(self, job_id, ext):
+        return os.path.join(self.directory, f"{job_id}.{ext}")
+
+    def _save(self, state):
+        path = self._path(state["id"], "json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(path + ".tmp", path)
+
+    def submit(self, fmt, frames, total=None, name="netflix_titles"):
+        """Start exporting ``frames`` as ``fmt``; return the job state."""
+        os.makedirs(self.directory, exist_ok=True)
+        self.expire()
+        job_id = uuid.uuid4().hex
+        state = {
+            "id": job_id, "format": fmt, "status": "queued", "rows": 0, "total": total, "bytes": 0,
+            "file_name": f"{name}.{EXPORT_FORMATS[fmt][1]}", "created_at": time.time(),
+            "finished_at": None, "error": None,
+        }
+        self._save(state)
+        threading.Thread(target=self._run, args=(state, frames), name=f"export-{job_id}", daemon=True).start()
+        return state
+
+    def _run(self, state, frames):
+        with self._slots:
+            state["status"] = "running"
+            self._save(state)
+            path = self._path(state["id"], EXPORT_FORMATS[state["format"]][1])
+            saved_at = time.monotonic()
+
+            def counted():
+                for frame in frames:
+                    yield frame
+                    state["rows"] += len(frame)
+
+            try:
+                with open(path + ".part", "wb") as f:
+                    for data in WRITERS[state["format"]](counted()):
+                        f.write(data)
+                        state["bytes"] += len(data)
+                        if time.monotonic() - saved_at >= PROGRESS_INTERVAL_S:
+                            self._save(state)
+                            saved_at = time.monotonic()
+                os.replace(path + ".part", path)
+                state["status"] = "done"
+            except Exception as e:
+                state["status"], state["error"] = "failed", str(e)
+                if os.path.exists(path + ".part"):
+                    os.remove(path + ".part")
+            state["finished_at"] = time.time()
+            self._save(state)
+
+    def get(self, job_id):
+        """The job's state, or None for an unknown (or expired) job."""
+        if not _JOB_ID.match(job_id or ""):
+            return None
+        try:
+            with open(self._path(job_id, "json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def file(self, state):
+        """Path of a finished job's export."""
+        return self._path(state["id"], EXPORT_FORMATS[state["format"]][1])
+
+    def expire(self):
+        """Delete jobs and files older than ``ttl_s``."""
+        cutoff = time.time() - self.ttl_s
+        for entry in os.listdir(self.directory):
+            path = os.path.join(self.directory, entry)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass  # removed by another process meanwhile
+
+
+def progress(state):
+    """Share of rows written (0..1), or None while the total is unknown."""
+    if state["status"] == "done":
+        return 1.0
+    if not state["total"]:
+        return None
+    return round(min(state["rows"] / state["total"], 1.0), 4)
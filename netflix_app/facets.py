@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+# Facets read straight from a column, and facets taken from Dimensions tables
+COLUMN_FACETS = ["type", "rating", "release_year"]
+DIMENSION_FACETS = ["country", "genre"]
+
+
+class FacetIndex:
+    """Packed row-id bitmaps for every value of the filterable facets.
+
+    A selection is a packed bitmap (``np.packbits`` layout, one bit per row).
+    Values of one facet are OR-ed and different facets are AND-ed, so
+    any filter combination is a handful of vectorized bit operations and
+    never copies the frame. Country and genre use the exploded Dimensions
+    tables, so a title matches each country or genre it lists.
+    """
+
+    def __init__(self, df, dims, previous=None, rows=None):
+        self.size = len(df)
+        self.bitmaps = {}
+        self._postings = {}  # facet -> (row_ids, codes, values)
+        self._all = np.packbits(np.ones(self.size, dtype=bool))
+        self._none = np.zeros_like(self._all)
+
+        for facet in COLUMN_FACETS:
+            if facet in df:
+                codes, uniques = pd.factorize(df[facet], sort=True)
+                row_ids = np.flatnonzero(codes >= 0)
+                self._add(facet, pd.Index(uniques).tolist(), row_ids, codes[row_ids], previous, rows)
+        for facet in DIMENSION_FACETS:
+            if facet in dims.tables:
+                table = dims.tables[facet]
+                codes, uniques = pd.factorize(table[facet], sort=True)
+                self._add(facet, pd.Index(uniques).tolist(), table["row_id"].to_numpy(), codes, previous, rows)
+
+    def patch(self, df, dims, changes):
+        """The index of ``df``, a refresh of this frame (see refresh.py).
+
+        Only values that a changed or added row had or now has get a new
+        bitmap; the others are this index's bitmaps, padded to the new size.
+        """
+        return FacetIndex(df, dims, previous=self, rows=changes.rows)
+
+    def _add(self, facet, values, row_ids, codes, previous=None, rows=None):
+        reused = {}
+        if previous is not None and facet in previous._postings:
+            old_row_ids, old_codes, old_values = previous._postings[facet]
+            touched = set(np.asarray(old_values, dtype=object)[old_codes[np.isin(old_row_ids, rows)]].tolist())
+            touched |= set(np.asarray(values, dtype=object)[codes[np.isin(row_ids, rows)]].tolist())
+            padding = np.zeros(len(self._all) - len(previous._all), dtype=np.uint8)
+            reused = {
+                value: np.concatenate([bits, padding])
+                for value, bits in previous.bitmaps[facet].items() if value not in touched
+            }
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(values) + 1))
+        bitmaps = {}
+        for code, value in enumerate(values):
+            if value in reused:
+                bitmaps[value] = reused[value]
+                continue
+            mask = np.zeros(self.size, dtype=bool)
+            mask[row_ids[order[bounds[code] : bounds[code + 1]]]] = True
+            bitmaps[value] = np.packbits(mask)
+        self.bitmaps[facet] = bitmaps
+        self._postings[facet] = (row_ids, codes, values)
+
+    def values(self, facet):
+        """Sorted distinct values of a facet."""
+        return self._postings[facet][2] if facet in self._postings else []
+
+    def matching(self, facet, predicate):
+        """Facet values for which ``predicate(value)`` is true."""
+        return [value for value in self.values(facet) if predicate(value)]
+
+    def any_of(self, facet, values):
+        """OR of the bitmaps of ``values`` (unknown values match nothing)."""
+        bitmaps = self.bitmaps.get(facet, {})
+        result = self._none
+        for value in values:
+            bits = bitmaps.get(value)
+            if bits is not None:
+                result = result | bits
+        return result
+
+    def select(self, **filters):
+        """AND across facets of the OR within each facet; None means no filter."""
+        result = self._all
+        for facet, values in filters.items():
+            if values is None:
+                continue
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            result = result & self.any_of(facet, values)
+        return result
+
+    def mask(self, bits):
+        return np.unpackbits(bits, count=self.size).astype(bool)
+
+    def row_ids(self, bits):
+        return np.flatnonzero(np.unpackbits(bits, count=self.size))
+
+    def count(self, bits):
+        return int(np.unpackbits(bits, count=self.size).sum())
+
+    def counts(self, facet, bits=None):
+        """Matching titles per value of ``facet`` within a selection, largest first."""
+        row_ids, codes, values = self._postings[facet]
+        if bits is not None:
+            codes = codes[self.mask(bits)[row_ids]]
+        counts = pd.Series(np.bincount(codes, minlength=len(values)), index=values)
+        return counts[counts > 0].sort_values(ascending=False, kind="stable")
@@ -0,0 +1,126 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, make_response, request
+
+MAX_CACHE_BYTES = 128 * 1024 * 1024
+MAX_ENTRY_BYTES = 16 * 1024 * 1024
+CACHE_CONTROL = "public, max-age=60"
+# Set by Response() itself; every other header a view sets is cached with its body
+BODY_HEADERS = {"Content-Type", "Content-Length"}
+
+
+class ResponseCache:
+    """Thread-safe LRU of serialized response bodies, bounded by total bytes."""
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES, max_entry_bytes=MAX_ENTRY_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()  # key -> (body, mimetype, headers)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, mimetype, headers=()):
+        """Cache ``body``; ``headers`` are extra (name, value) pairs to send with it."""
+        if len(body) > self.max_entry_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old[0])
+            self._entries[key] = (body, mimetype, tuple(headers))
+            self.bytes += len(body)
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted[0])
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def request_etag(version, extra=""):
+    """Strong ETag for the current request: data version + path + sorted query args."""
+    args = sorted((key, sorted(values)) for key, values in request.args.lists())
+    key = repr((version, request.path, args, extra)).encode()
+    return hashlib.sha1(key).hexdigest()
+
+
+def conditional_get(cache, version, last_modified=None, vary=None):
+    """Decorate a GET view with ETag/Last-Modified revalidation and response caching.
+
+    ``version()`` must be cheap (no DataFrame work): a matching If-None-Match
+    or If-Modified-Since is answered with 304 before the view runs. Non-streamed
+    200 responses are kept in ``cache`` keyed by their ETag, with the headers
+    the view set (such as X-Next-Cursor). ``vary()`` adds request-independent
+    inputs, such as the date, to the ETag.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = request_etag(version(), vary() if vary else "")
+            modified = last_modified() if last_modified else None
+
+            def not_modified():
+                response = Response(status=304)
+                response.set_etag(etag)
+                response.headers["Cache-Control"] = CACHE_CONTROL
+                return response
+
+            if request.if_none_match:
+                # Weak match: compressed variants carry W/"<etag>"
+                if request.if_none_match.contains_weak(etag):
+                    return not_modified()
+            elif modified and request.if_modified_since and modified <= request.if_modified_since:
+                return not_modified()
+
+            cached = cache.get(etag)
+            if cached is not None:
+                body, mimetype, headers = cached
+                response = Response(body, mimetype=mimetype, headers=list(headers))
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                if not response.is_streamed:
+                    headers = [(k, v) for k, v in response.headers.items() if k not in BODY_HEADERS]
+                    cache.put(etag, response.get_data(), response.mimetype, headers)
+
+            response.set_etag(etag)
+            if modified:
+                response.last_modified = modified
+            response.headers["Cache-Control"] = CACHE_CONTROL
+            return response
+
+        return wrapper
+
+    return decorator
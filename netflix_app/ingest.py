@@ -0,0 +1,80 @@
+import sys
+
+import pandas as pd
+
+CATEGORICAL_COLUMNS = ["type", "rating", "country"]
+
+# Columns added by typed_frame(); API responses leave them out
+DERIVED_COLUMNS = ["duration_minutes", "duration_seasons", "date_added_at"]
+
+DATE_ADDED_FORMAT = "%B %d, %Y"  # e.g. "September 25, 2021"
+
+
+def parse_duration(duration):
+    """Split "90 min" / "2 Seasons" strings into (minutes, seasons) columns."""
+    parts = duration.astype("str").str.extract(r"(\d+)\s*([A-Za-z]+)")
+    amount = pd.to_numeric(parts[0], errors="coerce")
+    unit = parts[1].str.lower()
+    minutes = amount.where(unit.str.startswith("min", na=False)).astype("Int16")
+    seasons = amount.where(unit.str.startswith("season", na=False)).astype("Int8")
+    return minutes, seasons
+
+
+def parse_date_added(date_added):
+    return pd.to_datetime(date_added.str.strip(), format=DATE_ADDED_FORMAT, errors="coerce")
+
+
+def typed_frame(df):
+    """Normalize column names and parse every column into its typed form once.
+
+    type, rating and country become categoricals and release_year an integer.
+    duration and date_added keep their text and also gain the parsed
+    ``duration_minutes``, ``duration_seasons`` and ``date_added_at`` columns.
+    """
+    df = df.copy()
+    df.columns = df.columns.str.strip().str.lower()
+    for column in CATEGORICAL_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype("category")
+    if "release_year" in df:
+        year = pd.to_numeric(df["release_year"], errors="coerce")
+        df["release_year"] = year.astype("Int16" if year.isna().any() else "int16")
+    if "duration" in df:
+        df["duration_minutes"], df["duration_seasons"] = parse_duration(df["duration"])
+    if "date_added" in df:
+        df["date_added_at"] = parse_date_added(df["date_added"])
+    return df
+
+
+def contains_text(values, text):
+    """Rows of a text column containing ``text``, as a boolean array.
+
+    The title and country filters of every source match this way: a literal,
+    case-insensitive substring (lower() on both sides). SQL queries do the
+    same with the ``lower_text()`` function of pooled connections.
+    """
+    lowered = values.astype("str").str.lower()
+    return lowered.str.contains(text.lower(), regex=False, na=False).to_numpy(dtype=bool)
+
+
+def source_view(df):
+    """``df`` with only the columns of the published dataset."""
+    derived = [column for column in DERIVED_COLUMNS if column in df]
+    return df.drop(columns=derived) if derived else df
+
+
+def memory_report(raw, typed):
+    """Deep memory use per column (MB) of the raw and typed frames."""
+    report = pd.DataFrame({
+        "raw_mb": raw.memory_usage(deep=True, index=False) / 1e6,
+        "typed_mb": typed.memory_usage(deep=True, index=False) / 1e6,
+    })
+    report.loc["total"] = report.sum()
+    return report.round(3)
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else "netflix_titles.csv"
+    raw = pd.read_csv(source, dtype=object)  # every column as Python objects
+    typed = typed_frame(pd.read_csv(source))  # what the loaders now hold
+    print(memory_report(raw, typed).to_string(na_rep="-"))
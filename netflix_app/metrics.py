@@ -0,0 +1,340 @@
+"""Prometheus metrics without a client library.
+
+Counters, gauges, histograms and scrape-time callbacks live in a ``Registry`` and are
+rendered in the Prometheus text format (0.0.4). Observations are cheap:
+each one takes a lock and bumps a bucket.
+
+Behind serve.py, each scrape is answered by a single worker. So that the
+totals are not per-worker, ``Registry.share(directory)`` makes every
+process write its samples to ``<directory>/<pid>.json`` once a second.
+``render()`` then sums the counters and histograms of all processes.
+Gauges (RSS, cache sizes) are reported per live process with a ``pid``
+label.
+"""
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; from a cached response (~0.5 ms) to a cold recommender build
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+ROW_BUCKETS = (0, 1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+FLUSH_INTERVAL_S = 1.0
+STARTED_AT = time.time()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}  # label values -> value (or histogram state)
+
+    def _labels(self, values):
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+        return tuple(zip(self.labelnames, (str(v) for v in values)))
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+        """[(suffix, ((label, value), ...), number)] for rendering and sharing."""
+        with self._lock:
+            return [("", key, value) for key, value in self._values.items()]
+
+
+class Counter(_Metric):
+    """A monotonically increasing count; name it ``..._total``."""
+
+    type = "counter"
+
+    def inc(self, *labels, amount=1):
+        key = self._labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, set directly."""
+
+    type = "gauge"
+
+    def set(self, value, *labels):
+        key = self._labels(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative ``le`` buckets, with _sum and _count."""
+
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        key = self._labels(labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def samples(self):
+        out = []
+        with self._lock:
+            states = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in states:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                out.append(("_bucket", key + (("le", _format_value(bound)),), cumulative))
+            out.append(("_sum", key, total))
+            out.append(("_count", key, cumulative))
+        return out
+
+
+class Collected(_Metric):
+    """Values read at scrape time from ``collect()``, an iterable of (label values, value).
+
+    For numbers kept elsewhere, such as a cache's own hit counters. After a
+    ``reset()``, counters report the increase since then.
+    """
+
+    def __init__(self, name, help, type, collect, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self.type = type
+        self._collect = collect
+
+    def reset(self):
+        if self.type == "counter":
+            self._values = {self._labels(labels): value for labels, value in self._collect()}
+
+    def samples(self):
+        return [
+            ("", key, value - self._values.get(key, 0))
+            for key, value in ((self._labels(labels), value) for labels, value in self._collect())
+        ]
+
+
+def _resident_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def process_metrics():
+    """Resident and peak memory, CPU time and start time of this process."""
+    def memory():
+        rss = _resident_bytes()
+        if rss is not None:
+            yield (), rss
+
+    def peak():
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        yield (), maxrss if sys.platform == "darwin" else maxrss * 1024  # bytes vs. KiB
+
+    def cpu():
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        yield (), usage.ru_utime + usage.ru_stime
+
+    return [
+        Collected("process_resident_memory_bytes", "Resident memory size in bytes.", "gauge", memory),
+        Collected("process_max_resident_memory_bytes", "Peak resident memory size in bytes.", "gauge", peak),
+        Collected("process_cpu_seconds_total", "User and system CPU time in seconds.", "counter", cpu),
+        Collected("process_start_time_seconds", "Start time of the process (Unix time).", "gauge",
+                  lambda: [((), STARTED_AT)]),
+    ]
+
+
+class Registry:
+    """A set of metrics rendered together, optionally summed across processes."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._directory = None
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def collected(self, name, help, type, collect, labelnames=()):
+        return self.register(Collected(name, help, type, collect, labelnames))
+
+    # ----- sharing between forked workers -----
+    def share(self, directory):
+        """Merge the samples of this process and its forked children at scrape time.
+
+        Call in the parent before forking. Children start from zero, so what
+        the parent observed (the warm-up) is counted once, from its own file.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self.flush()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        if self._directory is None:
+            return
+        for metric in self._metrics.values():
+            metric.reset()
+        threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL_S)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def _snapshot(self):
+        return {name: metric.samples() for name, metric in self._metrics.items()}
+
+    def flush(self):
+        """Write this process's samples for the other processes' scrapes."""
+        if self._directory is None:
+            return
+        path = os.path.join(self._directory, f"{os.getpid()}.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(self._snapshot(), f)
+        os.replace(path + ".tmp", path)
+
+    def _others(self):
+        """{pid: (snapshot, alive)} for the other processes' latest files."""
+        others = {}
+        for entry in os.listdir(self._directory):
+            pid, ext = os.path.splitext(entry)
+            if ext != ".json" or not pid.isdigit() or int(pid) == os.getpid():
+                continue
+            try:
+                with open(os.path.join(self._directory, entry)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue  # replaced or removed while we read it
+            try:
+                os.kill(int(pid), 0)
+                alive = True
+            except ProcessLookupError:
+                alive = False
+            except PermissionError:
+                alive = True
+            others[pid] = (snapshot, alive)
+        return others
+
+    # ----- exposition -----
+    def render(self):
+        """The Prometheus text exposition of every metric."""
+        own = self._snapshot()
+        if self._directory is None:
+            merged = own
+        else:
+            merged = {name: [] for name in self._metrics}
+            sources = [(str(os.getpid()), own, True)]
+            sources += [(pid, snapshot, alive) for pid, (snapshot, alive) in self._others().items()]
+            totals = {name: {} for name in self._metrics}
+            for pid, snapshot, alive in sources:
+                for name, samples in snapshot.items():
+                    metric = self._metrics.get(name)
+                    if metric is None:
+                        continue
+                    if metric.type == "gauge":
+                        if alive:
+                            merged[name].extend(
+                                (suffix, tuple(map(tuple, labels)) + (("pid", pid),), value)
+                                for suffix, labels, value in samples
+                            )
+                        continue
+                    for suffix, labels, value in samples:
+                        key = (suffix, tuple(map(tuple, labels)))
+                        totals[name][key] = totals[name].get(key, 0) + value
+            for name, values in totals.items():
+                merged[name].extend((suffix, labels, value) for (suffix, labels), value in values.items())
+
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {_escape(metric.help)}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for suffix, labels, value in merged.get(name, ()):
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(registry, port, host="127.0.0.1"):
+    """Serve ``registry`` on http://host:port/metrics from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
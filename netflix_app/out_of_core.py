@@ -0,0 +1,229 @@
+"""Out-of-core access to catalogs larger than memory.
+
+The dataset is read in chunks sized so that one parsed chunk, plus its
+temporaries, fits in a memory budget (NETFLIX_MEMORY_BUDGET_MB, default
+256). Aggregations compute partial counts per chunk and sum them.
+Filtered lookups scan chunk by chunk and stop once the page is full. A
+fresh Arrow snapshot is read batch by batch from a memory map; otherwise
+the CSV is parsed incrementally.
+
+    python out_of_core.py catalog.csv [--budget-mb 64]   # peak RSS vs. a full load
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from aggregates import TOP_N_CHARTS, TOP_N_RATED
+from dimensions import explode_values
+from ingest import contains_text, source_view, typed_frame
+from snapshot import is_fresh, snapshot_path
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: without it, snapshots are skipped and the CSV is parsed
+    pa = None
+
+MEMORY_BUDGET_MB = int(os.environ.get("NETFLIX_MEMORY_BUDGET_MB", "256"))
+# A chunk's peak is several times its parsed size: typed copy, masks, explodes
+CHUNK_OVERHEAD = 4
+SAMPLE_ROWS = 2000
+MIN_CHUNK_ROWS = 1000
+
+
+def chunk_rows(path, budget_mb=MEMORY_BUDGET_MB):
+    """Rows per chunk so that one chunk's working set stays within ``budget_mb``."""
+    sample = pd.read_csv(path, nrows=SAMPLE_ROWS)
+    per_row = sample.memory_usage(deep=True).sum() / max(len(sample), 1)
+    return max(MIN_CHUNK_ROWS, int(budget_mb * 2**20 / (per_row * CHUNK_OVERHEAD)))
+
+
+def iter_chunks(path, budget_mb=MEMORY_BUDGET_MB, columns=None):
+    """Yield typed chunks of the CSV at ``path``, indexed by row position.
+
+    ``columns`` limits what is read (derived columns such as duration_minutes
+    come from their source columns); the snapshot is used when it is fresh.
+    """
+    if not path.endswith(".csv"):
+        raise ValueError("out-of-core mode reads CSV datasets (and their snapshots)")
+    rows = chunk_rows(path, budget_mb)
+    if pa is not None and is_fresh(path):
+        with pa.memory_map(snapshot_path(path)) as source:
+            reader = pa.ipc.open_file(source)
+            start = 0
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                if columns is not None:
+                    batch = batch.select([c for c in columns if c in batch.schema.names])
+                for offset in range(0, batch.num_rows, rows):
+                    chunk = batch.slice(offset, rows).to_pandas()
+                    chunk.index = pd.RangeIndex(start, start + len(chunk))
+                    start += len(chunk)
+                    yield chunk
+        return
+    usecols = None if columns is None else (lambda column: column in columns)
+    for chunk in pd.read_csv(path, chunksize=rows, usecols=usecols):
+        yield typed_frame(chunk)
+
+
+def _add(total, part):
+    return part if total is None else total.add(part, fill_value=0)
+
+
+def _ranked(counts, n=None):
+    """Positive counts as {value: int}, largest first (ties by value), top ``n``."""
+    counts = counts[counts > 0]
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))
+    return {str(k): int(v) for k, v in ranked[:n]}
+
+
+def scan_aggregates(path, budget_mb=MEMORY_BUDGET_MB):
+    """One pass over ``path``: type, country, genre, year and type-by-year counts.
+
+    Each chunk contributes partial value counts that are summed. Country is
+    counted by its full value, genre per listed genre, as on the Home page.
+    """
+    columns = ["type", "country", "listed_in", "release_year", "rating", "duration", "duration_minutes"]
+    rows = 0
+    minutes_sum = minutes_count = 0
+    types = countries = genres = years = type_years = None
+    top_rated = []
+    for chunk in iter_chunks(path, budget_mb, columns):
+        rows += len(chunk)
+        types = _add(types, chunk["type"].value_counts())
+        countries = _add(countries, chunk["country"].value_counts())
+        genres = _add(genres, explode_values(chunk["listed_in"]).value_counts())
+        years = _add(years, chunk["release_year"].value_counts())
+        type_years = _add(type_years, chunk.groupby(["release_year", "type"], observed=True).size())
+        minutes = chunk["duration_minutes"].dropna()
+        minutes_sum += int(minutes.sum())
+        minutes_count += len(minutes)
+        if len(top_rated) < TOP_N_RATED:
+            rated = chunk.index[chunk["rating"].notna().to_numpy()]
+            top_rated.extend(rated[: TOP_N_RATED - len(top_rated)].tolist())
+    empty = pd.Series(dtype="int64")
+    return {
+        "rows": rows,
+        "type_counts": _ranked(types if types is not None else empty),
+        "country_counts": _ranked(countries if countries is not None else empty),
+        "genre_counts": _ranked(genres if genres is not None else empty),
+        "releases_by_year": {int(k): int(v) for k, v in (years if years is not None else empty).sort_index().items() if v},
+        "type_by_year": [
+            {"release_year": int(year), "type": str(type_), "count": int(count)}
+            for (year, type_), count in (type_years if type_years is not None else empty).sort_index().items()
+            if count
+        ],
+        "avg_duration": minutes_sum / minutes_count if minutes_count else 0.0,
+        "top_rated_rows": top_rated,
+    }
+
+
+def home_stats(aggregates):
+    """The compute_home_stats() dict, built from scan_aggregates() output."""
+    countries = aggregates["country_counts"]
+    top_country = next(iter(countries), "Unknown")
+    return {
+        "rows": aggregates["rows"],
+        "movies": aggregates["type_counts"].get("Movie", 0),
+        "tv_shows": aggregates["type_counts"].get("TV Show", 0),
+        "avg_duration": float(aggregates["avg_duration"]),
+        "top_country": top_country,
+        "top_country_count": countries.get(top_country, 0),
+        "country_counts": dict(list(countries.items())[:TOP_N_CHARTS]),
+        "genre_counts": dict(list(aggregates["genre_counts"].items())[:TOP_N_CHARTS]),
+        "top_rated_rows": aggregates["top_rated_rows"],
+    }
+
+
+def filter_mask(chunk, title=None, type_=None, country=None, rating=None, release_year=None):
+    """Rows of ``chunk`` matching the /api/netflix filters, as a boolean array."""
+    mask = np.ones(len(chunk), dtype=bool)
+    if type_:
+        mask &= (chunk["type"].astype("str").str.lower() == type_.lower()).to_numpy()
+    if rating:
+        mask &= (chunk["rating"].astype("str") == rating).to_numpy() & chunk["rating"].notna().to_numpy()
+    if release_year:
+        mask &= (chunk["release_year"] == release_year).to_numpy()
+    if country:
+        mask &= contains_text(chunk["country"], country)
+    if title:
+        mask &= contains_text(chunk["title"], title)
+    return mask
+
+
+def iter_matches(path, filters, budget_mb=MEMORY_BUDGET_MB, after=None):
+    """Yield the matching rows of each chunk (source columns only), in file order.
+
+    ``after`` skips rows up to and including that row position (keyset paging).
+    """
+    for chunk in iter_chunks(path, budget_mb):
+        if after is not None:
+            if chunk.index[-1] <= after:
+                continue
+            chunk = chunk[chunk.index > after]
+        matches = chunk[filter_mask(chunk, **filters)]
+        if len(matches):
+            yield source_view(matches)
+
+
+def scan_filter(path, filters, limit, offset=0, budget_mb=MEMORY_BUDGET_MB, after=None):
+    """Rows ``offset:offset + limit`` of the filtered catalog; stops reading once found."""
+    pages, found = [], 0
+    for matches in iter_matches(path, filters, budget_mb, after):
+        pages.append(matches)
+        found += len(matches)
+        if found >= offset + limit:
+            break
+    if not pages:
+        return source_view(typed_frame(pd.read_csv(path, nrows=0)))
+    return pd.concat(pages).iloc[offset : offset + limit]
+
+
+def take_rows(path, positions, budget_mb=MEMORY_BUDGET_MB):
+    """The rows at ``positions`` (in that order), reading only up to the last one."""
+    wanted = sorted(set(positions))
+    pages = []
+    for chunk in iter_chunks(path, budget_mb):
+        hits = [p for p in wanted if chunk.index[0] <= p <= chunk.index[-1]]
+        if hits:
+            pages.append(chunk.loc[hits])
+        if chunk.index[-1] >= wanted[-1]:
+            break
+    return source_view(pd.concat(pages).loc[list(positions)])
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10  # bytes vs. KiB
+
+
+CASES = {
+    "aggregates": lambda path, budget: scan_aggregates(path, budget),
+    "filter India/Movie x20": lambda path, budget: scan_filter(path, {"country": "India", "type_": "movie"}, 20, 0, budget),
+    "filter rating=UR x20": lambda path, budget: scan_filter(path, {"rating": "UR"}, 20, 0, budget),
+    "full load (in memory)": lambda path, budget: typed_frame(pd.read_csv(path)),
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", nargs="?", default="netflix_titles.csv")
+    parser.add_argument("--budget-mb", type=int, default=MEMORY_BUDGET_MB)
+    parser.add_argument("--case", choices=CASES, help=argparse.SUPPRESS)  # one case, in this process
+    args = parser.parse_args(sys.argv[1:])
+
+    if args.case:
+        baseline = _peak_rss_mb()
+        start = time.perf_counter()
+        CASES[args.case](args.path, args.budget_mb)
+        print(f"  {args.case:<24} peak +{_peak_rss_mb() - baseline:7.1f} MB RSS  {time.perf_counter() - start:7.2f}s")
+        sys.exit(0)
+
+    print(f"{args.path}: {chunk_rows(args.path, args.budget_mb):,} rows per chunk at {args.budget_mb} MB")
+    for case in CASES:  # a fresh process each, so peaks don't carry over
+        subprocess.run([sys.executable, __file__, args.path, "--budget-mb", str(args.budget_mb), "--case", case], check=True)
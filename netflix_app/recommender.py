@@ -0,0 +1,304 @@
+import re
+
+import numpy as np
+from scipy import sparse
+
+from dimensions import explode_values
+
+# Feature blocks and their weight in the combined similarity
+FEATURE_WEIGHTS = {
+    "listed_in": 1.0,
+    "director": 0.8,
+    "cast": 0.6,
+    "country": 0.4,
+    "description": 1.0,
+}
+
+TOP_K = 30
+CHUNK_ROWS = 512
+BLOCK_CELLS = 2**22  # similarity entries computed at a time
+EXACT_ROWS = 20_000  # up to this many titles, each is compared with all others
+# Larger catalogs use a cell (IVF) index: titles are projected to EMBED_DIMS
+# dimensions (randomized SVD of the features), clustered into cells of about
+# CELL_ROWS titles, and compared exactly with the titles of the PROBES cells
+# nearest to their own.
+EMBED_DIMS = 48
+CELL_ROWS = 256
+PROBES = 12
+KMEANS_SAMPLE = 20_000
+KMEANS_ITERATIONS = 8
+# patch() rebuilds instead once this share of titles changed (the IDF drifts)
+REBUILD_FRACTION = 0.1
+
+_WORD = re.compile(r"[a-z]{3,}")
+STOP_WORDS = frozenset("""
+    the and for with his her their from into when who what this that they them
+    after while about are has have was were its but not all one out new must
+    she him you your our when where which will can more than then over
+""".split())
+
+
+def _description_terms(text):
+    return [w for w in _WORD.findall(text.lower()) if w not in STOP_WORDS]
+
+
+def _row_terms(df, column):
+    """(row, terms) for each row of a feature column."""
+    if column == "description":
+        texts = df[column].fillna("").astype(str).tolist()
+        return ((row, _description_terms(text)) for row, text in enumerate(texts))
+    values = explode_values(df[column])
+    return zip(values.index, ([v] for v in values.tolist()))
+
+
+def _tfidf_block(row_terms, n_rows, vocabulary=None, idf=None):
+    """(row-normalized TF-IDF matrix, vocabulary, idf) for lists of terms per row.
+
+    Given the ``vocabulary`` and ``idf`` of an earlier build, rows are
+    vectorized in that space and unknown terms are ignored.
+    """
+    fixed = vocabulary is not None
+    vocabulary = {} if vocabulary is None else vocabulary
+    rows, cols = [], []
+    for row, terms in row_terms:
+        for term in terms:
+            col = vocabulary.get(term) if fixed else vocabulary.setdefault(term, len(vocabulary))
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+    if not vocabulary:
+        return sparse.csr_matrix((n_rows, 0), dtype=np.float32), vocabulary, np.zeros(0, dtype=np.float32)
+
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+        shape=(n_rows, len(vocabulary)),
+    )
+    counts.sum_duplicates()
+    if not fixed:
+        doc_freq = np.bincount(counts.indices, minlength=len(vocabulary))
+        idf = np.log((1 + n_rows) / (1 + doc_freq)).astype(np.float32) + 1
+    return _normalize(counts @ sparse.diags(idf)), vocabulary, idf
+
+
+def _normalize(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(sparse.diags(1 / norms) @ matrix, dtype=np.float32)
+
+
+def _best(ids, sims, k):
+    """The ``k`` highest-scoring ``ids`` of each row, best first."""
+    top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(sims, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    return np.take_along_axis(np.take_along_axis(ids, top, axis=1), order, axis=1), \
+        np.take_along_axis(top_scores, order, axis=1)
+
+
+def _compare(features, queries, candidates, k, neighbours, scores, out):
+    """Fill ``out`` rows of neighbours/scores with the best ``k`` of ``candidates`` for ``queries``."""
+    transposed = features[candidates].T.tocsc()
+    k = min(k, len(candidates))
+    step = max(1, min(CHUNK_ROWS, BLOCK_CELLS // max(len(candidates), 1)))
+    for start in range(0, len(queries), step):
+        stop = min(start + step, len(queries))
+        sims = (features[queries[start:stop]] @ transposed).toarray()
+        sims[candidates[None, :] == queries[start:stop, None]] = -1  # never recommend itself
+        ids, best = _best(np.broadcast_to(candidates, sims.shape), sims, k)
+        neighbours[out[start:stop], :k], scores[out[start:stop], :k] = ids, np.maximum(best, 0)
+
+
+def _top_k(features, k, rows=None, cells=None):
+    """Top ``k`` cosine neighbours of ``rows`` (default: all) among all rows of ``features``.
+
+    Exact without ``cells``; otherwise each row is only compared with the
+    titles of the cells nearest to its own. Missing neighbours score 0.
+    """
+    rows = np.arange(features.shape[0]) if rows is None else rows
+    neighbours = np.zeros((len(rows), k), dtype=np.int32)
+    scores = np.zeros((len(rows), k), dtype=np.float32)
+    if k == 0 or not len(rows):
+        return neighbours, scores
+    if cells is None:
+        _compare(features, rows, np.arange(features.shape[0]), k, neighbours, scores, np.arange(len(rows)))
+        return neighbours, scores
+    own = cells.assignment[rows]
+    order = np.argsort(own, kind="stable")
+    bounds = np.searchsorted(own[order], np.arange(len(cells.centroids) + 1))
+    for cell in np.flatnonzero(np.diff(bounds)):
+        out = order[bounds[cell] : bounds[cell + 1]]
+        candidates = np.concatenate([cells.members(near) for near in cells.nearest[cell]])
+        _compare(features, rows[out], candidates, k, neighbours, scores, out)
+    return neighbours, scores
+
+
+class _Cells:
+    """Cell (IVF) index of a feature matrix: a projection, centroids and each row's cell."""
+
+    def __init__(self, features, dims=EMBED_DIMS, cell_rows=CELL_ROWS, probes=PROBES, seed=0):
+        rng = np.random.default_rng(seed)
+        n_rows = features.shape[0]
+        # Randomized SVD: the top right singular vectors project any row
+        y = features @ rng.standard_normal((features.shape[1], dims)).astype(np.float32)
+        for _ in range(2):
+            y = features @ (features.T @ np.linalg.qr(y)[0])
+        basis = np.linalg.qr(y)[0]
+        _, _, vt = np.linalg.svd((features.T @ basis).T, full_matrices=False)
+        self.projection = np.ascontiguousarray(vt.T, dtype=np.float32)
+
+        # Spherical k-means on a sample, then every row goes to its nearest centroid
+        sample = self._embed(features[rng.choice(n_rows, min(n_rows, KMEANS_SAMPLE), replace=False)])
+        centroids = sample[rng.choice(len(sample), max(1, min(len(sample), n_rows // cell_rows)), replace=False)]
+        for _ in range(KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = sparse.csr_matrix(
+                (np.ones(len(sample), dtype=np.float32), (labels, np.arange(len(sample)))),
+                shape=(len(centroids), len(sample)),
+            ) @ sample
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids).astype(np.float32)
+        self.centroids = centroids
+        probes = min(probes, len(centroids))
+        self.nearest = np.argpartition(-(centroids @ centroids.T), probes - 1, axis=1)[:, :probes]
+        self._set_assignment(self.assign(features))
+
+    def _embed(self, features):
+        embedded = features @ self.projection
+        return embedded / np.maximum(np.linalg.norm(embedded, axis=1, keepdims=True), 1e-12)
+
+    def assign(self, features):
+        """Cell of each row of ``features``."""
+        labels = np.empty(features.shape[0], dtype=np.int32)
+        for start in range(0, features.shape[0], 65536):
+            block = self._embed(features[start : start + 65536])
+            labels[start : start + 65536] = np.argmax(block @ self.centroids.T, axis=1)
+        return labels
+
+    def _set_assignment(self, assignment):
+        self.assignment = assignment
+        self._order = np.argsort(assignment, kind="stable").astype(np.int32)
+        self._bounds = np.searchsorted(assignment[self._order], np.arange(len(self.centroids) + 1))
+
+    def members(self, cell):
+        return self._order[self._bounds[cell] : self._bounds[cell + 1]]
+
+    def patch(self, features, rows):
+        """A copy for ``features`` (same vocabulary) where ``rows`` were changed or added."""
+        patched = _Cells.__new__(_Cells)
+        patched.projection, patched.centroids, patched.nearest = self.projection, self.centroids, self.nearest
+        assignment = np.zeros(features.shape[0], dtype=np.int32)
+        assignment[: len(self.assignment)] = self.assignment
+        assignment[rows] = self.assign(features[rows])
+        patched._set_assignment(assignment)
+        return patched
+
+
+class Recommender:
+    """Content-based "similar titles" with a precomputed nearest-neighbour table.
+
+    Genre, director, cast, country and description are TF-IDF weighted into
+    sparse feature blocks. The top ``TOP_K`` cosine neighbours of every title
+    are computed once, so a lookup is a slice of two small arrays. Above
+    EXACT_ROWS titles they come from a cell index and are approximate, so
+    that the build grows linearly with the catalog.
+    """
+
+    def __init__(self, df, top_k=TOP_K):
+        n_rows = len(df)
+        self.top_k = top_k
+        blocks = []
+        self._blocks = []  # (column, weight, vocabulary, idf), reused by patch()
+        for column, weight in FEATURE_WEIGHTS.items():
+            if column not in df:
+                continue
+            block, vocabulary, idf = _tfidf_block(_row_terms(df, column), n_rows)
+            blocks.append(block * weight)
+            self._blocks.append((column, weight, vocabulary, idf))
+        self.features = _normalize(sparse.hstack(blocks, format="csr"))
+
+        self._set_show_ids(df)
+        self.cells = _Cells(self.features) if n_rows > EXACT_ROWS else None
+        self.neighbours, self.scores = _top_k(self.features, min(top_k, max(n_rows - 1, 0)), cells=self.cells)
+
+    def _set_show_ids(self, df):
+        self.show_ids = df["show_id"].tolist() if "show_id" in df else list(range(len(df)))
+        self._row_of = {show_id: row for row, show_id in enumerate(self.show_ids)}
+
+    def patch(self, df, changes):
+        """The model for ``df``, a refresh of this frame, or None when a rebuild is due.
+
+        Changed and added titles are vectorized with the existing vocabulary
+        and IDF, get fresh neighbour lists, and are merged into every other
+        title's list. Terms first seen in them are ignored until the next
+        full build.
+        """
+        n_rows, rows = len(df), changes.rows
+        k = self.neighbours.shape[1]
+        if len(rows) > REBUILD_FRACTION * n_rows or k < min(self.top_k, n_rows - 1):
+            return None
+        patched = Recommender.__new__(Recommender)
+        patched.top_k, patched._blocks = self.top_k, self._blocks
+        patched._set_show_ids(df)
+        if not len(rows):
+            patched.features, patched.neighbours, patched.scores = self.features, self.neighbours, self.scores
+            patched.cells = self.cells
+            return patched
+
+        subset = df.iloc[rows]
+        fresh = _normalize(sparse.hstack([
+            _tfidf_block(_row_terms(subset, column), len(rows), vocabulary, idf)[0] * weight
+            for column, weight, vocabulary, idf in self._blocks
+        ], format="csr"))
+        keep = np.ones(changes.old_size, dtype=np.float32)
+        keep[changes.changed] = 0
+        base = sparse.vstack([
+            sparse.diags(keep) @ self.features,
+            sparse.csr_matrix((n_rows - changes.old_size, self.features.shape[1]), dtype=np.float32),
+        ])
+        placement = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, np.arange(len(rows)))), shape=(n_rows, len(rows)),
+        )
+        patched.features = (base + placement @ fresh).tocsr()
+        patched.cells = None if self.cells is None else self.cells.patch(patched.features, rows)
+
+        # Every other title: its old neighbours merged with its new similarity
+        # to each patched row. If a listed neighbour became less similar, the
+        # title that should replace it is unknown: such lists are recomputed.
+        neighbours = np.zeros((n_rows, k), dtype=np.int32)
+        scores = np.zeros((n_rows, k), dtype=np.float32)
+        neighbours[: changes.old_size], scores[: changes.old_size] = self.neighbours, self.scores
+        touched = np.zeros(n_rows, dtype=bool)
+        touched[rows] = True
+        recompute = touched.copy()
+        fresh_t = patched.features[rows].T.tocsc()
+        step = max(1, min(CHUNK_ROWS, BLOCK_CELLS // len(rows)))
+        for start in range(0, n_rows, step):
+            stop = min(start + step, n_rows)
+            old_ids, old_scores = neighbours[start:stop], scores[start:stop]
+            fresh_sims = (patched.features[start:stop] @ fresh_t).toarray()
+            stale = touched[old_ids]
+            new_scores = np.take_along_axis(fresh_sims, np.searchsorted(rows, old_ids).clip(max=len(rows) - 1), axis=1)
+            recompute[start:stop] |= (stale & (new_scores < old_scores - 1e-6)).any(axis=1)
+            ids = np.hstack([old_ids, np.broadcast_to(rows, (stop - start, len(rows)))])
+            sims = np.hstack([np.where(stale, -np.inf, old_scores), fresh_sims])
+            sims[ids == np.arange(start, stop)[:, None]] = -1  # never recommend itself
+            neighbours[start:stop], scores[start:stop] = _best(ids, sims, k)
+        redo = np.flatnonzero(recompute)
+        neighbours[redo], scores[redo] = _top_k(patched.features, k, redo, patched.cells)
+        patched.neighbours, patched.scores = neighbours, scores
+        return patched
+
+    def row_of(self, show_id):
+        """Row position of ``show_id``, or None if it is unknown."""
+        return self._row_of.get(show_id)
+
+    def similar(self, row, limit=10, mask=None):
+        """(row ids, cosine scores) of the titles most similar to ``row``.
+
+        ``mask`` optionally restricts results to rows where it is True.
+        """
+        ids, scores = self.neighbours[row], self.scores[row]
+        keep = scores > 0
+        if mask is not None:
+            keep &= mask[ids]
+        return ids[keep][:limit], scores[keep][:limit]
@@ -0,0 +1,115 @@
+"""Incremental refresh: diff a new dataset version against the loaded one by show_id.
+
+When the dataset file changes, the new version is parsed once and matched
+to the loaded frame by show_id. Titles that were already loaded keep their
+row position, with their new values, and new titles are appended. Row
+positions therefore stay valid: facet bitmaps, the search index, the
+recommender, the Trends cube and keyset cursors can all be patched for
+just the changed and added rows. Titles that disappeared, or duplicate
+show_ids, shift positions; the indexes are then rebuilt from scratch.
+
+    python refresh.py OLD.csv NEW.csv    # what changed, and patch vs. rebuild times
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from ingest import DERIVED_COLUMNS
+
+
+class Changes:
+    """What a refresh changed, in row positions of the refreshed frame.
+
+    ``changed`` rows kept their position but have new values (``previous``
+    holds their old rows); rows from ``old_size`` up to ``size`` were added.
+    """
+
+    def __init__(self, changed, old_size, size, previous):
+        self.changed = changed
+        self.old_size = old_size
+        self.size = size
+        self.previous = previous
+
+    @property
+    def added(self):
+        return np.arange(self.old_size, self.size)
+
+    @property
+    def rows(self):
+        """Changed and added positions, ascending."""
+        return np.concatenate([self.changed, self.added])
+
+    def __bool__(self):
+        return bool(len(self.changed)) or self.size != self.old_size
+
+    def summary(self):
+        return {"changed": int(len(self.changed)), "added": self.size - self.old_size}
+
+
+def row_hashes(df):
+    """One uint64 per row over the published columns (the typed extras follow from them)."""
+    columns = [c for c in df.columns if c not in DERIVED_COLUMNS]
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def refresh_frame(old, new):
+    """(frame, Changes) laying ``new`` out like ``old``; None if positions can't be kept.
+
+    Positions can't be kept when a title was removed, when show_ids are
+    missing or duplicated, or when the columns changed.
+    """
+    if "show_id" not in old or "show_id" not in new or list(old.columns) != list(new.columns):
+        return None
+    old_ids, new_ids = pd.Index(old["show_id"]), pd.Index(new["show_id"])
+    if not (old_ids.is_unique and new_ids.is_unique):
+        return None
+    positions = new_ids.get_indexer(old_ids)
+    if (positions < 0).any():
+        return None  # removed titles
+    is_new = np.ones(len(new), dtype=bool)
+    is_new[positions] = False
+    frame = new.iloc[np.concatenate([positions, np.flatnonzero(is_new)])].reset_index(drop=True)
+    changed = np.flatnonzero(row_hashes(frame.iloc[: len(old)]) != row_hashes(old))
+    return frame, Changes(changed, len(old), len(frame), old.iloc[changed])
+
+
+if __name__ == "__main__":
+    from cube import TrendsCube
+    from dimensions import Dimensions
+    from facets import FacetIndex
+    from ingest import typed_frame
+    from recommender import Recommender
+    from search_index import SearchIndex
+
+    old_path, new_path = sys.argv[1:3]
+    old, new = typed_frame(pd.read_csv(old_path)), typed_frame(pd.read_csv(new_path))
+    start = time.perf_counter()
+    refreshed = refresh_frame(old, new)
+    if refreshed is None:
+        print("Titles were removed or show_ids are not unique: a full rebuild is needed")
+        sys.exit(1)
+    frame, changes = refreshed
+    print(f"diff: {changes.summary()} in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    dims = Dimensions(old)
+    structures = [
+        ("dimensions", lambda: Dimensions(old), lambda d: d.patch(frame, changes), lambda: Dimensions(frame)),
+        ("facets", lambda: FacetIndex(old, dims), lambda f: f.patch(frame, dims.patch(frame, changes), changes),
+         lambda: FacetIndex(frame, Dimensions(frame))),
+        ("search index", lambda: SearchIndex(old), lambda s: s.patch(frame, changes), lambda: SearchIndex(frame)),
+        ("trends cube", lambda: TrendsCube.from_frame(old), lambda c: c.patch(frame, changes),
+         lambda: TrendsCube.from_frame(frame)),
+        ("recommender", lambda: Recommender(old), lambda r: r.patch(frame, changes), lambda: Recommender(frame)),
+    ]
+    for name, build_old, patch, rebuild in structures:
+        value = build_old()
+        start = time.perf_counter()
+        patched = patch(value)
+        patched_s = time.perf_counter() - start
+        start = time.perf_counter()
+        rebuild()
+        rebuild_s = time.perf_counter() - start
+        note = "" if patched is not None else "  (too many changes: rebuilt)"
+        print(f"  {name:<14} patch {patched_s * 1000:9.1f} ms   rebuild {rebuild_s * 1000:9.1f} ms{note}")
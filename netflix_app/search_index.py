@@ -0,0 +1,88 @@
+import re
+import sqlite3
+import threading
+
+# Indexed columns and their bm25 weights (title matches rank highest)
+FTS_COLUMNS = ["title", "description", "cast", "director"]
+FTS_WEIGHTS = (10.0, 1.0, 3.0, 3.0)
+FTS_TOKENIZE = "unicode61 remove_diacritics 2"
+# Index 1- and 2-letter prefixes: "a"* would otherwise merge thousands of terms
+FTS_PREFIX = "1 2"
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def match_expression(text):
+    """Turn free text into an FTS5 query: every word must match as a prefix.
+
+    Returns None when ``text`` contains no searchable words.
+    """
+    tokens = _TOKEN.findall(text or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def bm25_call(table):
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    return f"bm25({table}, {weights})"
+
+
+def create_fts_table(conn, table, content=None):
+    """Create an FTS5 table over FTS_COLUMNS (optionally external-content)."""
+    columns = ", ".join(f'"{c}"' for c in FTS_COLUMNS)
+    options = f", prefix='{FTS_PREFIX}'"
+    if content:
+        options += f", content='{content}', content_rowid='id'"
+    conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.execute(
+        f"CREATE VIRTUAL TABLE {table} USING fts5({columns}{options}, tokenize='{FTS_TOKENIZE}')"
+    )
+
+
+class SearchIndex:
+    """In-memory FTS5 index over a DataFrame's text columns.
+
+    ``search()`` returns positional row ids (for ``df.iloc``), best match first.
+    """
+
+    def __init__(self, df, previous=None, changes=None):
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._lock = threading.Lock()
+        if previous is None:
+            create_fts_table(self._conn, "docs")
+            self._insert(df, range(len(df)))
+        else:
+            with previous._lock:
+                previous._conn.backup(self._conn)
+            with self._conn:
+                self._conn.executemany("DELETE FROM docs WHERE rowid = ?", ((int(r),) for r in changes.changed))
+            self._insert(df.iloc[changes.rows], changes.rows.tolist())
+        self.size = len(df)
+
+    def patch(self, df, changes):
+        """The index of ``df``, a refresh of this frame: a copy with only changed and added rows re-indexed."""
+        return SearchIndex(df, previous=self, changes=changes)
+
+    def _insert(self, frame, row_ids):
+        frame = frame.reindex(columns=FTS_COLUMNS).fillna("").astype(str)
+        rows = zip(row_ids, *(frame[c].tolist() for c in FTS_COLUMNS))
+        columns = ", ".join(f'"{c}"' for c in FTS_COLUMNS)
+        placeholders = ", ".join("?" * len(FTS_COLUMNS))
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT INTO docs (rowid, {columns}) VALUES (?, {placeholders})", rows
+            )
+
+    def search(self, text, limit=None, offset=0):
+        """Row ids matching ``text``, best first; ``limit`` of them from ``offset`` when given."""
+        expression = match_expression(text)
+        if expression is None:
+            return []
+        sql = f"SELECT rowid FROM docs WHERE docs MATCH ? ORDER BY {bm25_call('docs')}"
+        params = [expression]
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        with self._lock:
+            return [row[0] for row in self._conn.execute(sql, params)]
@@ -0,0 +1,89 @@
+import json
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: ?format=arrow needs pyarrow
+    pa = None
+
+CHUNK_ROWS = 1000
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+JSON_ORIENTS = ("records", "columns")
+
+# ?format= values that stream the response instead of building it in memory
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "json-stream": "application/json",
+}
+
+
+def frame_to_json(df, orient="records"):
+    """Serialize ``df`` with pandas' C encoder, straight from the columns.
+
+    ``records`` is a list of row objects; ``columns`` is one array per column,
+    the compact form for analytics clients. NaN/NA are written as null.
+    """
+    if orient == "columns":
+        return "{" + ",".join(
+            f"{json.dumps(str(column))}:{df[column].to_json(orient='values', force_ascii=False, date_format='iso')}"
+            for column in df.columns
+        ) + "}"
+    return df.to_json(orient="records", force_ascii=False, date_format="iso")
+
+
+def frame_records(df):
+    """``df`` as a list of row dicts for jsonify(), with NaN/NA as None (via frame_to_json)."""
+    return json.loads(frame_to_json(df))
+
+
+def frame_to_arrow(df):
+    """Arrow IPC stream bytes for ``df``."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def iter_frame_ndjson(df, chunk_rows=CHUNK_ROWS):
+    """Yield NDJSON text blocks of ``chunk_rows`` records each (NaN -> null)."""
+    for start in range(0, len(df), chunk_rows):
+        block = df.iloc[start : start + chunk_rows].to_json(
+            orient="records", lines=True, force_ascii=False
+        )
+        yield block if block.endswith("\n") else block + "\n"
+
+
+def iter_cursor_ndjson(result, columns, chunk_rows=CHUNK_ROWS):
+    """Yield NDJSON text blocks from a DB cursor, ``chunk_rows`` rows at a time.
+
+    Written like pandas' encoder (compact, "/" escaped), so the same rows
+    give the same bytes as iter_frame_ndjson().
+    """
+    while True:
+        rows = result.fetchmany(chunk_rows)
+        if not rows:
+            break
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), ensure_ascii=False, separators=(",", ":")).replace("/", "\\/") + "\n"
+            for row in rows
+        )
+
+
+def iter_json_array(blocks):
+    """Re-frame NDJSON blocks as one JSON array, still chunk by chunk."""
+    yield "["
+    first = True
+    for block in blocks:
+        body = block.rstrip("\n").replace("\n", ",")
+        if not body:
+            continue
+        yield body if first else "," + body
+        first = False
+    yield "]"
+
+
+def stream_blocks(blocks, fmt):
+    """Return (body iterator, mimetype) for a streaming ``fmt``."""
+    if fmt == "json-stream":
+        blocks = iter_json_array(blocks)
+    return blocks, STREAM_FORMATS[fmt]
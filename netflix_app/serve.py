@@ -0,0 +1,163 @@
+"""Production server for the Flask API: preforked workers with thread pools.
+
+The parent imports app.py and runs ``warm_up()``, which loads the dataset,
+facets and SQLite tables. It then forks ``workers`` processes.
+The workers share those pages copy-on-write and all accept() on one
+listening socket. Each worker serves requests from a fixed pool of
+``threads`` threads, and the parent restarts any worker that dies.
+
+    cd netflix_app && python serve.py [--workers N] [--threads N] [--port N]
+
+Defaults come from NETFLIX_API_HOST, NETFLIX_API_PORT, NETFLIX_API_WORKERS
+(CPU count) and NETFLIX_API_THREADS. ``python app.py`` remains the
+single-process debug server for development.
+"""
+import argparse
+import gc
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from app import app, metrics, warm_up, warm_worker
+from db_pool import POOL_SIZE
+
+HOST = os.environ.get("NETFLIX_API_HOST", "127.0.0.1")
+PORT = int(os.environ.get("NETFLIX_API_PORT", "5001"))
+WORKERS = int(os.environ.get("NETFLIX_API_WORKERS", os.cpu_count() or 1))
+THREADS = int(os.environ.get("NETFLIX_API_THREADS", POOL_SIZE))  # one per pooled connection
+BACKLOG = 1024
+KEEPALIVE_TIMEOUT_S = 5
+MIN_WORKER_UPTIME_S = 1  # a worker dying sooner than this is a crash loop
+
+
+class RequestHandler(WSGIRequestHandler):
+    # Idle keep-alive connections give their pool thread back after this long
+    timeout = KEEPALIVE_TIMEOUT_S
+
+    def log_request(self, code="-", size="-"):
+        pass  # access logs cost more than the cached requests themselves
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug server that runs each connection on a bounded, reused thread pool."""
+
+    multithread = True
+
+    def __init__(self, host, port, app, threads=THREADS, fd=None):
+        super().__init__(host, port, app, handler=RequestHandler, fd=fd)
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="api")
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def listen(host, port):
+    """Bound, non-blocking listening socket; workers race to accept() on it."""
+    sock = socket.create_server((host, port), backlog=BACKLOG)
+    sock.setblocking(False)  # a worker that loses the race just goes back to select()
+    return sock
+
+
+def run_worker(sock, host, port, threads):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent decides when to stop
+    warm_worker()
+    server = PooledWSGIServer(host, port, app, threads=threads, fd=sock.fileno())
+    server.serve_forever()
+
+
+def spawn(sock, host, port, threads):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(sock, host, port, threads)
+        except BaseException:
+            code = 1
+            import traceback
+
+            traceback.print_exc()
+        finally:
+            os._exit(code)
+    return pid
+
+
+def serve(host=HOST, port=PORT, workers=WORKERS, threads=THREADS):
+    """Warm up once, then fork ``workers`` and keep them running until SIGINT/SIGTERM."""
+    warm_up()
+    if workers <= 1 or not hasattr(os, "fork"):
+        print(f"Serving on http://{host}:{port} (1 process, {threads} threads)")
+        warm_worker()
+        PooledWSGIServer(host, port, app, threads=threads).serve_forever()
+        return
+
+    sock = listen(host, port)
+    # Any worker answers /metrics with the totals of all of them
+    metrics_dir = tempfile.mkdtemp(prefix="netflix-metrics-")
+    metrics.share(metrics_dir)
+    # Keep the collector from touching (and so copying) the warmed-up objects
+    gc.freeze()
+    children = {spawn(sock, host, port, threads): time.monotonic() for _ in range(workers)}
+    print(f"Serving on http://{host}:{port} ({workers} workers x {threads} threads)")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = children.pop(pid, None)
+        if stopping or started is None:
+            continue
+        if time.monotonic() - started < MIN_WORKER_UPTIME_S:
+            print(f"Worker {pid} failed on startup ({status}); stopping", file=sys.stderr)
+            stop(None, None)
+            continue
+        print(f"Worker {pid} exited ({status}); restarting", file=sys.stderr)
+        children[spawn(sock, host, port, threads)] = time.monotonic()
+    sock.close()
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--threads", type=int, default=THREADS)
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers, args.threads)
+
+
+if __name__ == "__main__":
+    main()
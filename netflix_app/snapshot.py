@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+
+import pandas as pd
+
+from ingest import typed_frame
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # snapshots are optional; loaders fall back to CSV
+    pa = feather = None
+
+# Bump when typed_frame() changes so older snapshots are rebuilt
+SNAPSHOT_VERSION = b"2"
+
+
+def snapshot_path(source):
+    """Arrow IPC (Feather v2) snapshot that sits next to ``source``."""
+    return os.path.splitext(source)[0] + ".arrow"
+
+
+def _source_stamp(source):
+    st = os.stat(source)
+    return {
+        b"source_mtime_ns": str(st.st_mtime_ns).encode(),
+        b"source_size": str(st.st_size).encode(),
+        b"snapshot_version": SNAPSHOT_VERSION,
+    }
+
+
+def is_fresh(source, path=None):
+    """True if the snapshot exists and was built from the current ``source``."""
+    path = path or snapshot_path(source)
+    if pa is None or not os.path.exists(path):
+        return False
+    try:
+        with pa.memory_map(path) as mapped:
+            metadata = pa.ipc.open_file(mapped).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return False
+    stamp = _source_stamp(source)
+    return all(metadata.get(key) == value for key, value in stamp.items())
+
+
+def write_snapshot(df, source, path=None):
+    """Write ``df`` as an uncompressed (memory-mappable) snapshot of ``source``."""
+    if pa is None:
+        raise RuntimeError("pyarrow is required to build dataset snapshots")
+    path = path or snapshot_path(source)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **_source_stamp(source)})
+    tmp_path = path + ".tmp"
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_snapshot(path):
+    return feather.read_table(path, memory_map=True).to_pandas()
+
+
+def build_snapshot(source):
+    """Parse the CSV ``source`` once and write its typed snapshot."""
+    return write_snapshot(typed_frame(pd.read_csv(source)), source)
+
+
+def load_dataset(source, parse):
+    """Load ``source`` from its fresh snapshot, else ``parse(source)`` and type it."""
+    if source.endswith(".csv") and is_fresh(source):
+        return read_snapshot(snapshot_path(source))
+    return typed_frame(parse(source))
+
+
+def compare_load_times(csv_path, xlsx_path=None):
+    """Time a cold load of each available source; return [(name, rows, seconds)]."""
+    loaders = [("csv", csv_path, lambda: typed_frame(pd.read_csv(csv_path)))]
+    if xlsx_path and os.path.exists(xlsx_path):
+        loaders.append(("xlsx", xlsx_path, lambda: typed_frame(pd.read_excel(xlsx_path, engine="openpyxl"))))
+    if is_fresh(csv_path):
+        loaders.append(("snapshot", snapshot_path(csv_path), lambda: read_snapshot(snapshot_path(csv_path))))
+
+    results = []
+    for name, _, load in loaders:
+        start = time.perf_counter()
+        df = load()
+        results.append((name, len(df), time.perf_counter() - start))
+    return results
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "netflix_titles.csv"
+    xlsx_path = os.path.splitext(csv_path)[0] + ".xlsx"
+
+    start = time.perf_counter()
+    path = build_snapshot(csv_path)
+    print(f"Wrote {path} in {time.perf_counter() - start:.3f}s")
+
+    for name, rows, seconds in compare_load_times(csv_path, xlsx_path):
+        print(f"  {name:<10} {rows:>9,} rows  {seconds * 1000:9.1f} ms")
@@ -0,0 +1,101 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Columns sorted by their parsed values rather than their text, in key order
+SORT_KEYS = {
+    "date_added": ["date_added_at"],
+    "duration": ["duration_minutes", "duration_seasons"],
+}
+SCAN_CHUNK = 65536  # permutation entries checked against the selection at a time
+
+
+def _directed(codes, n_values, descending):
+    """Integer keys from factorized ``codes``; missing values (-1) sort last either way."""
+    keys = (n_values - 1 - codes) if descending else codes.copy()
+    keys[codes < 0] = n_values
+    return keys
+
+
+class SortIndex:
+    """Row orders of a frame per sort column, so that a sorted page is a lookup.
+
+    Each (column, direction) permutation is computed on first use, from
+    factorized codes so strings sort as integers, and kept. Ties keep the
+    dataset order. ``page()`` walks a permutation in chunks against a
+    selection mask and stops once the page is full, so the first pages of a
+    million-row catalog never touch most of it.
+    """
+
+    def __init__(self, df):
+        self._df = df
+        self.size = len(df)
+        self._orders = {}  # (column, descending) -> row ids
+        self._codes = {}  # key column -> (factorized codes, number of values)
+        self._lock = threading.Lock()
+
+    def order(self, column=None, descending=False):
+        """Row ids sorted by ``column`` (None: dataset order)."""
+        if column is None:
+            return np.arange(self.size)[::-1] if descending else np.arange(self.size)
+        key = (column, descending)
+        order = self._orders.get(key)
+        if order is None:
+            with self._lock:
+                order = self._orders.get(key)
+                if order is None:
+                    columns = [c for c in SORT_KEYS.get(column, [column]) if c in self._df] or [column]
+                    keys = [_directed(*self._factorized(c), descending) for c in columns]
+                    order = self._orders[key] = np.lexsort(keys[::-1])  # last key is primary
+        return order
+
+    def _factorized(self, column):
+        if column not in self._codes:
+            codes, uniques = pd.factorize(self._df[column], sort=True)
+            self._codes[column] = (codes, len(uniques))
+        return self._codes[column]
+
+    def rows(self, mask, column=None, descending=False):
+        """All row ids where ``mask`` is True, sorted."""
+        order = self.order(column, descending)
+        return order[mask[order]]
+
+    def page(self, mask, column=None, descending=False, offset=0, limit=20):
+        """Row ids ``offset:offset + limit`` of the rows where ``mask`` is True, sorted."""
+        order = self.order(column, descending)
+        wanted = offset + limit
+        found = []
+        seen = 0
+        for start in range(0, self.size, SCAN_CHUNK):
+            chunk = order[start : start + SCAN_CHUNK]
+            hits = chunk[mask[chunk]]
+            found.append(hits)
+            seen += len(hits)
+            if seen >= wanted:
+                break
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(found)[offset:wanted]
+
+
+class KeyIndex:
+    """Row ids ordered by a key column, for keyset paging that survives edits.
+
+    Keys sort shortest first, then as text, so "s2" comes before "s10".
+    ``after(key)`` seeks by value: the key need not exist any more, and
+    rows added or removed elsewhere don't move it.
+    """
+
+    def __init__(self, keys):
+        keys = keys.astype(str).to_numpy(dtype=object)
+        lengths = np.fromiter((len(key) for key in keys), dtype=np.int64, count=len(keys))
+        self.order = np.lexsort((keys, lengths))
+        self._lengths = lengths[self.order]
+        self._keys = keys[self.order]
+
+    def after(self, key):
+        """Position in ``order`` of the first row whose key sorts after ``key``."""
+        start = np.searchsorted(self._lengths, len(key), side="left")
+        stop = np.searchsorted(self._lengths, len(key), side="right")
+        return int(start + np.searchsorted(self._keys[start:stop], key, side="right"))
@@ -7,6 +7,24 @@ import hashlib
 import numpy as np
 import random
 import math
+from datetime import date
+
+from aggregates import compute_home_stats, pick_of_the_day
+from cards import CARD_CSS, card_grid_html, feature_card_html, truncate
+from cube import TrendsCube
+from dataset_cache import DatasetCache
+
+from db_pool import get_pool
+from dimensions import Dimensions
+from export import ExportJobs, available_formats, frame_chunks, progress
+from facets import FacetIndex
+from ingest import DERIVED_COLUMNS, source_view
+from metrics import Registry, process_metrics, serve_metrics
+from recommender import TOP_K, Recommender
+from refresh import refresh_frame
+from search_index import SearchIndex
+from snapshot import load_dataset
+from sort_index import SortIndex
 
 # ---------------------------
 # Page Config
@@ -20,34 +38,29 @@ st.set_page_config(
 # ---------------------------
 # Database Setup (SQLite for Users)
 # ---------------------------
+# Shared, thread-safe pool of WAL-mode connections (one per Streamlit process)
+users_pool = get_pool("users.db")
+
 def create_usertable():
-    conn = sqlite3.connect("users.db")
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS users
-                 (username TEXT PRIMARY KEY, password TEXT)''')
-    conn.commit()
-    conn.close()
+    with users_pool.connection() as conn:
+        conn.execute('''CREATE TABLE IF NOT EXISTS users
+                     (username TEXT PRIMARY KEY, password TEXT)''')
 
 def add_user(username, password):
-    conn = sqlite3.connect("users.db")
-    c = conn.cursor()
     hashed = hashlib.sha256(password.encode()).hexdigest()
     try:
-        c.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, hashed))
-        conn.commit()
+        with users_pool.connection() as conn:
+            conn.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, hashed))
     except sqlite3.IntegrityError:
         return False
-    conn.close()
     return True
 
 def login_user(username, password):
-    conn = sqlite3.connect("users.db")
-    c = conn.cursor()
     hashed = hashlib.sha256(password.encode()).hexdigest()
-    c.execute("SELECT * FROM users WHERE username=? AND password=?", (username, hashed))
-    data = c.fetchone()
-    conn.close()
-    return data
+    with users_pool.connection() as conn:
+        return conn.execute(
+            "SELECT * FROM users WHERE username=? AND password=?", (username, hashed)
+        ).fetchone()
 
 create_usertable()
 
@@ -55,20 +68,17 @@ create_usertable()
 # Ensure default admin
 # ---------------------------
 def ensure_default_admin():
-    conn = sqlite3.connect("users.db")
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM users")
-    count = c.fetchone()[0]
-    if count == 0:
-        default_user = "admin"
-        default_pass = hashlib.sha256("admin123".encode()).hexdigest()
-        try:
-            c.execute("INSERT INTO users (username, password) VALUES (?, ?)", (default_user, default_pass))
-            conn.commit()
-            print("✅ Default admin created: admin / admin123")
-        except sqlite3.IntegrityError:
-            pass
-    conn.close()
+    with users_pool.connection() as conn:
+        count = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        if count == 0:
+            default_user = "admin"
+            default_pass = hashlib.sha256("admin123".encode()).hexdigest()
+            try:
+                conn.execute("INSERT INTO users (username, password) VALUES (?, ?)", (default_user, default_pass))
+                conn.commit()
+                print("✅ Default admin created: admin / admin123")
+            except sqlite3.IntegrityError:
+                pass
 
 ensure_default_admin()
 
@@ -76,7 +86,7 @@ ensure_default_admin()
 # CSS Styling
 # ---------------------------
 st.markdown("""
-    <style>
+    <style>""" + CARD_CSS + """
         body {background-color: #121212; color: #f5f5f5;}
         .stApp {background-color: #121212;}
         h1, h2, h3 {color: #E50914 !important; font-weight: 700;}
@@ -98,24 +108,118 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# ---------------------------
+# Metrics
+# ---------------------------
+# Page and data-load timings; NETFLIX_STREAMLIT_METRICS_PORT serves them
+# at http://127.0.0.1:<port>/metrics for Prometheus.
+@st.cache_resource
+def load_metrics():
+    registry = Registry()
+    for metric in process_metrics():
+        registry.register(metric)
+    registry.page_seconds = registry.histogram(
+        "netflix_dashboard_page_seconds", "Time to run one page of the dashboard.", ("page",)
+    )
+    # Hits only stat the file, so they are timed too
+    registry.load_data_seconds = registry.histogram(
+        "netflix_dashboard_load_data_seconds", "Time of each load_data() call, cache hits included."
+    )
+    registry.load_data_calls = registry.counter("netflix_dashboard_load_data_calls_total", "load_data() calls.")
+    registry.collected(
+        "netflix_dashboard_load_data_misses_total", "load_data() calls that read the dataset file.", "counter",
+        lambda: [((), (lambda stats: stats["misses"] + stats["reloads"])(load_dataset_cache().stats()))],
+    )
+    registry.collected(
+        "netflix_dashboard_dataset_rows", "Rows in the loaded dataset.", "gauge",
+        lambda: [((), load_dataset_cache().stats()["rows"])],
+    )
+    port = os.environ.get("NETFLIX_STREAMLIT_METRICS_PORT")
+    if port:
+        serve_metrics(registry, int(port))
+    return registry
+
+
+metrics = load_metrics()
+
 # ---------------------------
 # Load Data
 # ---------------------------
-@st.cache_data
-def load_data():
-    if os.path.exists("netflix_app/netflix_titles.csv"):
-        df = pd.read_csv("netflix_app/netflix_titles.csv")
-    elif os.path.exists("netflix_app/netflix_titles.xlsx"):
-        df = pd.read_excel("netflix_app/netflix_titles.xlsx", engine="openpyxl")
+def parse_titles(path):
+    if path.endswith(".csv"):
+        return pd.read_csv(path)
+    return pd.read_excel(path, engine="openpyxl")
+
+
+@st.cache_resource
+def load_dataset_cache():
+    """One DatasetCache per server: a changed file is diffed in, not reloaded per session."""
+    dataset = os.environ.get("NETFLIX_DATASET")  # e.g. a catalog from synthetic.py
+    if dataset:
+        if not os.path.exists(dataset):
+            raise FileNotFoundError(f"NETFLIX_DATASET not found: {dataset}")
+        paths = [dataset]
     else:
-        raise FileNotFoundError("No Netflix dataset found!")
+        paths = ["netflix_app/netflix_titles.csv", "netflix_app/netflix_titles.xlsx"]
+    # Prefers the typed snapshot built by snapshot.py when it is up to date
+    return DatasetCache(lambda path: load_dataset(path, parse_titles), paths, refresh=refresh_frame)
+
+
+def load_data():
+    """The cached dataset (read-only); reloaded when the file changes."""
+    metrics.load_data_calls.inc()
+    with metrics.load_data_seconds.time():
+        return load_dataset_cache().get()
 
-    df.columns = df.columns.str.strip().str.lower()
-    return df
 
 df = load_data()
 
 
+def load_search_index():
+    """Full-text index over title, description, cast and director."""
+    return load_dataset_cache().derived("search_index", SearchIndex, SearchIndex.patch)
+
+
+def load_dimensions():
+    """Exploded genre/country/cast/director tables, built once per dataset."""
+    return load_dataset_cache().derived("dimensions", Dimensions, Dimensions.patch)
+
+
+def load_facets():
+    """Row bitmaps per type/rating/year/country/genre value for fast filtering."""
+    return load_dataset_cache().derived(
+        "facets",
+        lambda df: FacetIndex(df, load_dimensions()),
+        lambda facets, df, changes: facets.patch(df, load_dimensions(), changes),
+    )
+
+
+def load_recommender():
+    """Content-similarity model with precomputed nearest neighbours."""
+    return load_dataset_cache().derived("recommender", Recommender, Recommender.patch)
+
+
+def load_home_stats():
+    """Home page KPIs and chart series, computed once per dataset version."""
+    return load_dataset_cache().derived("home_stats", lambda df: compute_home_stats(df, load_dimensions()))
+
+
+def load_trends_cube():
+    """Title counts per (year, type, rating, genre, country) for the Trends charts."""
+    return load_dataset_cache().derived("trends_cube", TrendsCube.from_frame, TrendsCube.patch)
+
+
+def load_sort_index():
+    """Row orders per column for sorting the Data Explorer, each built on first use."""
+    return load_dataset_cache().derived("sort_index", SortIndex)
+
+
+@st.cache_data
+def load_pick_of_the_day(day, rows):
+    """Same pick for everyone all day; a new one each calendar day."""
+    return pick_of_the_day(rows, day)
+
+
 # ---------------------------
 # Session State
 # ---------------------------
@@ -124,6 +228,33 @@ if "authenticated" not in st.session_state:
 if "page" not in st.session_state:
     st.session_state.page = "Login"
 
+# ---------------------------
+# Card Grids
+# ---------------------------
+def paginate(total, per_page, key):
+    """Page picker for a list of ``total`` items; returns the (start, stop) to show."""
+    pages = max(1, math.ceil(total / per_page))
+    if pages == 1:
+        return 0, total
+    # Keyed by the sizes so that a new result set or page size starts at page 1
+    page = st.number_input(
+        f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=f"{key}-{total}-{per_page}",
+    )
+    start = (page - 1) * per_page
+    return start, min(start + per_page, total)
+
+
+def card_grid(frame, render, per_page, key):
+    """``frame`` as cards, one page at a time, each page a single HTML payload.
+
+    ``render(rows, first)`` returns the card_grid_html() of a page of rows;
+    ``first`` is the position of the page's first row in ``frame``.
+    """
+    grid = st.container()  # above the page picker
+    start, stop = paginate(len(frame), per_page, key)
+    grid.markdown(render(frame.iloc[start:stop], start), unsafe_allow_html=True)
+
+
 # ---------------------------
 # Navigation Bar
 # ---------------------------
@@ -208,17 +339,12 @@ def home_page():
     )
 
     # --- KPIs ---
-    movies = (df["type"] == "Movie").sum() if "type" in df else 0
-    shows = (df["type"] == "TV Show").sum() if "type" in df else 0
-    avg_duration = (
-        df["duration"].str.extract("(\d+)").astype(float).mean()[0]
-        if "duration" in df
-        else 0
-    )
-    top_country = df["country"].mode()[0] if "country" in df else "Unknown"
-    top_country_count = (
-        df["country"].value_counts().iloc[0] if "country" in df else 0
-    )
+    stats = load_home_stats()
+    movies = stats["movies"]
+    shows = stats["tv_shows"]
+    avg_duration = stats["avg_duration"]
+    top_country = stats["top_country"]
+    top_country_count = stats["top_country_count"]
 
     c1, c2, c3, c4 = st.columns(4)
     with c1:
@@ -237,10 +363,8 @@ def home_page():
 
     with col1:
         st.subheader("Genre Distribution")
-        if "listed_in" in df:
-            genre_counts = (
-                df["listed_in"].dropna().str.split(", ").explode().value_counts().head(6)
-            )
+        if stats["genre_counts"]:
+            genre_counts = pd.Series(stats["genre_counts"])
             fig1 = px.pie(
                 genre_counts,
                 values=genre_counts.values,
@@ -254,8 +378,8 @@ def home_page():
 
     with col2:
         st.subheader("Production by Country")
-        if "country" in df:
-            country_counts = df["country"].value_counts().head(6)
+        if stats["country_counts"]:
+            country_counts = pd.Series(stats["country_counts"])
             fig2 = px.bar(
                 country_counts,
                 x=country_counts.index,
@@ -272,98 +396,160 @@ def home_page():
     st.markdown("---")
 
     # --- Top 10 Highest Rated Content ---
-    if "rating" in df.columns:
-        top10 = df.dropna(subset=["rating"]).head(10)
-    else:
-        df["fake_rating"] = np.random.uniform(7.5, 9.0, size=len(df))
-        top10 = df.sort_values("fake_rating", ascending=False).head(10)
+    top10 = df.iloc[stats["top_rated_rows"]]
 
     st.subheader("⭐ Top 10 Highest Rated Content")
-    cols = st.columns(5)
-
-    for idx, row in enumerate(top10.itertuples(), start=1):
-        col = cols[(idx - 1) % 5]
-        with col:
-            # Try to convert rating to float, else fallback to fake_rating
-            rating_value = getattr(row, "rating", getattr(row, "fake_rating", 8.0))
-            try:
-                rating_value = float(rating_value)
-            except (ValueError, TypeError):
-                rating_value = getattr(row, "fake_rating", 8.0)
-
-            st.markdown(
-                f"""
-                <div style="background:#1f1f1f; padding:15px; border-radius:10px; 
-                            margin-bottom:10px; text-align:center;">
-                    <h4 style="color:white; margin:8px 0;">#{idx} {row.title}</h4>
-                    <p style="color:gray;">{row.type} • {getattr(row,'release_year','')}</p>
-                    <p style="font-size:18px;">⭐ {round(rating_value,1)}</p>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
+    # Numeric ratings where there are any, else fake_rating (or 8.0)
+    fallback = top10["fake_rating"] if "fake_rating" in top10 else pd.Series(8.0, index=top10.index)
+    scores = pd.to_numeric(top10.get("rating"), errors="coerce") if "rating" in top10 else fallback
+    scores = scores.fillna(fallback).astype(float).round(1)
+    years = top10["release_year"].astype(str) if "release_year" in top10 else ""
+    st.markdown(
+        card_grid_html(
+            [f"#{rank} {title}" for rank, title in enumerate(top10["title"].tolist(), start=1)],
+            lines=[(top10["type"].astype(str) + " • " + years, ""), ("⭐ " + scores.astype(str), "nf-score")],
+            columns=5,
+            centered=True,
+        ),
+        unsafe_allow_html=True,
+    )
 
 
     st.markdown("---")
 
     # --- Random Pick of the Day ---
     st.subheader("🎲 Random Pick of the Day")
-    random_row = df.sample(1).iloc[0]
-
-    # Safely handle values
-    year = random_row["release_year"] if "release_year" in df else ""
-    country = random_row["country"] if "country" in df else "N/A"
-    description = (
-        random_row["description"]
-        if "description" in df
-        else "No description available."
-    )
-    director = random_row["director"] if "director" in df else "Unknown"
-    cast = random_row["cast"] if "cast" in df else "Not available"
+    pick_row, rating = load_pick_of_the_day(date.today(), len(df))
+    random_row = df.iloc[pick_row]
 
-    # Mock rating
-    rating = round(np.random.uniform(7.0, 9.5), 1)
+    def field(column, default=None):
+        return random_row[column] if column in df else default
 
     st.markdown(
-        f"""
-        <div style="background:linear-gradient(135deg, #E50914, #221f1f); 
-                    padding:20px; border-radius:12px; color:white;">
-            <h3 style="color:black;">{random_row['title']}</h3>
-            <p><b>{random_row['type']}</b> • {year} • ⭐ {rating}</p>
-            <p>{description}</p>
-            <p><b>Director:</b> {director}</p>
-            <p><b>Cast:</b> {cast}</p>
-            <p><b>Country:</b> {country}</p>
-        </div>
-        """,
+        feature_card_html(
+            random_row["title"],
+            f"{field('type', '')} • {field('release_year', '')} • ⭐ {rating}",
+            field("description", "No description available."),
+            [("Director", field("director", "Unknown")), ("Cast", field("cast", "Not available")),
+             ("Country", field("country"))],
+        ),
         unsafe_allow_html=True,
     )
 
 
 
 
+# ---------------------------
+# Exports
+# ---------------------------
+# Exports run as jobs writing into NETFLIX_EXPORT_DIR, and the API at
+# NETFLIX_API_URL serves the finished file from there, so the dashboard
+# never holds an export in memory. Both must share the directory.
+API_URL = os.environ.get(
+    "NETFLIX_API_URL", f"http://127.0.0.1:{os.environ.get('NETFLIX_API_PORT', '5001')}"
+).rstrip("/")
+
+
+@st.cache_resource
+def load_export_jobs():
+    return ExportJobs()
+
+
 # ---------------------------
 # Data Page
 # ---------------------------
+EXPLORER_PAGE_SIZES = [20, 50, 100, 500]
+
+
 def data_page():
+    facets = load_facets()
     st.title("📂 Netflix Dataset Explorer")
 
-    search = st.text_input("🔍 Search by Title")
-    type_filter = st.multiselect("🎬 Filter by Type", df["type"].dropna().unique())
-    country_filter = st.multiselect("🌍 Filter by Country", df["country"].dropna().unique()[:20])
+    search = st.text_input("🔍 Search titles, descriptions, cast & directors")
+    type_filter = st.multiselect("🎬 Filter by Type", facets.values("type"))
+    countries = facets.counts("country")
+    country_filter = st.multiselect(
+        "🌍 Filter by Country",
+        countries.index.tolist(),
+        format_func=lambda country: f"{country} ({countries[country]:,})",
+        placeholder=f"Type to search {len(countries):,} countries",
+    )
     year_filter = st.slider("📅 Filter by Release Year", int(df["release_year"].min()), int(df["release_year"].max()), (2000, 2020))
 
-    filtered_df = df.copy()
+    selection = facets.select(
+        type=type_filter or None,
+        country=country_filter or None,
+        release_year=list(range(year_filter[0], year_filter[1] + 1)) if year_filter else None,
+    )
+    mask = facets.mask(selection)
     if search:
-        filtered_df = filtered_df[filtered_df["title"].str.contains(search, case=False, na=False)]
-    if type_filter:
-        filtered_df = filtered_df[filtered_df["type"].isin(type_filter)]
-    if country_filter:
-        filtered_df = filtered_df[filtered_df["country"].isin(country_filter)]
-    if year_filter:
-        filtered_df = filtered_df[(filtered_df["release_year"] >= year_filter[0]) & (filtered_df["release_year"] <= year_filter[1])]
+        # Ranked, prefix-matching full-text search
+        ranked = np.asarray(load_search_index().search(search), dtype=np.int64)
+        ranked = ranked[mask[ranked]]
+        mask = np.zeros(len(df), dtype=bool)
+        mask[ranked] = True
+        total = len(ranked)
+    else:
+        total = int(mask.sum())
+
+    columns = [column for column in df.columns if column not in DERIVED_COLUMNS]
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        sort_by = st.selectbox("↕️ Sort by", (["Relevance"] if search else []) + ["Dataset order"] + columns)
+    with col2:
+        descending = st.checkbox("Descending")
+    with col3:
+        per_page = st.selectbox("Rows per page", EXPLORER_PAGE_SIZES)
+
+    st.caption(f"{total:,} matching titles")
+    table = st.container()  # above the page picker
+    start, stop = paginate(total, per_page, "explorer-page")
+    column = None if sort_by in ("Relevance", "Dataset order") else sort_by
+    if sort_by == "Relevance":
+        ids = (ranked[::-1] if descending else ranked)[start:stop]
+    else:
+        ids = load_sort_index().page(mask, column, descending, start, stop - start)
+    table.dataframe(source_view(df.iloc[ids]), use_container_width=True)
 
-    st.dataframe(filtered_df.head(20), use_container_width=True)
+    # Clicking starts a job that writes the file chunk by chunk; the API serves it
+    def export(fmt):
+        if sort_by == "Relevance":
+            rows = ranked[::-1] if descending else ranked
+        else:
+            rows = load_sort_index().rows(mask, column, descending)
+        frames = (source_view(frame) for frame in frame_chunks(df, rows))
+        st.session_state.export_job = load_export_jobs().submit(fmt, frames, total)["id"]
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        export_format = st.selectbox("Export format", available_formats())
+    with col2:
+        st.button(
+            f"⬇️ Export {total:,} titles as {export_format.upper()}",
+            on_click=export, args=(export_format,), disabled=not total,
+        )
+    if "export_job" in st.session_state:
+        export_status(st.session_state.export_job)
+
+
+def export_status(job_id):
+    job = load_export_jobs().get(job_id)
+    if job is None:  # expired
+        del st.session_state.export_job
+    elif job["status"] == "done":
+        st.link_button(f"💾 Download {job['file_name']} ({job['rows']:,} titles)", f"{API_URL}/api/export/jobs/{job_id}/download")
+    elif job["status"] == "failed":
+        st.error(f"Export failed: {job['error']}")
+    else:
+        export_progress(job_id)
+
+
+@st.fragment(run_every=1)
+def export_progress(job_id):
+    job = load_export_jobs().get(job_id)
+    if job is None or job["status"] in ("done", "failed"):
+        st.rerun()
+    st.progress(progress(job) or 0.0, text=f"Exporting… {job['rows']:,} titles written")
 
 # ---------------------------
 # Visualization Page
@@ -374,6 +560,8 @@ import pandas as pd
 
 def visualization_page():
     global df
+    dims = load_dimensions()
+    facets = load_facets()
     st.title("📊 Data Visualizations")
     st.markdown("Interactive charts and insights from Netflix content data")
 
@@ -381,23 +569,23 @@ def visualization_page():
     st.markdown("### 🔎 Dynamic Filters")
     col1, col2 = st.columns(2)
     with col1:
-        selected_country = st.selectbox("Country", ["All Countries"] + sorted(df["country"].dropna().unique().tolist()))
+        selected_country = st.selectbox("Country", ["All Countries"] + facets.values("country"))
     with col2:
-        selected_genre = st.selectbox("Genre", ["All Genres"] + sorted(set(", ".join(df["listed_in"].dropna()).split(", "))))
+        selected_genre = st.selectbox("Genre", ["All Genres"] + facets.values("genre"))
 
     # Apply filters
-    df_filtered = df.copy()
-    if selected_country != "All Countries":
-        df_filtered = df_filtered[df_filtered["country"] == selected_country]
-    if selected_genre != "All Genres":
-        df_filtered = df_filtered[df_filtered["listed_in"].str.contains(selected_genre, na=False)]
+    selection = facets.select(
+        country=selected_country if selected_country != "All Countries" else None,
+        genre=selected_genre if selected_genre != "All Genres" else None,
+    )
+    mask = facets.mask(selection)
 
     # --- Row 1: Genre & Country Distribution ---
     st.markdown("### 📊 Distribution Insights")
     col1, col2 = st.columns(2)
 
     with col1:
-        genre_counts = df_filtered["listed_in"].str.split(", ").explode().value_counts().head(10)
+        genre_counts = facets.counts("genre", selection).head(10)
         fig1 = px.bar(
             genre_counts,
             x=genre_counts.index,
@@ -410,7 +598,7 @@ def visualization_page():
         st.plotly_chart(fig1, use_container_width=True)
 
     with col2:
-        country_counts = df_filtered["country"].value_counts().head(10)
+        country_counts = facets.counts("country", selection).head(10)
         fig2 = px.bar(
             country_counts,
             x=country_counts.index,
@@ -424,7 +612,7 @@ def visualization_page():
 
     # --- Row 2: Releases Over Time ---
     st.markdown("### ⏳ Content Releases Over Time")
-    releases_by_year = df_filtered["release_year"].value_counts().sort_index()
+    releases_by_year = facets.counts("release_year", selection).sort_index()
     fig3 = px.area(
         x=releases_by_year.index,
         y=releases_by_year.values,
@@ -435,10 +623,10 @@ def visualization_page():
 
     # --- Row 3: Genre Trends Over Years ---
     st.markdown("### 📈 Genre Trends Over Years")
+    genres = dims.long_table("genre", mask)
     genre_trends = (
-        df_filtered
-        .assign(genre=df_filtered["listed_in"].str.split(", "))
-        .explode("genre")
+        genres
+        .assign(release_year=df["release_year"].to_numpy()[genres["row_id"].to_numpy()])
         .groupby(["release_year", "genre"])
         .size()
         .reset_index(name="count")
@@ -463,7 +651,25 @@ def visualization_page():
 # ---------------------------
 # Recommendations Page
 # ---------------------------
+RECOMMENDATIONS_PER_PAGE = 12
+SHOW_MATCHES = 20  # search matches offered in the show picker
+
+
+def recommendation_cards(rows, first):
+    return card_grid_html(
+        rows["title"],
+        badge=rows["type"],
+        lines=[
+            (rows["release_year"], ""),
+            ("⭐ " + rows["rating"].astype(object).fillna("N/A").astype(str), ""),
+            (truncate(rows["description"], 120) if "description" in rows else [""] * len(rows), "nf-text"),
+            (rows["country"].astype(object).fillna("Unknown") if "country" in rows else ["Unknown"] * len(rows), "nf-muted"),
+        ],
+    )
+
+
 def recommendations_page():
+    dims = load_dimensions()
     st.markdown("## 🤖 AI Recommendations")
     st.markdown("Discover your next favorite show with content-based filtering")
 
@@ -478,12 +684,11 @@ def recommendations_page():
     with col3:
         tv_filter = st.button("TV Show", use_container_width=True)
 
+    mask = np.ones(len(df), dtype=bool)
     if movie_filter:
-        df_filtered = df[df["type"] == "Movie"]
+        mask &= (df["type"] == "Movie").to_numpy()
     elif tv_filter:
-        df_filtered = df[df["type"] == "TV Show"]
-    else:
-        df_filtered = df.copy()
+        mask &= (df["type"] == "TV Show").to_numpy()
 
     st.write("---")
 
@@ -492,14 +697,7 @@ def recommendations_page():
     # ---------------------------
     st.markdown("### ✨ Personalize by Genre")
 
-    genres = (
-        df["listed_in"]
-        .dropna()
-        .str.split(", ")
-        .explode()
-        .unique()
-        .tolist()
-    )
+    genres = dims.counts("genre").index.tolist()
 
     cols = st.columns(4)
     selected_genre = None
@@ -509,7 +707,8 @@ def recommendations_page():
                 selected_genre = genre
 
     if selected_genre:
-        df_filtered = df_filtered[df_filtered["listed_in"].str.contains(selected_genre, na=False)]
+        mask &= dims.mask("genre", selected_genre)
+    df_filtered = df[mask]
 
     st.write("---")
 
@@ -517,27 +716,30 @@ def recommendations_page():
     # Popular & Highly Rated
     # ---------------------------
     st.markdown("### 📈 Popular & Highly Rated")
-    st.markdown("Click on any show to get similar recommendations:")
+    # Shows are found through the search index, so only a few matches reach the browser
+    search = st.text_input("🔍 Find a show you like:", placeholder="Title, cast or director")
+    liked = None
+    if search:
+        matches = load_search_index().search(search, SHOW_MATCHES)
+        if matches:
+            liked = st.selectbox(
+                "Pick it to get similar recommendations:",
+                matches,
+                format_func=lambda row: f"{df['title'].iat[row]} ({df['type'].iat[row]}, {df['release_year'].iat[row]})",
+            )
+        else:
+            st.info("No show matches your search.")
 
-    if not df_filtered.empty:
+    if liked is not None:
+        recommender = load_recommender()
+        ids, _ = recommender.similar(recommender.row_of(df["show_id"].iat[liked]), TOP_K, mask)
+        subset = df.iloc[ids]
+        st.markdown(f"#### 🎯 Because you liked *{df['title'].iat[liked]}*")
+    else:
         subset = df_filtered.sample(min(12, len(df_filtered)))  # show up to 12
-        cols = st.columns(4)
-
-        for i, (_, row) in enumerate(subset.iterrows()):
-            with cols[i % 4]:
-                st.markdown(
-                    f"""
-                    <div style="background-color:#1e1e2e; padding:15px; border-radius:10px; margin-bottom:20px;">
-                        <span style="color:#ff4b4b; font-weight:bold;">{row['type']}</span>
-                        <h4 style="margin:5px 0;">{row['title']}</h4>
-                        <p style="margin:0; font-size:14px; color: #bbb;">{row['release_year']}</p>
-                        <p style="margin:5px 0; font-size:14px;">⭐ {row.get('rating', 'N/A')}</p>
-                        <p style="font-size:13px; color:#aaa;">{row.get('description', '')[:120]}...</p>
-                        <p style="font-size:12px; color:#888;">{row.get('country', 'Unknown')}</p>
-                    </div>
-                    """,
-                    unsafe_allow_html=True
-                )
+
+    if not subset.empty:
+        card_grid(subset, recommendation_cards, RECOMMENDATIONS_PER_PAGE, "recommendations-page")
     else:
         st.info("No recommendations available for the selected filter.")
 
@@ -552,6 +754,8 @@ import pandas as pd
 # Trends Page
 # ---------------------------
 def trends_page():
+    facets = load_facets()
+    cube = load_trends_cube()
     st.markdown("## 📊 Trends & Insights")
     st.markdown("Advanced analytics and storytelling from Netflix data")
 
@@ -561,24 +765,19 @@ def trends_page():
     st.markdown("### 🔎 Interactive Filters")
     col1, col2, col3 = st.columns(3)
 
-    genres = df["listed_in"].dropna().str.split(", ").explode().unique()
-    countries = df["country"].dropna().str.split(", ").explode().unique()
-    ratings = df["rating"].dropna().unique()
-
     with col1:
-        selected_genre = st.selectbox("Genre", ["All Genres"] + sorted(genres.tolist()))
+        selected_genre = st.selectbox("Genre", ["All Genres"] + facets.values("genre"))
     with col2:
-        selected_country = st.selectbox("Country", ["All Countries"] + sorted(countries.tolist()))
+        selected_country = st.selectbox("Country", ["All Countries"] + facets.values("country"))
     with col3:
-        selected_rating = st.selectbox("Rating", ["All Ratings"] + sorted(ratings.tolist()))
+        selected_rating = st.selectbox("Rating", ["All Ratings"] + facets.values("rating"))
 
-    df_filtered = df.copy()
-    if selected_genre != "All Genres":
-        df_filtered = df_filtered[df_filtered["listed_in"].str.contains(selected_genre, na=False)]
-    if selected_country != "All Countries":
-        df_filtered = df_filtered[df_filtered["country"].str.contains(selected_country, na=False)]
-    if selected_rating != "All Ratings":
-        df_filtered = df_filtered[df_filtered["rating"] == selected_rating]
+    # Charts are slices of the precomputed count cube; only the cards read rows
+    filters = dict(
+        genre=selected_genre if selected_genre != "All Genres" else None,
+        country=selected_country if selected_country != "All Countries" else None,
+        rating=selected_rating if selected_rating != "All Ratings" else None,
+    )
 
     st.write("---")
 
@@ -586,7 +785,7 @@ def trends_page():
     # Movies vs TV Shows Over Time
     # ---------------------------
     st.markdown("### 📈 Movies vs TV Shows Over Time")
-    yearly_counts = df_filtered.groupby(["release_year", "type"]).size().reset_index(name="count")
+    yearly_counts = cube.type_by_year(**filters)
     fig = px.area(
         yearly_counts,
         x="release_year",
@@ -601,15 +800,8 @@ def trends_page():
     # Top Producing Countries
     # ---------------------------
     st.markdown("### 🌍 Top Producing Countries Over Time")
-    country_counts = (
-        df_filtered.dropna(subset=["country"])
-        .assign(country=df_filtered["country"].str.split(", "))
-        .explode("country")
-        .groupby(["release_year", "country"]).size().reset_index(name="count")
-    )
-    top_countries = country_counts.groupby("country")["count"].sum().nlargest(3).index
     fig2 = px.line(
-        country_counts[country_counts["country"].isin(top_countries)],
+        cube.country_by_year(**filters),
         x="release_year",
         y="count",
         color="country",
@@ -621,17 +813,9 @@ def trends_page():
     # ---------------------------
     # Average IMDb Rating by Genre
     # ---------------------------
-    if "imdb_rating" in df_filtered.columns:
+    genre_ratings = cube.genre_imdb_means(**filters)
+    if genre_ratings is not None:
         st.markdown("### ⭐ Average IMDb Rating by Genre")
-        genre_ratings = (
-            df_filtered.dropna(subset=["listed_in", "imdb_rating"])
-            .assign(genre=df_filtered["listed_in"].str.split(", "))
-            .explode("genre")
-            .groupby("genre")["imdb_rating"]
-            .mean()
-            .sort_values(ascending=False)
-            .head(5)
-        )
         fig3 = px.bar(
             genre_ratings,
             x=genre_ratings.index,
@@ -643,12 +827,9 @@ def trends_page():
 
     # ---------------------------
     # Content Rating Distribution
-    # ---------------------------
-        # ---------------------------
-    # Content Rating Distribution
     # ---------------------------
     st.markdown("### 🎬 Content Rating Distribution")
-    rating_counts = df_filtered["rating"].value_counts().reset_index()
+    rating_counts = cube.rating_counts(**filters).reset_index()
     rating_counts.columns = ["rating_label", "count"]  # rename columns
 
     fig4 = px.pie(
@@ -664,27 +845,23 @@ def trends_page():
     # Binge-Worthy Shows (Ranked Cards)
     # ---------------------------
     st.markdown("### 📺 Binge-Worthy Shows")
-    binge_df = (
-        df_filtered[df_filtered["type"] == "TV Show"]
-        .dropna(subset=["title", "rating"])
-        .head(10)
-    )
+    shows = facets.row_ids(facets.select(type="TV Show", **filters))
+    shows = shows[(df["title"].notna() & df["rating"].notna()).to_numpy()[shows]]
+    binge_df = df.iloc[shows]
+
+    def binge_cards(rows, first):
+        return card_grid_html(
+            rows["title"],
+            badge=[f"#{rank}" for rank in range(first + 1, first + len(rows) + 1)],
+            lines=[
+                ("⭐ " + rows["rating"].astype(str), ""),
+                (rows.get("listed_in", pd.Series("", index=rows.index)), "nf-text"),
+                (rows.get("country", pd.Series("", index=rows.index)), "nf-muted"),
+            ],
+            columns=5,
+        )
 
-    cols = st.columns(5)
-    for i, (_, row) in enumerate(binge_df.iterrows()):
-        with cols[i % 5]:
-            st.markdown(
-                f"""
-                <div style="background-color:#1e1e2e; padding:15px; border-radius:10px; margin-bottom:20px;">
-                    <span style="color:#ff4b4b; font-weight:bold;">#{i+1}</span>
-                    <h4 style="margin:5px 0;">{row['title']}</h4>
-                    <p style="margin:0; font-size:14px; color:#bbb;">⭐ {row['rating']}</p>
-                    <p style="font-size:13px; color:#aaa;">{row.get('listed_in','')}</p>
-                    <p style="font-size:12px; color:#888;">{row.get('country','')}</p>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+    card_grid(binge_df, binge_cards, 10, "binge-page")
 
 
 
@@ -698,10 +875,13 @@ def trends_page():
     # ---------------------------
     # Correlation: Duration vs IMDb Rating
     # ---------------------------
-    if "imdb_rating" in df_filtered.columns and "duration" in df_filtered.columns:
+    if "imdb_rating" in df.columns and "duration_minutes" in df.columns:
         st.markdown("### 🎥 Movie Duration vs IMDb Rating Correlation")
-        duration_df = df_filtered[df_filtered["type"] == "Movie"].dropna(subset=["duration", "imdb_rating"])
-        duration_df["minutes"] = duration_df["duration"].str.extract(r'(\d+)').astype(float)
+        duration_df = (
+            df.iloc[facets.row_ids(facets.select(type="Movie", **filters))]
+            .dropna(subset=["duration_minutes", "imdb_rating"])
+            .rename(columns={"duration_minutes": "minutes"})
+        )
 
         fig5 = px.scatter(
             duration_df,
@@ -821,19 +1001,20 @@ if not st.session_state.authenticated:
         login_page()
 else:
     navbar()
-    if st.session_state.page == "Home":
-        home_page()
-    elif st.session_state.page == "Data":
-        data_page()
-    elif st.session_state.page == "Visualizations":
-        visualization_page()
-    elif st.session_state.page == "Recommendations":
-        recommendations_page()
-    elif st.session_state.page == "Trends":
-        trends_page()
-    elif st.session_state.page == "About":
-        about_page()
-    elif st.session_state.page == "Logout":
+    with metrics.page_seconds.time(st.session_state.page):
+        if st.session_state.page == "Home":
+            home_page()
+        elif st.session_state.page == "Data":
+            data_page()
+        elif st.session_state.page == "Visualizations":
+            visualization_page()
+        elif st.session_state.page == "Recommendations":
+            recommendations_page()
+        elif st.session_state.page == "Trends":
+            trends_page()
+        elif st.session_state.page == "About":
+            about_page()
+    if st.session_state.page == "Logout":
         st.session_state.authenticated = False
         st.session_state.page = "Login"
         st.success("👋 You have been logged out.")
@@ -0,0 +1,305 @@
+"""Synthetic large catalogs fitted to ``netflix_titles.csv``.
+
+``CatalogModel`` learns the empirical distribution of each column from the
+real catalog. Type comes first. Rating, duration, genre list, country,
+director, release year and date added are then drawn per type. Cast lists
+and descriptions get a length drawn from the real lengths, then names or
+words drawn by their real frequency. Generated catalogs therefore match
+the real one in type, rating, country, genre, cast-list length and
+description length, while titles, casts and descriptions are new.
+
+The real titles come first, so ids such as ``s1`` still resolve. Output is
+streamed in chunks to CSV, the SQLite schema from create_db.py, and an
+Arrow snapshot that load_dataset() picks up next to the CSV. Millions of
+rows never need the whole catalog in memory.
+
+    python synthetic.py --rows 1000000 [--formats csv,sqlite,arrow] [--out DIR]
+    python synthetic.py 10 100          # 10x and 100x the real catalog
+
+Point the apps at the result with NETFLIX_DATASET=/path/to/catalog.csv.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from create_db import load_titles, print_report, tune_for_loading, write_source_stamp
+from dataset_cache import file_version
+from dimensions import explode_values
+from ingest import CATEGORICAL_COLUMNS, typed_frame
+from snapshot import _source_stamp, snapshot_path
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: the arrow output needs pyarrow
+    pa = None
+
+SCALES = (10, 100, 1000)
+FORMATS = ("csv", "sqlite", "arrow")
+CHUNK_ROWS = 100_000
+
+# Drawn as whole values, conditioned on type
+PER_TYPE_COLUMNS = [
+    "director", "country", "date_added", "release_year", "rating", "duration", "listed_in",
+]
+
+
+def _distribution(values):
+    """(values, probabilities) of ``values``, missing values included."""
+    counts = pd.Series(values).value_counts(dropna=False)
+    return counts.index.to_numpy(dtype=object), (counts / counts.sum()).to_numpy()
+
+
+def _draw(distribution, n, rng):
+    values, p = distribution
+    return values[rng.choice(len(values), n, p=p)]
+
+
+def _lengths(series, split):
+    """Token count of each value of ``series`` (0 for missing)."""
+    return series.fillna("").astype("str").map(lambda text: len(split(text))).to_numpy()
+
+
+def _join(tokens, lengths, sep, empty=None):
+    """Join consecutive runs of ``tokens``, ``lengths[i]`` tokens for row i."""
+    ends = np.cumsum(lengths).tolist()
+    tokens = tokens.tolist()
+    start = 0
+    out = []
+    for end in ends:
+        out.append(sep.join(tokens[start:end]) if end > start else empty)
+        start = end
+    return out
+
+
+def _words(text):
+    return text.split()
+
+
+def _names(text):
+    return [name for name in (part.strip() for part in text.split(",")) if name]
+
+
+class CatalogModel:
+    """Per-column empirical distributions of a real catalog."""
+
+    def __init__(self, df):
+        df = df.reset_index(drop=True)
+        self.columns = list(df.columns)
+        self.types = _distribution(df["type"])
+        self.per_type = {}
+        for type_, group in df.groupby("type"):
+            self.per_type[type_] = {
+                column: _distribution(group[column]) for column in PER_TYPE_COLUMNS if column in df
+            }
+            self.per_type[type_]["cast_length"] = _distribution(_lengths(group["cast"], _names))
+        self.cast_names = _distribution(explode_values(df["cast"]))
+        self.title_lengths = _distribution(_lengths(df["title"], _words))
+        self.title_words = _distribution(np.concatenate(df["title"].astype("str").str.split().to_numpy()))
+        self.description_lengths = _distribution(_lengths(df["description"], _words))
+        self.description_words = _distribution(
+            np.concatenate(df["description"].fillna("").astype("str").str.split().to_numpy())
+        )
+        # Fixed categories, so every typed chunk shares one Arrow dictionary
+        self.categories = {
+            column: sorted(df[column].dropna().astype("str").unique())
+            for column in CATEGORICAL_COLUMNS if column in df
+        }
+
+    def sample(self, n, rng, first_id):
+        """``n`` synthetic titles with show_ids ``s<first_id>``, ``s<first_id + 1>``, ..."""
+        types = _draw(self.types, n, rng)
+        columns = {column: np.empty(n, dtype=object) for column in PER_TYPE_COLUMNS}
+        cast_lengths = np.zeros(n, dtype=np.int64)
+        for type_, distributions in self.per_type.items():
+            rows = np.flatnonzero(types == type_)
+            for column in PER_TYPE_COLUMNS:
+                if column in distributions:
+                    columns[column][rows] = _draw(distributions[column], len(rows), rng)
+            cast_lengths[rows] = _draw(distributions["cast_length"], len(rows), rng).astype(np.int64)
+
+        title_lengths = np.maximum(_draw(self.title_lengths, n, rng).astype(np.int64), 1)
+        description_lengths = _draw(self.description_lengths, n, rng).astype(np.int64)
+        out = pd.DataFrame({
+            "show_id": [f"s{i}" for i in range(first_id, first_id + n)],
+            "type": types,
+            "title": _join(_draw(self.title_words, int(title_lengths.sum()), rng), title_lengths, " "),
+            "cast": _join(_draw(self.cast_names, int(cast_lengths.sum()), rng), cast_lengths, ", "),
+            "description": [
+                text[:1].upper() + text[1:].rstrip(".") + "."
+                for text in _join(
+                    _draw(self.description_words, int(description_lengths.sum()), rng),
+                    description_lengths, " ", empty="",
+                )
+            ],
+            **columns,
+        })
+        out["release_year"] = out["release_year"].astype("int64")
+        return out.reindex(columns=self.columns)
+
+    def typed(self, chunk):
+        """typed_frame(chunk) with the model's fixed categories."""
+        typed = typed_frame(chunk)
+        for column, categories in self.categories.items():
+            typed[column] = typed[column].cat.set_categories(categories)
+        return typed
+
+
+def iter_catalog(source_df, rows, seed=0, chunk_rows=CHUNK_ROWS):
+    """Yield the real catalog, then synthetic chunks, ``rows`` titles in total."""
+    rng = np.random.default_rng(seed)
+    model = CatalogModel(source_df)
+    yield model, source_df.iloc[:rows]
+    produced = min(rows, len(source_df))
+    while produced < rows:
+        n = min(chunk_rows, rows - produced)
+        yield model, model.sample(n, rng, first_id=produced + 1)
+        produced += n
+
+
+class _ArrowWriter:
+    """Streams typed chunks into an Arrow file, then stamps it as a snapshot of the CSV."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.schema = None
+        self.writer = None
+
+    def write(self, typed):
+        table = pa.Table.from_pandas(typed, schema=self.schema, preserve_index=False)
+        if self.writer is None:
+            self.schema = table.schema
+            self.writer = pa.ipc.new_file(self.tmp_path, self.schema)
+        self.writer.write_table(table)
+
+    def close(self, csv_path=None):
+        self.writer.close()
+        if csv_path is None:
+            os.replace(self.tmp_path, self.path)
+            return
+        # The snapshot stamp needs the finished CSV's size and mtime
+        with pa.memory_map(self.tmp_path) as source:
+            reader = pa.ipc.open_file(source)
+            schema = reader.schema.with_metadata({**(reader.schema.metadata or {}), **_source_stamp(csv_path)})
+            with pa.ipc.new_file(self.path, schema) as writer:
+                for i in range(reader.num_record_batches):
+                    writer.write_batch(reader.get_batch(i))
+        os.remove(self.tmp_path)
+
+
+def write_catalog(source, rows, csv_path=None, db_path=None, arrow_path=None, seed=0,
+                  chunk_rows=CHUNK_ROWS):
+    """Generate ``rows`` titles fitted to ``source`` and write each requested output.
+
+    Returns the SQLite timing report (or None). With a CSV, the Arrow file is
+    stamped as its snapshot, so load_dataset() reads it instead of parsing,
+    and the database records the CSV's version, so the API doesn't re-sync it.
+    """
+    if arrow_path and pa is None:
+        raise RuntimeError("pyarrow is required for the arrow output")
+    source_df = pd.read_csv(source)
+    arrow = _ArrowWriter(arrow_path) if arrow_path else None
+    csv_file = open(csv_path + ".tmp", "w", newline="", encoding="utf-8") if csv_path else None
+
+    def typed_chunks():
+        for i, (model, chunk) in enumerate(iter_catalog(source_df, rows, seed, chunk_rows)):
+            if csv_file:
+                chunk.to_csv(csv_file, index=False, header=i == 0)
+            if arrow or db_path:
+                typed = model.typed(chunk)
+                if arrow:
+                    arrow.write(typed)
+                yield typed
+
+    report = None
+    try:
+        if db_path:
+            conn = sqlite3.connect(db_path)
+            try:
+                tune_for_loading(conn)
+                report = load_titles(conn, typed_chunks())
+                conn.execute("ANALYZE")
+            finally:
+                conn.close()
+        else:
+            for _ in typed_chunks():
+                pass
+    finally:
+        if csv_file:
+            csv_file.close()
+    if csv_path:
+        os.replace(csv_path + ".tmp", csv_path)
+        if db_path:
+            conn = sqlite3.connect(db_path)
+            try:
+                with conn:
+                    write_source_stamp(conn, file_version(csv_path))
+            finally:
+                conn.close()
+    if arrow:
+        arrow.close(csv_path)
+    return report
+
+
+def scaled_path(source, factor, out_dir=None):
+    """``netflix_titles_10x.csv`` next to ``source`` (or in ``out_dir``)."""
+    stem, ext = os.path.splitext(os.path.basename(source))
+    return os.path.join(out_dir or os.path.dirname(source) or ".", f"{stem}_{factor}x{ext}")
+
+
+def write_scaled_csv(source, factor, path=None, seed=0):
+    """Write a catalog ``factor`` times the size of ``source`` as CSV; return (path, rows)."""
+    path = path or scaled_path(source, factor)
+    rows = factor * len(pd.read_csv(source, usecols=[0]))
+    write_catalog(source, rows, csv_path=path, seed=seed)
+    return path, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("factors", nargs="*", type=int, help="sizes as multiples of the source")
+    parser.add_argument("--rows", type=int, help="total titles (instead of factors)")
+    parser.add_argument("--source", default="netflix_titles.csv")
+    parser.add_argument("--out", default=None, help="output directory (default: next to source)")
+    parser.add_argument("--name", help="output file stem (default: <source>_<factor>x)")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="any of csv,sqlite,arrow")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    formats = set(args.formats.split(","))
+    source_rows = len(pd.read_csv(args.source, usecols=[0]))
+    if args.rows:
+        sizes = [(args.name or f"{os.path.splitext(os.path.basename(args.source))[0]}_{args.rows}", args.rows)]
+    else:
+        sizes = [
+            (os.path.splitext(os.path.basename(scaled_path(args.source, factor)))[0], factor * source_rows)
+            for factor in args.factors or SCALES
+        ]
+
+    out_dir = args.out or os.path.dirname(args.source) or "."
+    for stem, rows in sizes:
+        base = os.path.join(out_dir, stem)
+        csv_path = base + ".csv" if "csv" in formats else None
+        start = time.perf_counter()
+        report = write_catalog(
+            args.source, rows,
+            csv_path=csv_path,
+            db_path=base + ".db" if "sqlite" in formats else None,
+            arrow_path=(snapshot_path(csv_path) if csv_path else base + ".arrow") if "arrow" in formats else None,
+            seed=args.seed,
+        )
+        print(f"{stem}: {rows:,} rows in {time.perf_counter() - start:.1f}s")
+        for ext in (".csv", ".db", ".arrow"):
+            if os.path.exists(base + ext):
+                print(f"  {base + ext}  {os.path.getsize(base + ext) / 1e6:,.1f} MB")
+        if report:
+            print_report(report)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
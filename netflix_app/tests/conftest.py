@@ -0,0 +1,47 @@
+"""Shared fixtures: small slices of the bundled catalog, and edited versions of them.
+
+    cd netflix_app && python -m pytest tests
+"""
+import itertools
+import os
+import sys
+import time
+
+import pandas as pd
+import pytest
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # netflix_app/
+sys.path.insert(0, HERE)
+
+SOURCE_CSV = os.path.join(HERE, "netflix_titles.csv")
+SAMPLE_ROWS = 300
+_versions = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def raw_titles():
+    """The first SAMPLE_ROWS titles, as read from the CSV (untyped)."""
+    return pd.read_csv(SOURCE_CSV, nrows=SAMPLE_ROWS)
+
+
+def edit_titles(raw, changed=True, added=True, removed=()):
+    """A new version of ``raw``: a few titles edited, two inserted mid-file, some removed."""
+    new = raw.copy()
+    if changed:
+        new.loc[new["show_id"] == "s1", ["title", "country"]] = ["Zebra Crossing Special", "Iceland"]
+        new.loc[new["show_id"] == "s2", ["rating", "listed_in"]] = ["NEW-RATING", "Dramas, Zebra Films"]
+        new.loc[new["show_id"] == "s5", ["cast", "release_year"]] = ["Jane Zebra, John Doe", 1950]
+    if added:
+        extra = new.iloc[[3, 7]].copy()
+        extra["show_id"] = ["s90001", "s90002"]
+        extra["title"] = ["Brand New Zebra Title", "Another Arrival"]
+        extra["country"] = ["Atlantis", "India, Atlantis"]
+        new = pd.concat([new.iloc[:100], extra, new.iloc[100:]], ignore_index=True)
+    return new[~new["show_id"].isin(removed)].reset_index(drop=True)
+
+
+def write_csv(frame, path):
+    """Write ``frame`` to ``path`` as a new file version (a later mtime than any before)."""
+    frame.to_csv(path, index=False)
+    mtime = time.time() + next(_versions)  # distinct, even within the filesystem's mtime resolution
+    os.utime(path, (mtime, mtime))
@@ -0,0 +1,185 @@
+"""Keyset pagination (/api/netflix?cursor=): cursor tokens, seeks, and paging through edits."""
+import base64
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import write_csv
+from ingest import typed_frame
+from sort_index import KeyIndex, SortIndex
+
+
+@pytest.fixture(scope="module")
+def api(tmp_path_factory):
+    """(app module, dataset path): the API serving a temporary copy of the sample catalog."""
+    path = str(tmp_path_factory.mktemp("catalog") / "titles.csv")
+    os.environ["NETFLIX_DATASET"] = path
+    try:
+        import app
+    finally:
+        del os.environ["NETFLIX_DATASET"]
+    assert app.CSV_FILE == path, "app was imported earlier with another dataset"
+    return app, path
+
+
+@pytest.fixture(scope="module")
+def catalog(raw_titles):
+    """The sample catalog shuffled, so that file order and show_id order differ."""
+    return raw_titles.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+@pytest.fixture
+def client(api, catalog):
+    app, path = api
+    write_csv(catalog, path)
+    return app.app.test_client()
+
+
+def shortlex(show_ids):
+    return sorted(show_ids, key=lambda show_id: (len(show_id), show_id))
+
+
+def page(client, query, cursor=""):
+    response = client.get(f"/api/netflix?{query}&cursor={cursor}")
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert response.headers.get("X-Next-Cursor") == body["next_cursor"]
+    return [row["show_id"] for row in body["results"]], body["next_cursor"]
+
+
+def walk(client, query, max_pages=100):
+    """show_ids of every page, in order, and the number of pages."""
+    show_ids, cursor = [], ""
+    for pages in range(1, max_pages + 1):
+        rows, cursor = page(client, query, cursor)
+        show_ids += rows
+        if cursor is None:
+            return show_ids, pages
+    pytest.fail(f"still a next_cursor after {max_pages} pages")
+
+
+# ---------- Tokens ----------
+@pytest.mark.parametrize("source, after", [("xlsx", "s42"), ("sql", 42), ("scan", 7)])
+def test_cursor_round_trip(api, source, after):
+    app, _ = api
+    assert app.decode_cursor(app.encode_cursor(source, after, "v1"), source, "v1") == after
+    assert app.decode_cursor("", source) is None
+
+
+def _token(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("token, source", [
+    ("not a cursor!", "xlsx"),
+    (_token(["s1"]), "xlsx"),
+    (_token({"s": "xlsx"}), "xlsx"),
+    (_token({"s": "sql", "a": "s5"}), "sql"),  # show_id where a row id belongs
+    (_token({"s": "xlsx", "a": 5}), "xlsx"),
+])
+def test_malformed_cursor(api, token, source):
+    app, _ = api
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        app.decode_cursor(token, source)
+
+
+def test_cursor_tied_to_source_and_version(api):
+    app, _ = api
+    with pytest.raises(ValueError, match="different source"):
+        app.decode_cursor(app.encode_cursor("sql", 42), "xlsx")
+    with pytest.raises(ValueError, match="another version"):
+        app.decode_cursor(app.encode_cursor("scan", 42, "v1"), "scan", "v2")
+
+
+# ---------- Seeks ----------
+def test_key_index_orders_shortest_first():
+    keys = pd.Series(["s10", "s2", "s1", "s100", "s11", "s9"])
+    index = KeyIndex(keys)
+    assert keys.iloc[index.order].tolist() == ["s1", "s2", "s9", "s10", "s11", "s100"]
+    assert index.after("s2") == 2
+    assert index.after("s95") == 5  # a key that isn't there: the rows sorting after it
+    assert index.after("s0") == 0
+    assert index.after("s101") == 6
+
+
+@pytest.mark.parametrize("column", [None, "title", "release_year", "duration", "date_added"])
+@pytest.mark.parametrize("descending", [False, True])
+def test_sort_index_page(raw_titles, monkeypatch, column, descending):
+    monkeypatch.setattr("sort_index.SCAN_CHUNK", 16)  # pages span several chunks
+    df = typed_frame(raw_titles.copy())
+    mask = (df["type"] == "Movie").to_numpy()
+    index = SortIndex(df)
+    rows = index.rows(mask, column, descending)
+    if column is None:
+        expected = np.flatnonzero(mask)[::-1] if descending else np.flatnonzero(mask)
+        np.testing.assert_array_equal(rows, expected)
+    else:
+        keys = index.order(column, descending)
+        ranks = np.empty(len(df), dtype=np.int64)
+        ranks[keys] = np.arange(len(df))
+        assert (np.diff(ranks[rows]) > 0).all()
+    for offset in [0, 5, 40, len(rows) - 3]:
+        np.testing.assert_array_equal(index.page(mask, column, descending, offset, 10), rows[offset : offset + 10])
+
+
+# ---------- Paging ----------
+@pytest.mark.parametrize("source", ["xlsx", "sql"])
+@pytest.mark.parametrize("filters", ["", "type=Movie", "title=the", "country=India&type=TV%20Show"])
+def test_walk_every_page(client, source, filters):
+    query = f"source={source}&limit=25&{filters}"
+    show_ids, pages = walk(client, query)
+    everything = client.get(f"/api/netflix?source={source}&{filters}").get_json()
+    expected = [row["show_id"] for row in everything]
+    assert len(show_ids) == len(set(show_ids))
+    # The CSV source pages in show_id order, shortest first; SQLite in row id (file) order
+    assert show_ids == (shortlex(expected) if source == "xlsx" else expected)
+    assert pages == max(1, -(-len(expected) // 25))
+
+
+@pytest.mark.parametrize("source", ["xlsx", "sql"])
+def test_pages_survive_edits_before_the_cursor(client, api, catalog, source):
+    _, path = api
+    query = f"source={source}&limit=50"
+    first, cursor = page(client, query)
+    expected, _ = page(client, query, cursor)
+    if source == "xlsx":
+        assert first[-1] == "s50"  # "s0" and "s3a" sort before it
+
+    # New titles, and titles of the first page removed (the cursor's own included)
+    extra = catalog.iloc[[0, 1]].assign(show_id=["s0", "s3a"], title=["Inserted First", "Inserted Early"])
+    edited = pd.concat([extra, catalog[~catalog["show_id"].isin([first[0], first[-1]])]], ignore_index=True)
+    write_csv(edited, path)
+    assert page(client, query, cursor)[0] == expected
+
+
+def test_cursor_errors(client):
+    _, cursor = page(client, "limit=10")
+    _, sql_cursor = page(client, "source=sql&limit=10")
+    for url in [
+        f"/api/netflix?source=sql&cursor={cursor}",
+        f"/api/netflix?cursor={sql_cursor}",
+        "/api/netflix?cursor=garbage",
+        f"/api/netflix?q=love&cursor={cursor}",
+        "/api/netflix?q=love&cursor=",
+    ]:
+        response = client.get(url)
+        assert response.status_code == 400, url
+        assert "error" in response.get_json()
+
+
+def test_out_of_core_cursor_expires_with_the_file(client, api, catalog, monkeypatch):
+    app, path = api
+    monkeypatch.setattr(app, "OUT_OF_CORE", True)
+    show_ids, _ = walk(client, "limit=40&type=Movie")
+    expected = catalog.loc[catalog["type"] == "Movie", "show_id"].tolist()
+    assert show_ids == expected  # scans page in file order
+
+    first, cursor = page(client, "limit=40")
+    assert page(client, "limit=40", cursor)[0] == catalog["show_id"].iloc[40:80].tolist()
+    write_csv(catalog, path)
+    response = client.get(f"/api/netflix?limit=40&cursor={cursor}")
+    assert response.status_code == 400
+    assert "another version" in response.get_json()["error"]
@@ -0,0 +1,178 @@
+"""Incremental refresh (refresh.py): patched structures must equal full rebuilds."""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import edit_titles, write_csv
+from create_db import SIDE_TABLES, build_database, read_source_stamp, sync_titles
+from cube import TrendsCube
+from dataset_cache import DatasetCache
+from dimensions import Dimensions
+from facets import FacetIndex
+from ingest import typed_frame
+from recommender import Recommender, _top_k
+from refresh import refresh_frame
+from search_index import SearchIndex
+
+
+@pytest.fixture(scope="module")
+def refreshed(raw_titles):
+    """(old frame, refreshed frame, Changes) for edit_titles()."""
+    old = typed_frame(raw_titles.copy())
+    frame, changes = refresh_frame(old, typed_frame(edit_titles(raw_titles)))
+    return old, frame, changes
+
+
+def test_refresh_keeps_positions(refreshed):
+    old, frame, changes = refreshed
+    assert frame["show_id"].iloc[: len(old)].tolist() == old["show_id"].tolist()
+    assert frame["show_id"].iloc[len(old):].tolist() == ["s90001", "s90002"]
+    assert frame["show_id"].iloc[changes.changed].tolist() == ["s1", "s2", "s5"]
+    assert changes.summary() == {"changed": 3, "added": 2}
+    assert changes.previous["title"].tolist() == old["title"].iloc[changes.changed].tolist()
+
+
+def test_refresh_without_changes(raw_titles):
+    old = typed_frame(raw_titles.copy())
+    frame, changes = refresh_frame(old, typed_frame(raw_titles.copy()))
+    assert not changes
+    assert frame["show_id"].tolist() == old["show_id"].tolist()
+
+
+@pytest.mark.parametrize("edit", [
+    lambda raw: edit_titles(raw, removed=["s3"]),
+    lambda raw: pd.concat([raw, raw.iloc[[0]]], ignore_index=True),  # duplicate show_id
+    lambda raw: raw.drop(columns=["description"]),
+])
+def test_refresh_needs_rebuild(raw_titles, edit):
+    assert refresh_frame(typed_frame(raw_titles.copy()), typed_frame(edit(raw_titles))) is None
+
+
+def test_dimensions_patch(refreshed):
+    old, frame, changes = refreshed
+    patched, rebuilt = Dimensions(old).patch(frame, changes), Dimensions(frame)
+    assert patched.tables.keys() == rebuilt.tables.keys()
+    for name, table in rebuilt.tables.items():
+        pd.testing.assert_frame_equal(patched.tables[name], table)
+        assert patched.values(name) == rebuilt.values(name)
+
+
+def test_facets_patch(refreshed):
+    old, frame, changes = refreshed
+    dims = Dimensions(old)
+    patched = FacetIndex(old, dims).patch(frame, dims.patch(frame, changes), changes)
+    rebuilt = FacetIndex(frame, Dimensions(frame))
+    assert patched.size == rebuilt.size
+    for facet, bitmaps in rebuilt.bitmaps.items():
+        assert patched.values(facet) == rebuilt.values(facet)
+        for value, bits in bitmaps.items():
+            np.testing.assert_array_equal(patched.bitmaps[facet][value], bits, err_msg=f"{facet}={value}")
+    selection = rebuilt.select(country="Atlantis")
+    assert frame["show_id"].iloc[patched.row_ids(selection)].tolist() == ["s90001", "s90002"]
+
+
+def test_search_index_patch(refreshed):
+    old, frame, changes = refreshed
+    patched, rebuilt = SearchIndex(old).patch(frame, changes), SearchIndex(frame)
+    docs = "SELECT rowid, * FROM docs ORDER BY rowid"
+    assert patched._conn.execute(docs).fetchall() == rebuilt._conn.execute(docs).fetchall()
+    for text in ["zebra", "crossing", "love", "the"]:
+        assert patched.search(text) == rebuilt.search(text)
+    assert SearchIndex(old).search("zebra") == []
+
+
+def test_cube_patch(refreshed):
+    old, frame, changes = refreshed
+    patched, rebuilt = TrendsCube.from_frame(old).patch(frame, changes), TrendsCube.from_frame(frame)
+    assert patched.series() == rebuilt.series()
+    for selection in [{"country": "Atlantis"}, {"country": "Iceland"}, {"rating": "NEW-RATING"},
+                      {"genre": "Zebra Films"}, {"country": "United States"}]:
+        assert patched.series(**selection) == rebuilt.series(**selection)
+    np.testing.assert_array_equal(patched.row_hashes, rebuilt.row_hashes)
+
+
+def test_recommender_patch(raw_titles, refreshed):
+    old, frame, changes = refreshed
+    patched = Recommender(old).patch(frame, changes)
+    assert patched is not None
+    assert patched.show_ids == frame["show_id"].tolist()
+    # Every neighbour list, patched or merged into, equals an exact search on the same features
+    k = patched.neighbours.shape[1]
+    _, scores = _top_k(patched.features, k)
+    np.testing.assert_allclose(patched.scores, scores, rtol=1e-5, atol=1e-6)
+    # An added title (a copy of s4 with another title and country) is recommendable at once
+    ids, _ = patched.similar(patched.row_of("s90001"), limit=1)
+    assert frame["show_id"].iloc[ids].tolist() == ["s4"]
+    # A catalog refreshed too much at once is rebuilt
+    rewritten = raw_titles.assign(description="Zebra " + raw_titles["description"])
+    frame, changes = refresh_frame(old, typed_frame(edit_titles(rewritten)))
+    assert Recommender(old).patch(frame, changes) is None
+
+
+def test_dataset_cache_patches_then_rebuilds(raw_titles, tmp_path):
+    path = str(tmp_path / "titles.csv")
+    write_csv(raw_titles, path)
+    cache = DatasetCache(lambda p: typed_frame(pd.read_csv(p)), [path], refresh=refresh_frame)
+    patches = []
+
+    def patch(dims, frame, changes):
+        patches.append(changes.summary())
+        return dims.patch(frame, changes)
+
+    def dimensions():
+        return cache.derived("dimensions", Dimensions, patch)
+
+    dimensions()
+    write_csv(edit_titles(raw_titles), path)
+    patched = dimensions()
+    assert patches == [{"changed": 3, "added": 2}]
+    for name, table in Dimensions(cache.get()).tables.items():
+        pd.testing.assert_frame_equal(patched.tables[name], table)
+
+    # A removed title shifts positions: rebuilt, not patched
+    write_csv(edit_titles(raw_titles, removed=["s3"]), path)
+    rebuilt = dimensions()
+    assert len(patches) == 1
+    assert "s3" not in cache.get()["show_id"].tolist()
+    assert rebuilt.size == len(raw_titles) + 1
+
+
+def _snapshot(db_path):
+    """Every table's contents keyed by show_id, so that ids may differ."""
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = {"netflix": sorted(row[1:] for row in conn.execute("SELECT * FROM netflix"))}  # without the id
+        for table, value in SIDE_TABLES.values():
+            tables[table] = sorted(conn.execute(
+                f"SELECT n.show_id, t.{value} FROM {table} t JOIN netflix n ON n.id = t.title_id"
+            ).fetchall())
+        tables["netflix_fts"] = {
+            text: sorted(row[0] for row in conn.execute(
+                "SELECT n.show_id FROM netflix_fts JOIN netflix n ON n.id = netflix_fts.rowid "
+                "WHERE netflix_fts MATCH ?", (text,)))
+            for text in ["zebra", "dick", "johnson", "love", "india", "atlantis"]  # s1 was "Dick Johnson Is Dead"
+        }
+        conn.execute("INSERT INTO netflix_fts(netflix_fts) VALUES ('integrity-check')")  # index == content
+        return tables
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("removed", [(), ("s3", "s250")])
+def test_sync_titles_matches_fresh_build(raw_titles, tmp_path, removed):
+    synced, fresh = str(tmp_path / "synced.db"), str(tmp_path / "fresh.db")
+    new = typed_frame(edit_titles(raw_titles, removed=removed))
+    build_database(synced, typed_frame(raw_titles.copy()), stamp="v1")
+    build_database(fresh, new, stamp="v2")
+
+    conn = sqlite3.connect(synced)
+    try:
+        counts = sync_titles(conn, new, "v2")
+        assert counts == {"changed": 3, "added": 2, "removed": len(removed)}
+        assert read_source_stamp(conn) == "v2"
+        assert sync_titles(conn, new, "v2") is None  # already synced
+    finally:
+        conn.close()
+    assert _snapshot(synced) == _snapshot(fresh)